@@ -141,4 +141,13 @@ const energyAPI = {
     async predictConsumption(data) {
         return api.post(API_ENDPOINTS.ENERGY_PREDICT, data);
     }
-};
\ No newline at end of file
+};
+// Trip Planning API
+const tripAPI = {
+    /**
+     * Run the full driving -> energy -> battery -> optimal path chain in one request
+     */
+    async planTrip(data) {
+        return api.post(API_ENDPOINTS.TRIP_PLAN, data);
+    }
+};
@@ -18,7 +18,10 @@ const API_ENDPOINTS = {
     OPTIMAL_PATH_PREDICT: '/optimal-path/predict',
 
     // Energy Consumption
-    ENERGY_PREDICT: '/energy/predict'
+    ENERGY_PREDICT: '/energy/predict',
+
+    // Trip Planning (full model chain in one request)
+    TRIP_PLAN: '/trip/plan'
 };
 
 // Vehicle Models
@@ -2,25 +2,55 @@ import os
 import csv
 from typing import List, Dict
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 from routes.driving_route import driving_bp
 from routes.external_route import external_bp
 from routes.optimal_path_route import optimal_path_bp
 from routes.energy_route import energy_bp
 from routes.battery_route import battery_bp
+from routes.trip_route import trip_bp
+from routes.routing_route import routing_bp
+from routes.charging_route import charging_bp
+from routes.stream_route import stream_bp
+from controllers.external_api_controller import start_weather_refresher, weather_cache_stats, weather_client_stats
+from controllers.warmup_controller import is_ready, mark_ready, readiness, start_background_warm_up, warm_up_models
+from services.http_client import end_budget, start_budget
+from services.metrics import install_metrics
+from services.model_manager import model_versions, start_model_manager
+from services.prediction_cache import all_cache_stats
 
 
 def create_app() -> Flask:
 	app = Flask(__name__)
 	CORS(app, resources={r"/api/*": {"origins": "*"}})
+	install_metrics(app)
 
-	# Register blueprints
+	# Upstream calls made while handling a request share this time budget
+	request_budget = float(os.getenv("REQUEST_BUDGET", "5"))
+
+	@app.before_request
+	def _start_request_budget():
+		g._budget_token = start_budget(request_budget)
+
+	@app.teardown_request
+	def _end_request_budget(exc):
+		token = g.pop("_budget_token", None)
+		if token is not None:
+			end_budget(token)
+
+	# Register blueprints. Route modules import their controllers inside the
+	# views, so none of this pulls in numpy/pandas/sklearn: /health answers as
+	# soon as the server binds, and the models load in the warm-up below
 	app.register_blueprint(driving_bp, url_prefix="/api/driving")
 	app.register_blueprint(external_bp, url_prefix="/api/external")
 	app.register_blueprint(optimal_path_bp, url_prefix="/api/optimal-path")
 	app.register_blueprint(energy_bp, url_prefix="/api/energy")
 	app.register_blueprint(battery_bp, url_prefix="/api/battery")
+	app.register_blueprint(trip_bp, url_prefix="/api/trip")
+	app.register_blueprint(routing_bp, url_prefix="/api/routing")
+	app.register_blueprint(charging_bp, url_prefix="/api/charging")
+	app.register_blueprint(stream_bp, url_prefix="/api/stream")
 
 	@app.route("/")
 	def root():
@@ -30,11 +60,61 @@ def create_app() -> Flask:
 	def health():
 		return jsonify({"status": "ok"})
 
+	@app.route("/ready")
+	def ready():
+		return jsonify(readiness()), 200 if is_ready() else 503
+
 	@app.route("/api/ping")
 	def ping():
 		return jsonify({"ping": "pong"})
 
-	
+	@app.route("/api/cache/stats")
+	def cache_stats():
+		return jsonify({
+			"predictions": all_cache_stats(),
+			"weather": weather_cache_stats(),
+			"weather_client": weather_client_stats(),
+		})
+
+	@app.route("/api/models/memory")
+	def models_memory():
+		from services.shared_models import memory_report
+		return jsonify(memory_report())
+
+	@app.route("/api/models/versions")
+	def models_versions():
+		return jsonify(model_versions())
+
+	# Load and warm every model so no request pays for it; /ready flips after.
+	# By default this runs in a background thread so the server can bind and
+	# pass liveness checks first; WARMUP_BACKGROUND=0 blocks until it is done
+	# (wsgi.py does this so the models are loaded before gunicorn forks)
+	if os.getenv("PRELOAD_MODELS", "1") == "1":
+		if os.getenv("WARMUP_BACKGROUND", "1") == "1":
+			start_background_warm_up()
+		else:
+			warm_up_models()
+	else:
+		mark_ready()
+
+	# Threads do not survive fork, so the refresher is started by the process
+	# that serves requests: on its first request, or by the server's post_fork
+	# hook (gunicorn.conf.py), never in a pre-fork master
+	if os.getenv("WEATHER_PREFETCH", "1") == "1":
+		@app.before_request
+		def _start_weather_refresher():
+			if app.config.get("_REFRESHER_PID") != os.getpid():
+				start_weather_refresher()
+				app.config["_REFRESHER_PID"] = os.getpid()
+
+	# Retrain loaded models in the background when their datasets change
+	if os.getenv("MODEL_WATCH", "1") == "1":
+		@app.before_request
+		def _start_model_manager():
+			if app.config.get("_MODEL_MANAGER_PID") != os.getpid():
+				start_model_manager()
+				app.config["_MODEL_MANAGER_PID"] = os.getpid()
+
 	return app
 
 
@@ -45,5 +125,7 @@ if __name__ == "__main__":
 	host = os.getenv("HOST", "0.0.0.0")
 	port = int(os.getenv("PORT", "5000"))
 	debug = os.getenv("FLASK_DEBUG", "1") == "1"
+	if os.getenv("WEATHER_PREFETCH", "1") == "1":
+		start_weather_refresher()
 	app.run(host=host, port=port, debug=debug)
 
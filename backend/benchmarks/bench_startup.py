@@ -0,0 +1,82 @@
+"""
+Benchmark: app startup time, broken down with python -X importtime
+
+Imports the app in a fresh interpreter with model preloading off, so the
+time measured is what a restarted container spends before it can answer
+/health. Prints the total and the slowest imports by cumulative time.
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --top 30 --module controllers.energy_controller
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by the model controllers only; none of them belong on the startup path
+HEAVY_MODULES = ("numpy", "pandas", "scipy", "sklearn")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Map module name -> (self_us, cumulative_us) from -X importtime output."""
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        timings[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return timings
+
+
+def measure_startup(module: str = "app") -> Dict[str, Tuple[int, int]]:
+    """Import module in a fresh interpreter and return its import timings."""
+    env = dict(os.environ, PRELOAD_MODELS="0", WEATHER_PREFETCH="0")
+    # Import once to make sure bytecode is cached, then measure a warm start
+    for _ in range(2):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def heavy_imports(timings: Dict[str, Tuple[int, int]]) -> List[str]:
+    return sorted(name for name in timings if name.split(".")[0] in HEAVY_MODULES)
+
+
+def slowest(timings: Dict[str, Tuple[int, int]], top: int = 10) -> List[Tuple[str, float]]:
+    """The top modules by cumulative import time, in milliseconds."""
+    ranked = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    return [(name, cumulative / 1000) for name, (_, cumulative) in ranked[:top]]
+
+
+def format_breakdown(timings: Dict[str, Tuple[int, int]], top: int = 10) -> str:
+    return "\n".join(f"  {ms:9.1f} ms  {name}" for name, ms in slowest(timings, top))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--top", type=int, default=15, help="Number of imports to list")
+    args = parser.parse_args(argv)
+
+    timings = measure_startup(args.module)
+    total_ms = timings[args.module][1] / 1000
+    print(f"import {args.module}: {total_ms:.1f} ms across {len(timings)} modules")
+    print(format_breakdown(timings, args.top))
+    heavy = heavy_imports(timings)
+    if heavy:
+        print(f"Heavy modules on the startup path: {', '.join(sorted({name.split('.')[0] for name in heavy}))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Benchmark: compiled tree engine vs sklearn predict
+
+Run from the backend directory:
+    python -m benchmarks.bench_tree_engine
+"""
+import os
+import time
+import warnings
+
+# Compare against the sklearn estimators, not the shared compact forests
+os.environ["SHARED_MODELS"] = "0"
+
+import numpy as np
+import pandas as pd
+
+from controllers import battery_range_controller, energy_controller, optimal_path_controller
+from services.tree_engine import compile_model
+
+
+def _time_per_call(fn, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def _models():
+    energy = energy_controller._load_model()
+    battery = battery_range_controller._load_model()
+    optimal_path_controller._get_model()
+    return {
+        "energy (RF)": (energy.model, energy.feature_columns),
+        "battery (RF)": (battery.model, battery.feature_columns),
+        "optimal_path (GBR)": (optimal_path_controller._model, optimal_path_controller.MODEL_FEATURE_COLUMNS),
+    }
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    rng = np.random.default_rng(0)
+
+    print(f"{'model':<20} {'rows':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8} {'identical':>10}")
+    for name, (model, columns) in _models().items():
+        compiled = compile_model(model)
+        for rows in (1, 10, 1000):
+            X = rng.uniform(0, 100, size=(rows, len(columns)))
+            frame = pd.DataFrame(X, columns=columns)
+            repeat = 200 if rows <= 10 else 10
+
+            sk = _time_per_call(lambda: model.predict(frame), repeat)
+            fast = _time_per_call(lambda: compiled.predict(X), repeat)
+            identical = np.array_equal(model.predict(frame), compiled.predict(X))
+            print(f"{name:<20} {rows:>6} {sk * 1000:>11.3f} {fast * 1000:>12.3f} {sk / fast:>7.1f}x {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Controller and route microbenchmarks with a regression baseline
+
+Times every controller function and Flask route in-process (routes through
+the Flask test client) at batch sizes 1, 10, 1k and 10k, reports p50/p95/p99
+latency and throughput, and times cold start (fresh interpreter: imports,
+model load and first prediction) separately from warm calls.
+
+Run from the backend directory:
+    python -m benchmarks.run_benchmarks                   # compare to baseline
+    python -m benchmarks.run_benchmarks --save-baseline   # record a new baseline
+    python -m benchmarks.run_benchmarks --quick --only energy
+
+Exits with status 1 when any case's latency regresses by more than
+--threshold (default 25%) against benchmarks/baseline.json. Baselines are
+machine specific; record one on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Measure the models, not the caches or the network
+os.environ.setdefault("PREDICTION_CACHE_ENABLED", "0")
+os.environ.setdefault("WEATHER_PREFETCH", "0")
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BATCH_SIZES = [1, 10, 1000, 10000]
+ITERATIONS = {1: 200, 10: 100, 1000: 20, 10000: 5}
+QUICK_ITERATIONS = {1: 20, 10: 10, 1000: 3, 10000: 1}
+
+
+# -----------------------------
+# Record generators
+
+def _energy_records(n: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    styles = ["Eco", "Normal", "Aggressive"]
+    roads = ["city", "highway", "rural", "coastal"]
+    weathers = ["sunny", "light_rain", "heavy_rain", "monsoon"]
+    return [{
+        "distance_km": float(rng.uniform(5, 300)),
+        "driving_style": styles[rng.integers(3)],
+        "road_type": roads[rng.integers(4)],
+        "weather": weathers[rng.integers(4)],
+        "elevation_gain_m": float(rng.uniform(0, 400)),
+        "avg_speed": float(rng.uniform(20, 90)),
+    } for _ in range(n)]
+
+
+def _battery_records(n: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    return [{
+        "battery_capacity_kWh": float(rng.choice([40, 50, 60, 75])),
+        "battery_percent": float(rng.uniform(10, 100)),
+        "efficiency_kWh_per_km": float(rng.uniform(0.13, 0.22)),
+    } for _ in range(n)]
+
+
+def _optimal_path_records(n: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    roads = ["city", "highway", "rural", "coastal"]
+    traffic = ["low", "medium", "high"]
+    styles = ["Eco", "Normal", "Aggressive"]
+    weathers = ["sunny", "cloudy", "light_rain", "heavy_rain", "monsoon"]
+    return [{
+        "distance_km": float(rng.uniform(5, 150)),
+        "road_type": roads[rng.integers(4)],
+        "traffic_level": traffic[rng.integers(3)],
+        "driving_style": styles[rng.integers(3)],
+        "predicted_energy_kWh": float(rng.uniform(1, 30)),
+        "predicted_range_km": float(rng.uniform(20, 400)),
+        "battery_remaining_percent": float(rng.uniform(10, 100)),
+        "weather": weathers[rng.integers(5)],
+    } for _ in range(n)]
+
+
+def _driving_records(n: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    makes = [("MG", "ZS EV"), ("Nissan", "Leaf"), ("Tesla", "Model 3"), ("BYD", "Atto 3")]
+    roads = ["city", "highway", "rural", "coastal"]
+    weathers = ["sunny", "cloudy", "light_rain", "heavy_rain", "monsoon"]
+    times = ["morning", "afternoon", "evening", "night"]
+    records = []
+    for _ in range(n):
+        make, model = makes[rng.integers(4)]
+        avg_speed = float(rng.uniform(20, 80))
+        records.append({
+            "distance_km": float(rng.uniform(5, 300)),
+            "elevation_gain_m": float(rng.uniform(0, 400)),
+            "avg_speed": avg_speed,
+            "max_speed": avg_speed + float(rng.uniform(5, 30)),
+            "acceleration_mean": float(rng.uniform(0.2, 2.0)),
+            "acceleration_std": float(rng.uniform(0.1, 1.5)),
+            "braking_intensity": float(rng.uniform(0.1, 1.5)),
+            "trip_duration_min": float(rng.uniform(5, 300)),
+            "vehicle_make": make,
+            "vehicle_model": model,
+            "road_type": roads[rng.integers(4)],
+            "weather": weathers[rng.integers(5)],
+            "time_of_day": times[rng.integers(4)],
+        })
+    return records
+
+
+# -----------------------------
+# Cases
+
+def _cases() -> Dict[str, Dict[str, Any]]:
+    """Benchmark targets: single-call controller, batch controller and routes."""
+    from controllers import (
+        battery_range_controller as battery,
+        driving_script_controller as driving,
+        energy_controller as energy,
+        optimal_path_controller as optimal,
+    )
+
+    return {
+        "energy": {
+            "records": _energy_records,
+            "single": lambda r: energy.predict_energy_consumption(**r),
+            "batch": energy.predict_energy_consumption_batch,
+            "route": "/api/energy",
+            "cold": "from controllers.energy_controller import predict_energy_consumption as f; "
+                    "f(50, 'Normal', 'city', 'sunny')",
+        },
+        "battery": {
+            "records": _battery_records,
+            "single": lambda r: battery.predict_battery_range(**r),
+            "batch": battery.predict_battery_range_batch,
+            "route": "/api/battery",
+            "cold": "from controllers.battery_range_controller import predict_battery_range as f; "
+                    "f(50, 80, 0.17)",
+        },
+        "optimal_path": {
+            "records": _optimal_path_records,
+            "single": lambda r: optimal.predict_optimal_path_controller(**r),
+            "batch": optimal.predict_optimal_path_batch,
+            "route": "/api/optimal-path",
+            "cold": "from controllers.optimal_path_controller import predict_optimal_path_controller as f; "
+                    "f(50, 'city', 'medium', 'Normal', 10, 300, 75, weather='sunny')",
+        },
+        "driving": {
+            "records": _driving_records,
+            "single": driving.predict_driving_style_controller,
+            "batch": driving.predict_driving_style_batch,
+            "route": "/api/driving",
+            "available": lambda: os.path.exists(driving.MODEL_PATH),
+            "cold": "from controllers.driving_script_controller import predict_driving_style_controller as f; "
+                    "f({'distance_km': 10})",
+        },
+    }
+
+
+# -----------------------------
+# Measurement
+
+def _summarize(samples: List[float], rows: int) -> Dict[str, float]:
+    arr = np.asarray(samples) * 1000.0
+    p50 = float(np.percentile(arr, 50))
+    return {
+        "iterations": len(samples),
+        "p50_ms": round(p50, 4),
+        "p95_ms": round(float(np.percentile(arr, 95)), 4),
+        "p99_ms": round(float(np.percentile(arr, 99)), 4),
+        "rows_per_s": round(rows / (p50 / 1000.0), 1) if p50 > 0 else 0.0,
+    }
+
+
+def _measure(fn: Callable[[], Any], iterations: int, rows: int) -> Dict[str, float]:
+    fn()  # warm up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _summarize(samples, rows)
+
+
+def _check(result: Any) -> None:
+    """Fail loudly if a benchmarked call did not actually predict."""
+    if isinstance(result, dict) and not result.get("success", True):
+        raise RuntimeError(result.get("error", "prediction failed"))
+    if isinstance(result, list) and result and not result[0].get("success"):
+        raise RuntimeError(result[0].get("error", "prediction failed"))
+
+
+def run_warm(names: List[str], iterations: Dict[int, int]) -> Dict[str, Dict[str, float]]:
+    from app import create_app
+
+    client = create_app().test_client()
+    rng = np.random.default_rng(42)
+    results: Dict[str, Dict[str, float]] = {}
+
+    for name, case in _cases().items():
+        if name not in names:
+            continue
+        if not case.get("available", lambda: True)():
+            print(f"skipping {name}: model not available")
+            continue
+
+        single_records = case["records"](64, rng)
+        _check(case["single"](single_records[0]))
+        counter = iter(range(10 ** 9))
+        results[f"{name}.controller.single"] = _measure(
+            lambda: case["single"](single_records[next(counter) % 64]), iterations[1], 1
+        )
+        results[f"{name}.route.single"] = _measure(
+            lambda: client.post(f"{case['route']}/predict", json=single_records[next(counter) % 64]),
+            iterations[1], 1,
+        )
+
+        for size in BATCH_SIZES:
+            records = case["records"](size, rng)
+            _check(case["batch"](records))
+            results[f"{name}.controller.batch_{size}"] = _measure(
+                lambda: case["batch"](records), iterations[size], size
+            )
+            results[f"{name}.route.batch_{size}"] = _measure(
+                lambda: client.post(f"{case['route']}/predict-batch", json=records), iterations[size], size
+            )
+    return results
+
+
+def run_cold(names: List[str]) -> Dict[str, Dict[str, float]]:
+    """Time import + model load + first prediction in a fresh interpreter."""
+    results: Dict[str, Dict[str, float]] = {}
+    env = dict(os.environ, PRELOAD_MODELS="0")
+    for name, case in _cases().items():
+        if name not in names or not case.get("available", lambda: True)():
+            continue
+        code = (
+            "import time; t0 = time.perf_counter(); "
+            f"{case['cold']}; t1 = time.perf_counter(); "
+            f"{case['cold'].split('; ', 1)[1]}; t2 = time.perf_counter(); "
+            "print((t1 - t0) * 1000, (t2 - t1) * 1000)"
+        )
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        first_ms, second_ms = (float(v) for v in out.stdout.split()[-2:])
+        results[f"{name}.cold_start"] = {
+            "iterations": 1,
+            "first_call_ms": round(first_ms, 2),
+            "warm_call_ms": round(second_ms, 4),
+        }
+    return results
+
+
+# -----------------------------
+# Baseline
+
+def compare(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    metric: str,
+    threshold: float,
+) -> List[str]:
+    """Return a description of every case slower than baseline * (1 + threshold)."""
+    regressions = []
+    for case, stats in current.items():
+        key = metric if metric in stats else "first_call_ms"
+        before = baseline.get(case, {}).get(key)
+        now = stats.get(key)
+        if before and now and now > before * (1 + threshold):
+            regressions.append(f"{case}: {key} {before:.3f} -> {now:.3f} (+{(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'case':<42} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rows/s':>12}")
+    for case, stats in results.items():
+        if "first_call_ms" in stats:
+            print(f"{case:<42} first call {stats['first_call_ms']:.1f} ms, then {stats['warm_call_ms']:.3f} ms")
+        else:
+            print(f"{case:<42} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+                  f"{stats['p99_ms']:>10.3f} {stats['rows_per_s']:>12.0f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", default=["energy", "battery", "optimal_path", "driving"],
+                        help="Models to benchmark")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations (smoke run)")
+    parser.add_argument("--no-cold", action="store_true", help="Skip cold start measurements")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--metric", default="p50_ms", choices=["p50_ms", "p95_ms", "p99_ms"],
+                        help="Latency statistic compared against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown before failing, as a fraction")
+    parser.add_argument("--output", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_warm(args.only, QUICK_ITERATIONS if args.quick else ITERATIONS)
+    if not args.no_cold:
+        results.update(run_cold(args.only))
+    _print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.metric, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions over {args.threshold:.0%} against {os.path.basename(args.baseline)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
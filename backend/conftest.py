@@ -0,0 +1,13 @@
+"""
+Shared pytest configuration for the backend tests
+"""
+import os
+
+# Keep test runs off the network: no background weather prefetching
+os.environ.setdefault("WEATHER_PREFETCH", "0")
+
+# No background retraining either; tests drive the model manager directly
+os.environ.setdefault("MODEL_WATCH", "0")
+
+# Warm models inline so apps built in tests are ready when create_app returns
+os.environ.setdefault("WARMUP_BACKGROUND", "0")
@@ -3,40 +3,92 @@ Battery Range Prediction Controller
 Predicts remaining range based on battery status and efficiency
 """
 
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor
 import os
 
+import numpy as np
+
+from services.feature_schema import FeatureSchema
+from services.metrics import observe_stage, record_error
+from services.model_manager import LoadedModel, ModelSlot
+from services.model_store import artifact_version, load_or_train
+from services.prediction_cache import PredictionCache
+from services.training import fit_model
+from services.shared_models import load_predictor
+from services.tree_engine import predict_with
+
 # Load dataset
 DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'battery_range_dataset_srilanka.csv')
+ARTIFACT_NAME = 'battery_range_rf'
+
+# Predictions keyed on the encoded feature row, rounded per column
+_cache = PredictionCache(
+    'battery',
+    ['battery_capacity_kWh', 'battery_start_%', 'eff_kWh_per_km'],
+    precision={'battery_capacity_kWh': 1, 'battery_start_%': 1, 'eff_kWh_per_km': 3},
+)
+
+def _train_model():
+    """Train the battery range prediction model from the dataset"""
+    return fit_model('battery')
+
+def _load_artifact():
+    """Load the persisted battery range model, retraining only if it is missing or stale"""
+    with observe_stage('battery', 'load'):
+        return load_or_train(ARTIFACT_NAME, DATA_PATH, _train_model)
+
+def _build(artifact):
+    """Everything a prediction needs from one artifact"""
+    schema = (
+        FeatureSchema(artifact["feature_columns"])
+        .numeric('battery_capacity_kWh')
+        .numeric('battery_percent', column='battery_start_%')
+        .numeric('efficiency_kWh_per_km', column='eff_kWh_per_km')
+    )
+    version = artifact_version(artifact)
+    model, compiled = load_predictor(ARTIFACT_NAME, version, artifact["model"])
+    return LoadedModel(version, model, compiled, schema)
 
-# Global model
-_model = None
+# The served model version; the model manager swaps in retrained ones
+_slot = ModelSlot('battery', ARTIFACT_NAME, DATA_PATH, load=_load_artifact, build=_build, cache=_cache)
 
 def _load_model():
-    """Load and train the battery range prediction model"""
-    global _model
-    
-    if _model is not None:
-        return _model
-    
-    # Load dataset
-    df = pd.read_csv(DATA_PATH)
-    
-    # Features for prediction
-    feature_cols = ['battery_capacity_kWh', 'battery_start_%', 'eff_kWh_per_km']
-    target_col = 'predicted_remaining_km'
-    
-    # Prepare features
-    X = df[feature_cols]
-    y = df[target_col]
-    
-    # Train model
-    _model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=10)
-    _model.fit(X, y)
+    """The served battery range model version, loaded on first use"""
+    return _slot.get()
+
+# Largest grid /sweep will score in one request
+MAX_SWEEP_POINTS = int(os.getenv("MAX_SWEEP_POINTS", "20000"))
+
+# Sweep axes in grid order, with the model column each one feeds
+SWEEP_AXES = [
+    ('battery_capacity_kWh', 'battery_capacity_kWh'),
+    ('battery_percent', 'battery_start_%'),
+    ('efficiency_kWh_per_km', 'eff_kWh_per_km'),
+]
+
+class SweepTooLargeError(ValueError):
+    """A sweep axis or the whole grid has more points than MAX_SWEEP_POINTS."""
+
+
+BATCH_REQUIRED_FIELDS = ["battery_capacity_kWh", "battery_percent", "efficiency_kWh_per_km"]
+
+def _format_result(predicted_range, battery_capacity_kWh, battery_percent, efficiency_kWh_per_km):
+    """Build the response payload for one prediction"""
+    # Calculate additional metrics
+    available_energy = (battery_percent / 100) * battery_capacity_kWh
+    theoretical_range = available_energy / efficiency_kWh_per_km if efficiency_kWh_per_km > 0 else 0
     
-    return _model
+    return {
+        "success": True,
+        "predicted_range_km": round(predicted_range, 2),
+        "theoretical_range_km": round(theoretical_range, 2),
+        "available_energy_kWh": round(available_energy, 2),
+        "battery_percent": battery_percent,
+        "input_data": {
+            "battery_capacity_kWh": battery_capacity_kWh,
+            "battery_percent": battery_percent,
+            "efficiency_kWh_per_km": efficiency_kWh_per_km
+        }
+    }
 
 def predict_battery_range(battery_capacity_kWh, battery_percent, efficiency_kWh_per_km):
     """
@@ -52,39 +104,181 @@ def predict_battery_range(battery_capacity_kWh, battery_percent, efficiency_kWh_
     """
     try:
         # Load model
-        model = _load_model()
+        loaded = _load_model()
         
         # Validate inputs
         battery_percent = max(0, min(100, battery_percent))
         
-        # Create feature vector
-        features = pd.DataFrame({
-            'battery_capacity_kWh': [battery_capacity_kWh],
-            'battery_start_%': [battery_percent],
-            'eff_kWh_per_km': [efficiency_kWh_per_km]
-        })
+        # Encode straight into a feature row
+        with observe_stage('battery', 'encode'):
+            features = loaded.schema.encode_row({
+                'battery_capacity_kWh': battery_capacity_kWh,
+                'battery_percent': battery_percent,
+                'efficiency_kWh_per_km': efficiency_kWh_per_km
+            })
         
-        # Predict
-        predicted_range = model.predict(features)[0]
+        # Predict (or reuse the prediction for the same quantized inputs)
+        with observe_stage('battery', 'predict'):
+            predicted_range = _cache.get_or_compute(
+                features[0], lambda: float(predict_with(loaded.model, loaded.compiled, features)[0]), loaded.version
+            )
         
-        # Calculate additional metrics
-        available_energy = (battery_percent / 100) * battery_capacity_kWh
-        theoretical_range = available_energy / efficiency_kWh_per_km if efficiency_kWh_per_km > 0 else 0
+        return _format_result(predicted_range, battery_capacity_kWh, battery_percent, efficiency_kWh_per_km)
+        
+    except Exception as e:
+        record_error('battery')
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+def predict_battery_range_batch(records):
+    """
+    Predict remaining range for many battery states with a single model call
+    
+    Args:
+        records: List of dicts with battery_capacity_kWh, battery_percent and
+            efficiency_kWh_per_km
+    
+    Returns:
+        list: One result dict per record, in input order. Invalid records get
+        {"success": False, "error": ...} without affecting the others.
+    """
+    results = [None] * len(records)
+    rows = []
+    
+    for i, record in enumerate(records):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("Record must be a JSON object")
+            missing = [field for field in BATCH_REQUIRED_FIELDS if field not in record]
+            if missing:
+                raise ValueError(f"Missing required fields: {', '.join(missing)}")
+            
+            rows.append((i, {
+                'battery_capacity_kWh': float(record["battery_capacity_kWh"]),
+                'battery_percent': max(0.0, min(100.0, float(record["battery_percent"]))),
+                'efficiency_kWh_per_km': float(record["efficiency_kWh_per_km"]),
+            }))
+        except Exception as e:
+            results[i] = {"success": False, "error": str(e)}
+    
+    if not rows:
+        return results
+    
+    try:
+        loaded = _load_model()
+        
+        # Encode every row into one preallocated matrix
+        with observe_stage('battery', 'encode'):
+            features, encoded, errors = loaded.schema.encode_batch(row for _, row in rows)
+        for position, message in errors.items():
+            results[rows[position][0]] = {"success": False, "error": message}
+        
+        with observe_stage('battery', 'predict'):
+            predictions = predict_with(loaded.model, loaded.compiled, features) if encoded else []
+    except Exception as e:
+        record_error('battery')
+        for i, _ in rows:
+            results[i] = {"success": False, "error": str(e)}
+        return results
+    
+    for position, predicted_range in zip(encoded, predictions):
+        i, row = rows[position]
+        results[i] = _format_result(float(predicted_range), row['battery_capacity_kWh'],
+                                    row['battery_percent'], row['efficiency_kWh_per_km'])
+    
+    return results
+
+def _sweep_axis(name, spec):
+    """Expand one sweep axis: a number, a list of values or {"min", "max", "steps"}"""
+    if isinstance(spec, dict):
+        missing = [key for key in ("min", "max") if key not in spec]
+        if missing:
+            raise ValueError(f"{name}: missing {', '.join(missing)}")
+        low, high = float(spec["min"]), float(spec["max"])
+        if "step" in spec:
+            step = float(spec["step"])
+            if step <= 0:
+                raise ValueError(f"{name}: step must be positive")
+            steps = int(np.floor((high - low) / step + 1e-9)) + 1
+        else:
+            steps = int(spec.get("steps", 11))
+        if high < low or steps < 1:
+            raise ValueError(f"{name}: need min <= max and at least one step")
+        if steps > MAX_SWEEP_POINTS:
+            raise SweepTooLargeError(f"{name}: {steps} steps is more than the grid limit of {MAX_SWEEP_POINTS}")
+        if "step" in spec:
+            return low + np.arange(steps) * float(spec["step"])
+        return np.linspace(low, high, steps)
+    if isinstance(spec, (list, tuple)):
+        if not spec:
+            raise ValueError(f"{name}: value list is empty")
+        if len(spec) > MAX_SWEEP_POINTS:
+            raise SweepTooLargeError(f"{name}: {len(spec)} values is more than the grid limit of {MAX_SWEEP_POINTS}")
+        return np.asarray(spec, dtype=np.float64)
+    return np.asarray([spec], dtype=np.float64)
+
+def sweep_battery_range(axes):
+    """
+    Predict range over the grid of every combination of the given axes
+    
+    Args:
+        axes: Dict with battery_capacity_kWh, battery_percent and
+            efficiency_kWh_per_km, each a number, a list of values or
+            {"min", "max", "steps"} / {"min", "max", "step"}
+    
+    Returns:
+        dict: The axis values, the grid shape and the predicted and
+        theoretical ranges as flat row-major arrays (the last axis,
+        efficiency, varies fastest)
+    """
+    try:
+        missing = [name for name, _ in SWEEP_AXES if name not in axes]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+        
+        values = [_sweep_axis(name, axes[name]) for name, _ in SWEEP_AXES]
+        values[1] = np.clip(values[1], 0, 100)
+        shape = tuple(len(v) for v in values)
+        points = int(np.prod(shape))
+        if points > MAX_SWEEP_POINTS:
+            raise SweepTooLargeError(f"Sweep grid too large: {points} points (max {MAX_SWEEP_POINTS})")
+        
+        loaded = _load_model()
+        
+        # Build the feature matrix for the whole grid in the model's column order
+        with observe_stage('battery', 'encode'):
+            grid = np.meshgrid(*values, indexing='ij')
+            features = np.empty((points, len(loaded.feature_columns)), dtype=np.float64)
+            for (_, column), axis in zip(SWEEP_AXES, grid):
+                features[:, loaded.feature_columns.index(column)] = axis.ravel()
+        
+        with observe_stage('battery', 'predict'):
+            predicted = predict_with(loaded.model, loaded.compiled, features)
+        
+        capacity, percent, efficiency = grid
+        available = percent / 100 * capacity
+        theoretical = np.divide(available, efficiency, out=np.zeros_like(available), where=efficiency > 0)
         
         return {
             "success": True,
-            "predicted_range_km": round(predicted_range, 2),
-            "theoretical_range_km": round(theoretical_range, 2),
-            "available_energy_kWh": round(available_energy, 2),
-            "battery_percent": battery_percent,
-            "input_data": {
-                "battery_capacity_kWh": battery_capacity_kWh,
-                "battery_percent": battery_percent,
-                "efficiency_kWh_per_km": efficiency_kWh_per_km
-            }
+            "axes": {name: [round(float(v), 4) for v in axis] for (name, _), axis in zip(SWEEP_AXES, values)},
+            "order": [name for name, _ in SWEEP_AXES],
+            "shape": list(shape),
+            "points": points,
+            "predicted_range_km": np.round(predicted, 2).tolist(),
+            "theoretical_range_km": np.round(theoretical, 2).ravel().tolist(),
         }
         
+    except SweepTooLargeError as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "max_points": MAX_SWEEP_POINTS,
+        }
     except Exception as e:
+        record_error('battery')
         return {
             "success": False,
             "error": str(e)
@@ -0,0 +1,101 @@
+"""
+Charging Controller
+Recommends and lists charging stations from the indexed station master
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+from services.charging_stations import StationIndex, load_stations
+from services.metrics import observe_stage, record_error
+
+_stations: Optional[StationIndex] = None
+_stations_lock = threading.Lock()
+
+
+def _get_stations() -> StationIndex:
+    """Load and index the charging station master once per process."""
+    global _stations
+    if _stations is None:
+        with _stations_lock:
+            if _stations is None:
+                with observe_stage('charging', 'load'):
+                    _stations = load_stations()
+    return _stations
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value]
+
+
+def _as_bool(value: Any, field: str) -> Optional[bool]:
+    """A JSON boolean or "true"/"false"/"1"/"0" (query strings, forms); None if absent."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        flag = value.strip().lower()
+        if flag in ("true", "1"):
+            return True
+        if flag in ("false", "0"):
+            return False
+    raise ValueError(f"{field} must be true or false")
+
+
+def recommend_stations_controller(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Rank charging stations along a route or near a point.
+
+    Expected input_data keys (at least one location):
+    - route: list of cities on the trip, and/or origin and destination
+    - lat, lon, radius_km: stations around a point
+    - charger_type (str or list), dc_only, operational_only, limit (optional)
+    """
+    try:
+        cities = _as_list(input_data.get("route"))
+        cities += [input_data[key] for key in ("origin", "destination") if input_data.get(key)]
+        lat, lon = input_data.get("lat"), input_data.get("lon")
+        if not cities and (lat is None or lon is None):
+            raise ValueError("Provide route, origin/destination or lat/lon")
+
+        stations = _get_stations()
+        with observe_stage('charging', 'predict'):
+            recommendations = stations.recommend(
+                cities=cities,
+                lat=lat,
+                lon=lon,
+                radius_km=float(input_data.get("radius_km", 50)),
+                charger_types=_as_list(input_data.get("charger_type")),
+                dc_only=bool(_as_bool(input_data.get("dc_only"), "dc_only")),
+                operational_only=bool(_as_bool(input_data.get("operational_only"), "operational_only")),
+                limit=int(input_data.get("limit", 3)),
+            )
+
+        return {
+            "success": True,
+            "recommended_station": recommendations[0] if recommendations else None,
+            "stations": recommendations,
+            "count": len(recommendations),
+        }
+
+    except Exception as e:
+        record_error('charging')
+        return {"success": False, "error": str(e)}
+
+
+def list_stations_controller(
+    city: Optional[str] = None,
+    charger_type: Optional[str] = None,
+    operational: Any = None,
+) -> Dict[str, Any]:
+    """Stations filtered by city, charger type and operational status.
+
+    operational is a boolean or "true"/"false"/"1"/"0"; None lists both.
+    """
+    try:
+        stations = _get_stations().find(city, charger_type, _as_bool(operational, "operational"))
+        return {"success": True, "stations": stations, "count": len(stations)}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
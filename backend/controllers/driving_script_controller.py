@@ -1,25 +1,72 @@
 import os
 import pickle
-import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
+from services.feature_schema import FeatureSchema
+from services.metrics import observe_stage, record_error
+from services.model_manager import LoadedModel, ModelSlot
+from services.model_store import artifact_version, file_version, load_artifact
+from services.tree_engine import as_model_input
 
-# Load the model once at module import time
+
+# Model sources: the artifact written by `python train.py --only driving`,
+# falling back to the model exported from driving_style.ipynb
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "driving_style.pkl")
-_model = None
-_label_encoder_classes = ['Aggressive', 'Eco', 'Normal']  # From the notebook
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'driving_style_dataset_srilanka.csv')
+ARTIFACT_NAME = 'driving_style_rf'
+
+# LabelEncoder class order from the notebook; only needed for a
+# driving_style.pkl that holds the bare classifier without its encoder
+LEGACY_CLASSES = ['Aggressive', 'Eco', 'Normal']
 
 
-def _get_model():
-    """Lazy load the pickle model."""
-    global _model
-    if _model is None:
+def _load_artifact() -> Dict[str, Any]:
+    """Load the trained artifact if it is fresh, else driving_style.pkl."""
+    with observe_stage('driving', 'load'):
+        if os.path.exists(DATA_PATH):
+            artifact = load_artifact(ARTIFACT_NAME, DATA_PATH)
+            if artifact is not None:
+                return artifact
         if not os.path.exists(MODEL_PATH):
             raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
         with open(MODEL_PATH, 'rb') as f:
-            _model = pickle.load(f)
-    return _model
+            loaded = pickle.load(f)
+    return loaded if isinstance(loaded, dict) else {"model": loaded}
+
+
+def _class_labels(model: Any, encoders: Dict[str, Any]) -> List[str]:
+    """Driving style for each entry of model.classes_ (predict_proba column order)."""
+    classes = list(getattr(model, 'classes_', []))
+    encoder = encoders.get('driving_style')
+    if encoder is not None:
+        names = list(encoder.classes_)
+        return [str(names[int(c)]) for c in classes]
+    if all(isinstance(c, str) for c in classes):
+        return [str(c) for c in classes]
+    return [LEGACY_CLASSES[int(c)] if 0 <= int(c) < len(LEGACY_CLASSES) else "Unknown" for c in classes]
+
+
+def _build(artifact: Dict[str, Any]) -> LoadedModel:
+    """The model, its class labels and its feature layout from one artifact."""
+    model = artifact["model"]
+    version = artifact_version(artifact) if "dataset_checksum" in artifact else file_version(MODEL_PATH)
+    columns = artifact.get("feature_columns")
+    return LoadedModel(
+        version,
+        model,
+        schema=_build_schema(columns) if columns else _schema,
+        labels=_class_labels(model, artifact.get("encoders") or {}),
+    )
+
+
+# The served model version; the model manager swaps in retrained ones
+_slot = ModelSlot('driving', ARTIFACT_NAME, DATA_PATH, load=_load_artifact, build=_build)
+
+
+def _get_model() -> LoadedModel:
+    """The served driving style model version, loaded on first use."""
+    return _slot.get()
 
 
 def demo_driving_controller() -> Dict[str, str]:
@@ -35,6 +82,88 @@ def demo_driving_controller() -> Dict[str, str]:
     }
 
 
+# Expected column names after one-hot encoding (from training)
+EXPECTED_COLUMNS = [
+    'distance_km', 'elevation_gain_m', 'avg_speed', 'max_speed', 
+    'acceleration_mean', 'acceleration_std', 'braking_intensity', 
+    'trip_duration_min', 'vehicle_make_MG', 'vehicle_make_Nissan', 
+    'vehicle_make_Tesla', 'vehicle_model_Leaf', 'vehicle_model_Model 3', 
+    'vehicle_model_ZS EV', 'road_type_coastal', 'road_type_highway', 
+    'road_type_rural', 'weather_heavy_rain', 'weather_light_rain', 
+    'weather_monsoon', 'weather_sunny', 'time_of_day_evening', 
+    'time_of_day_morning', 'time_of_day_night'
+]
+CATEGORICAL_COLS = ['vehicle_make', 'vehicle_model', 'road_type', 'weather', 'time_of_day']
+
+
+NUMERIC_COLS = [
+    'distance_km', 'elevation_gain_m', 'avg_speed', 'max_speed',
+    'acceleration_mean', 'acceleration_std', 'braking_intensity', 'trip_duration_min'
+]
+
+def _build_schema(columns: List[str]) -> FeatureSchema:
+    """Encoder for the model's columns.
+
+    One-hot columns only exist for the categories kept at training time
+    (drop_first), so the dropped baseline category encodes as all zeros.
+    """
+    schema = FeatureSchema(columns)
+    for col in NUMERIC_COLS:
+        schema.numeric(col, default=0)
+    for col in CATEGORICAL_COLS:
+        schema.one_hot(col)
+    return schema
+
+
+_schema = _build_schema(EXPECTED_COLUMNS)
+
+
+def _classify(loaded: LoadedModel, X: Any) -> Tuple[List[str], List[Optional[float]], Optional[np.ndarray]]:
+    """Label, confidence and class distribution for every row in one pass.
+
+    A forest's predict is the argmax of its predict_proba, so the label is
+    taken from the probabilities instead of traversing the trees twice.
+    Models without predict_proba fall back to predict with no confidence.
+    """
+    model = loaded.model
+    if not hasattr(model, 'predict_proba'):
+        lookup = dict(zip(getattr(model, 'classes_', []), loaded.labels))
+        labels = [lookup.get(p, "Unknown") for p in model.predict(X)]
+        return labels, [None] * len(labels), None
+    
+    probabilities = model.predict_proba(X)
+    best = probabilities.argmax(axis=1)
+    labels = [loaded.labels[i] for i in best]
+    confidences = probabilities[np.arange(len(best)), best].tolist()
+    return labels, confidences, probabilities
+
+
+def _success(
+    classes: List[str],
+    label: str,
+    confidence: Optional[float],
+    distribution: Optional[np.ndarray],
+    input_data: Any,
+) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "predicted_driving_style": label,
+        "confidence_score": confidence,
+        "probabilities": (
+            {name: float(p) for name, p in zip(classes, distribution)} if distribution is not None else None
+        ),
+        "input_features": input_data,
+    }
+
+
+def _failure(e: Exception) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "error": str(e),
+        "message": "Failed to predict driving style",
+    }
+
+
 def predict_driving_style_controller(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """Predict driving style from input features.
     
@@ -43,60 +172,65 @@ def predict_driving_style_controller(input_data: Dict[str, Any]) -> Dict[str, An
       acceleration_mean, acceleration_std, braking_intensity, trip_duration_min
     - vehicle_make, vehicle_model, road_type, weather, time_of_day
     
-    Returns a dict with the predicted driving style.
+    Returns a dict with the predicted driving style, its probability as
+    confidence_score, and the probability of every style.
     """
     try:
-        model = _get_model()
-        
-        # Expected column names after one-hot encoding (from training)
-        expected_columns = [
-            'distance_km', 'elevation_gain_m', 'avg_speed', 'max_speed', 
-            'acceleration_mean', 'acceleration_std', 'braking_intensity', 
-            'trip_duration_min', 'vehicle_make_MG', 'vehicle_make_Nissan', 
-            'vehicle_make_Tesla', 'vehicle_model_Leaf', 'vehicle_model_Model 3', 
-            'vehicle_model_ZS EV', 'road_type_coastal', 'road_type_highway', 
-            'road_type_rural', 'weather_heavy_rain', 'weather_light_rain', 
-            'weather_monsoon', 'weather_sunny', 'time_of_day_evening', 
-            'time_of_day_morning', 'time_of_day_night'
-        ]
+        loaded = _get_model()
         
-        # Create a DataFrame from input
-        df = pd.DataFrame([input_data])
+        # Encode straight into a feature row in training column order
+        with observe_stage('driving', 'encode'):
+            df_encoded = as_model_input(loaded.model, loaded.schema.encode_row(input_data))
         
-        # One-hot encode categorical columns
-        categorical_cols = ['vehicle_make', 'vehicle_model', 'road_type', 'weather', 'time_of_day']
-        df_encoded = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
+        with observe_stage('driving', 'predict'):
+            labels, confidences, probabilities = _classify(loaded, df_encoded)
         
-        # Ensure all expected columns exist, fill missing with 0
-        for col in expected_columns:
-            if col not in df_encoded.columns:
-                df_encoded[col] = 0
-        
-        # Reorder columns to match training data
-        df_encoded = df_encoded[expected_columns]
-        
-        # Make prediction
-        prediction_encoded = model.predict(df_encoded)
-        
-        # Decode the prediction using label encoder classes
-        predicted_style = _label_encoder_classes[prediction_encoded[0]] if prediction_encoded[0] < len(_label_encoder_classes) else "Unknown"
-        
-        # Get probability if available
-        confidence_score = None
-        if hasattr(model, 'predict_proba'):
-            probabilities = model.predict_proba(df_encoded)[0]
-            confidence_score = float(max(probabilities))
-        
-        return {
-            "success": True,
-            "predicted_driving_style": predicted_style,
-            "confidence_score": confidence_score,
-            "input_features": input_data,
-        }
+        return _success(
+            loaded.labels, labels[0], confidences[0],
+            probabilities[0] if probabilities is not None else None, input_data,
+        )
         
     except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "message": "Failed to predict driving style",
-        }
+        record_error('driving')
+        return _failure(e)
+
+
+def predict_driving_style_batch(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Predict driving styles for many trips with a single model call.
+    
+    Returns one result per record in input order. Records that are not
+    objects get an error entry without affecting the rest of the batch.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    
+    # Load first: the model's feature columns decide how records encode
+    try:
+        loaded, load_error = _get_model(), None
+    except Exception as e:
+        loaded, load_error = None, e
+    
+    with observe_stage('driving', 'encode'):
+        schema = loaded.schema if loaded is not None else _schema
+        features, encoded, errors = schema.encode_batch(records)
+    for i, message in errors.items():
+        results[i] = {"success": False, "error": message}
+    
+    if not encoded:
+        return results
+    
+    try:
+        if load_error is not None:
+            raise load_error
+        with observe_stage('driving', 'predict'):
+            labels, confidences, probabilities = _classify(loaded, as_model_input(loaded.model, features))
+    except Exception as e:
+        record_error('driving')
+        for i in encoded:
+            results[i] = _failure(e)
+        return results
+    
+    for row, i in enumerate(encoded):
+        distribution = probabilities[row] if probabilities is not None else None
+        results[i] = _success(loaded.labels, labels[row], confidences[row], distribution, records[i])
+    
+    return results
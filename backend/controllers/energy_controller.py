@@ -3,55 +3,115 @@ Energy Consumption Prediction Controller
 Predicts energy consumption based on trip parameters
 """
 
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
-import pickle
 import os
 
+from services.feature_schema import FeatureSchema
+from services.metrics import observe_stage, record_error
+from services.model_manager import LoadedModel, ModelSlot
+from services.model_store import artifact_version, load_or_train
+from services.prediction_cache import PredictionCache
+from services.training import fit_model
+from services.shared_models import load_predictor
+from services.tree_engine import predict_with
+
 # Load dataset
 DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'energy_consumption_dataset_srilanka.csv')
+ARTIFACT_NAME = 'energy_consumption_rf'
+
+# Predictions keyed on the encoded feature row, rounded per column
+_cache = PredictionCache(
+    'energy',
+    ['distance_km', 'elevation_gain_m', 'avg_speed',
+     'driving_style_encoded', 'road_type_encoded', 'weather_encoded'],
+    precision={'distance_km': 1, 'elevation_gain_m': 0, 'avg_speed': 1},
+)
+
+def _train_model():
+    """Train the energy prediction model from the dataset"""
+    return fit_model('energy')
+
+def _load_artifact():
+    """Load the persisted energy model, retraining only if it is missing or stale"""
+    with observe_stage('energy', 'load'):
+        return load_or_train(ARTIFACT_NAME, DATA_PATH, _train_model)
+
+def _build_schema(encoders, feature_columns):
+    """Precompute the category -> code tables from the fitted LabelEncoders"""
+    schema = FeatureSchema(feature_columns)
+    schema.numeric('distance_km')
+    schema.numeric('elevation_gain_m', default=0)
+    schema.numeric('avg_speed', default=60)
+    for col in ['driving_style', 'road_type', 'weather']:
+        classes = encoders[col].classes_
+        schema.categorical(col, {value: code for code, value in enumerate(classes)}, column=col + '_encoded')
+    return schema
+
+def _build(artifact):
+    """Everything a prediction needs from one artifact"""
+    version = artifact_version(artifact)
+    model, compiled = load_predictor(ARTIFACT_NAME, version, artifact["model"])
+    return LoadedModel(version, model, compiled, _build_schema(artifact["encoders"], artifact["feature_columns"]))
 
-# Global model and encoders
-_model = None
-_encoders = {}
-_feature_columns = None
+# The served model version; the model manager swaps in retrained ones
+_slot = ModelSlot('energy', ARTIFACT_NAME, DATA_PATH, load=_load_artifact, build=_build, cache=_cache)
 
 def _load_model():
-    """Load and train the energy prediction model"""
-    global _model, _encoders, _feature_columns
-    
-    if _model is not None:
-        return _model
-    
-    # Load dataset
-    df = pd.read_csv(DATA_PATH)
-    
-    # Features for prediction
-    feature_cols = ['distance_km', 'driving_style', 'road_type', 'weather', 
-                    'elevation_gain_m', 'avg_speed']
-    target_col = 'energy_consumed_kWh'
-    
-    # Create encoders for categorical variables
-    categorical_cols = ['driving_style', 'road_type', 'weather']
+    """The served energy model version, loaded on first use"""
+    return _slot.get()
+
+# Map weather variations
+WEATHER_MAPPING = {
+    'clear': 'sunny',
+    'cloudy': 'light_rain',
+    'rainy': 'light_rain',
+    'rain': 'light_rain'
+}
+
+# Valid inputs
+VALID_DRIVING_STYLES = ['Eco', 'Normal', 'Aggressive']
+VALID_ROAD_TYPES = ['city', 'highway', 'rural', 'coastal']
+VALID_WEATHER = ['sunny', 'light_rain', 'heavy_rain', 'monsoon']
+
+BATCH_REQUIRED_FIELDS = ["distance_km", "driving_style", "road_type", "weather"]
+
+def _normalize_inputs(driving_style, road_type, weather):
+    """Normalize categorical inputs, falling back to defaults for unknown values"""
+    driving_style = driving_style.capitalize()
+    road_type = road_type.lower()
+    weather = weather.lower()
     
-    for col in categorical_cols:
-        _encoders[col] = LabelEncoder()
-        df[col + '_encoded'] = _encoders[col].fit_transform(df[col])
+    weather = WEATHER_MAPPING.get(weather, weather)
     
-    # Prepare features
-    X = df[['distance_km', 'elevation_gain_m', 'avg_speed', 
-            'driving_style_encoded', 'road_type_encoded', 'weather_encoded']]
-    y = df[target_col]
+    if driving_style not in VALID_DRIVING_STYLES:
+        driving_style = 'Normal'
     
-    # Train model
-    _model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=10)
-    _model.fit(X, y)
+    if road_type not in VALID_ROAD_TYPES:
+        road_type = 'city'
+        
+    if weather not in VALID_WEATHER:
+        weather = 'sunny'
     
-    _feature_columns = X.columns.tolist()
+    return driving_style, road_type, weather
+
+def _format_result(predicted_energy, distance_km, driving_style, road_type, weather,
+                   elevation_gain_m, avg_speed):
+    """Build the response payload for one prediction"""
+    # Calculate efficiency
+    efficiency_kwh_per_km = predicted_energy / distance_km if distance_km > 0 else 0
     
-    return _model
+    return {
+        "success": True,
+        "predicted_energy_kWh": round(predicted_energy, 2),
+        "efficiency_kWh_per_km": round(efficiency_kwh_per_km, 3),
+        "input_data": {
+            "distance_km": distance_km,
+            "driving_style": driving_style,
+            "road_type": road_type,
+            "weather": weather,
+            "elevation_gain_m": elevation_gain_m,
+            "avg_speed": avg_speed
+        }
+    }
 
 def predict_energy_consumption(distance_km, driving_style, road_type, weather, 
                                elevation_gain_m=0, avg_speed=60):
@@ -71,73 +131,98 @@ def predict_energy_consumption(distance_km, driving_style, road_type, weather,
     """
     try:
         # Load model
-        model = _load_model()
+        loaded = _load_model()
         
         # Normalize inputs
-        driving_style = driving_style.capitalize()
-        road_type = road_type.lower()
-        weather = weather.lower()
-        
-        # Map weather variations
-        weather_mapping = {
-            'clear': 'sunny',
-            'cloudy': 'light_rain',
-            'rainy': 'light_rain',
-            'rain': 'light_rain'
-        }
-        weather = weather_mapping.get(weather, weather)
-        
-        # Validate inputs
-        valid_driving_styles = ['Eco', 'Normal', 'Aggressive']
-        valid_road_types = ['city', 'highway', 'rural', 'coastal']
-        valid_weather = ['sunny', 'light_rain', 'heavy_rain', 'monsoon']
-        
-        if driving_style not in valid_driving_styles:
-            driving_style = 'Normal'
-        
-        if road_type not in valid_road_types:
-            road_type = 'city'
-            
-        if weather not in valid_weather:
-            weather = 'sunny'
-        
-        # Encode categorical variables
-        driving_style_encoded = _encoders['driving_style'].transform([driving_style])[0]
-        road_type_encoded = _encoders['road_type'].transform([road_type])[0]
-        weather_encoded = _encoders['weather'].transform([weather])[0]
-        
-        # Create feature vector
-        features = pd.DataFrame({
-            'distance_km': [distance_km],
-            'elevation_gain_m': [elevation_gain_m],
-            'avg_speed': [avg_speed],
-            'driving_style_encoded': [driving_style_encoded],
-            'road_type_encoded': [road_type_encoded],
-            'weather_encoded': [weather_encoded]
-        })
+        driving_style, road_type, weather = _normalize_inputs(driving_style, road_type, weather)
         
-        # Predict
-        predicted_energy = model.predict(features)[0]
+        # Encode straight into a feature row
+        with observe_stage('energy', 'encode'):
+            features = loaded.schema.encode_row({
+                'distance_km': distance_km,
+                'elevation_gain_m': elevation_gain_m,
+                'avg_speed': avg_speed,
+                'driving_style': driving_style,
+                'road_type': road_type,
+                'weather': weather
+            })
         
-        # Calculate efficiency
-        efficiency_kwh_per_km = predicted_energy / distance_km if distance_km > 0 else 0
+        # Predict (or reuse the prediction for the same quantized inputs)
+        with observe_stage('energy', 'predict'):
+            predicted_energy = _cache.get_or_compute(
+                features[0], lambda: float(predict_with(loaded.model, loaded.compiled, features)[0]), loaded.version
+            )
         
-        return {
-            "success": True,
-            "predicted_energy_kWh": round(predicted_energy, 2),
-            "efficiency_kWh_per_km": round(efficiency_kwh_per_km, 3),
-            "input_data": {
-                "distance_km": distance_km,
-                "driving_style": driving_style,
-                "road_type": road_type,
-                "weather": weather,
-                "elevation_gain_m": elevation_gain_m,
-                "avg_speed": avg_speed
-            }
-        }
+        return _format_result(predicted_energy, distance_km, driving_style, road_type, weather,
+                              elevation_gain_m, avg_speed)
         
     except Exception as e:
+        record_error('energy')
         return {
             "success": False,
             "error": str(e)
         }
+
+def predict_energy_consumption_batch(records):
+    """
+    Predict energy consumption for many trips with a single model call
+    
+    Args:
+        records: List of dicts with the same fields as predict_energy_consumption
+    
+    Returns:
+        list: One result dict per record, in input order. Invalid records get
+        {"success": False, "error": ...} without affecting the others.
+    """
+    results = [None] * len(records)
+    rows = []
+    
+    for i, record in enumerate(records):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("Record must be a JSON object")
+            missing = [field for field in BATCH_REQUIRED_FIELDS if field not in record]
+            if missing:
+                raise ValueError(f"Missing required fields: {', '.join(missing)}")
+            
+            driving_style, road_type, weather = _normalize_inputs(
+                record["driving_style"], record["road_type"], record["weather"]
+            )
+            rows.append((i, {
+                'distance_km': record["distance_km"],
+                'elevation_gain_m': record.get("elevation_gain_m", 0),
+                'avg_speed': record.get("avg_speed", 60),
+                'driving_style': driving_style,
+                'road_type': road_type,
+                'weather': weather
+            }))
+        except Exception as e:
+            results[i] = {"success": False, "error": str(e)}
+    
+    if not rows:
+        return results
+    
+    try:
+        loaded = _load_model()
+        
+        # Encode every row into one preallocated matrix
+        with observe_stage('energy', 'encode'):
+            features, encoded, errors = loaded.schema.encode_batch(row for _, row in rows)
+        for position, message in errors.items():
+            results[rows[position][0]] = {"success": False, "error": message}
+        
+        with observe_stage('energy', 'predict'):
+            predictions = predict_with(loaded.model, loaded.compiled, features) if encoded else []
+    except Exception as e:
+        record_error('energy')
+        for i, _ in rows:
+            results[i] = {"success": False, "error": str(e)}
+        return results
+    
+    for position, predicted_energy in zip(encoded, predictions):
+        i, row = rows[position]
+        results[i] = _format_result(float(predicted_energy), float(row['distance_km']), row['driving_style'],
+                                    row['road_type'], row['weather'], float(row['elevation_gain_m']),
+                                    float(row['avg_speed']))
+    
+    return results
@@ -1,16 +1,34 @@
 import os
-import json
 import urllib.parse
-import urllib.request
 from typing import Any, Dict, Optional
 
+from services.cities import CITY_COORDINATES, DATASET_CITIES, charging_station_cities
+from services.http_client import CircuitBreaker, HTTPClient, remaining_budget
+from services.weather_cache import WeatherRefresher, cache_from_env
+
+
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5/weather")
+
+_weather_cache = cache_from_env()
+# Keep-alive connections to OpenWeather; the breaker makes callers fall back
+# immediately while the upstream keeps failing
+_weather_client = HTTPClient(
+	timeout=float(os.getenv("WEATHER_TIMEOUT", "10")),
+	pool_size=int(os.getenv("WEATHER_POOL_SIZE", "8")),
+	breaker=CircuitBreaker(
+		failure_threshold=int(os.getenv("WEATHER_BREAKER_FAILURES", "5")),
+		reset_timeout=float(os.getenv("WEATHER_BREAKER_RESET", "30")),
+	),
+)
+_weather_refresher: Optional[WeatherRefresher] = None
+
 
 class WeatherAPIError(Exception):
 	pass
 
 
 def _build_openweather_url(lat: float, lon: float, api_key: str, units: str = "metric") -> str:
-	base = "https://api.openweathermap.org/data/2.5/weather"
+	base = OPENWEATHER_BASE_URL
 	params = {
 		"lat": f"{lat:.6f}",
 		"lon": f"{lon:.6f}",
@@ -19,21 +37,18 @@ def _build_openweather_url(lat: float, lon: float, api_key: str, units: str = "m
 	}
 	return f"{base}?{urllib.parse.urlencode(params)}"
 
-def get_weather_controller(lat: float, lon: float, units: str = "metric") -> Dict[str, Any]:
-
-	api_key = "1eda4b17d9557443f2f7c025bf0d502e"
+def _fetch_weather(lat: float, lon: float, units: str = "metric") -> Dict[str, Any]:
+	"""Fetch and curate current weather from OpenWeather (uncached)."""
+	api_key = os.getenv("OPENWEATHER_API_KEY", "1eda4b17d9557443f2f7c025bf0d502e")
 	if not api_key:
 		raise WeatherAPIError("Missing OPENWEATHER_API_KEY environment variable")
 
 	url = _build_openweather_url(lat, lon, api_key, units)
 
 	try:
-		with urllib.request.urlopen(url, timeout=10) as resp:
-			if resp.status != 200:
-				raise WeatherAPIError(f"OpenWeather request failed with status {resp.status}")
-			payload = json.loads(resp.read().decode("utf-8"))
+		payload = _weather_client.get_json(url)
 	except Exception as e:
-		raise WeatherAPIError(str(e))
+		raise WeatherAPIError(f"OpenWeather request failed: {e}")
 
 	# Extract a concise, stable subset of fields
 	main = payload.get("main", {})
@@ -64,3 +79,53 @@ def get_weather_controller(lat: float, lon: float, units: str = "metric") -> Dic
 	}
 
 	return curated
+
+
+def get_weather_controller(lat: float, lon: float, units: str = "metric") -> Dict[str, Any]:
+	"""Return current weather for a location, served from the bucketed cache.
+
+	Concurrent misses for the same bucket share one upstream request. The
+	returned "coords" are the caller's, not the bucket's. Waiting is bounded
+	by the current request budget.
+	"""
+	try:
+		curated = _weather_cache.get(lat, lon, units, _fetch_weather, timeout=remaining_budget())
+	except TimeoutError as e:
+		raise WeatherAPIError(str(e))
+	return {**curated, "coords": {"lat": lat, "lon": lon}}
+
+
+def weather_cache_stats() -> Dict[str, int]:
+	return _weather_cache.stats()
+
+
+def weather_client_stats() -> Dict[str, Any]:
+	return _weather_client.stats()
+
+
+def reset_weather_client() -> None:
+	"""Drop pooled connections, e.g. sockets a forked worker inherited."""
+	_weather_client.close()
+
+
+def warm_locations() -> list:
+	"""Coordinates of the dataset cities and every charging station city."""
+	cities = list(DATASET_CITIES)
+	for city in charging_station_cities():
+		if city not in cities:
+			cities.append(city)
+	return [CITY_COORDINATES[city] for city in cities if city in CITY_COORDINATES]
+
+
+def start_weather_refresher() -> WeatherRefresher:
+	"""Start (once per process) the background refresher for known cities."""
+	global _weather_refresher
+	if _weather_refresher is None:
+		interval = os.getenv("WEATHER_REFRESH_INTERVAL")
+		_weather_refresher = WeatherRefresher(
+			_weather_cache,
+			_fetch_weather,
+			warm_locations(),
+			interval=float(interval) if interval else None,
+		)
+	return _weather_refresher.start()
@@ -1,24 +1,37 @@
 import os
 import pickle
-import pandas as pd
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 
 from controllers.external_api_controller import get_weather_controller, WeatherAPIError
+from services.feature_schema import FeatureSchema
+from services.metrics import observe_stage, record_error
+from services.model_store import file_version
+from services.prediction_cache import PredictionCache
+from services.shared_models import load_predictor
+from services.tree_engine import predict_with
 
 
 # Load the model once at module import time
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "Optimal_Path_finder.pkl")
 _model = None
+_compiled = None
+_load_lock = threading.Lock()
 
 
 def _get_model():
     """Lazy load the pickle model."""
-    global _model
+    global _model, _compiled
     if _model is None:
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
-        with open(MODEL_PATH, 'rb') as f:
-            _model = pickle.load(f)
+        with _load_lock:
+            if _model is None:
+                if not os.path.exists(MODEL_PATH):
+                    raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
+                with observe_stage('optimal_path', 'load'), open(MODEL_PATH, 'rb') as f:
+                    model = pickle.load(f)
+                version = file_version(MODEL_PATH)
+                _model, _compiled = load_predictor('optimal_path', version, model)
+                _cache.bind(version)
     return _model
 
 
@@ -55,6 +68,115 @@ def _map_weather_to_encoded(weather_data: Dict[str, Any]) -> int:
         return WEATHER_MAP["sunny"]  # Default
 
 
+MODEL_FEATURE_COLUMNS = [
+    'distance_km', 'road_type', 'traffic_level', 'weather', 'driving_style',
+    'predicted_energy_kWh', 'predicted_range_km', 'battery_remaining_percent',
+]
+
+BATCH_REQUIRED_FIELDS = [
+    "distance_km", "road_type", "traffic_level", "driving_style",
+    "predicted_energy_kWh", "predicted_range_km", "battery_remaining_percent"
+]
+
+# Route choice objective used to label is_optimal in the route dataset
+# (genarated_scripts/script.py): 0.7 * energy_kWh + 0.3 * time_hours
+ENERGY_WEIGHT = 0.7
+TIME_WEIGHT = 0.3
+
+# Fields shared by every candidate route unless a route overrides them
+RANK_SHARED_FIELDS = ["driving_style", "predicted_range_km", "battery_remaining_percent"]
+RANK_ROUTE_FIELDS = ["distance_km", "predicted_energy_kWh"]
+
+_WEATHER_NAMES = {encoded: name for name, encoded in reversed(list(WEATHER_MAP.items()))}
+
+
+def _resolve_weather(
+    lat: Optional[float],
+    lon: Optional[float],
+    weather: Optional[str],
+) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """Return the encoded weather and any weather API payload used for it."""
+    if weather is None and lat is not None and lon is not None:
+        try:
+            with observe_stage('optimal_path', 'upstream_weather'):
+                weather_data = get_weather_controller(lat, lon, units="metric")
+            return _map_weather_to_encoded(weather_data), weather_data
+        except WeatherAPIError as e:
+            # Fall back to default if weather API fails
+            return WEATHER_MAP["sunny"], {"error": str(e), "fallback": True}
+    elif weather is not None:
+        return WEATHER_MAP.get(weather.lower(), WEATHER_MAP["sunny"]), None
+    # Default weather if not provided
+    return WEATHER_MAP["sunny"], None
+
+
+def resolve_weather(lat: float, lon: float) -> Tuple[str, Dict[str, Any]]:
+    """Look up the weather at a location once, for callers that feed the same
+    weather to several models. Returns its name and the weather API payload.
+    """
+    weather_encoded, weather_info = _resolve_weather(lat, lon, None)
+    return _WEATHER_NAMES[weather_encoded], weather_info
+
+
+# Predictions keyed on the encoded feature row, rounded per column
+_cache = PredictionCache(
+    'optimal_path',
+    MODEL_FEATURE_COLUMNS,
+    precision={
+        'distance_km': 1, 'predicted_energy_kWh': 2,
+        'predicted_range_km': 1, 'battery_remaining_percent': 1,
+    },
+)
+
+
+def _lower(value: str) -> str:
+    return value.lower()
+
+
+# Defaults: city road, medium traffic, Normal driving
+_schema = (
+    FeatureSchema(MODEL_FEATURE_COLUMNS)
+    .numeric('distance_km')
+    .categorical('road_type', ROAD_TYPE_MAP, default=0, normalize=_lower)
+    .categorical('traffic_level', TRAFFIC_LEVEL_MAP, default=2, normalize=_lower)
+    .numeric('weather_encoded', column='weather')
+    .categorical('driving_style', DRIVING_STYLE_MAP, default=2)
+    .numeric('predicted_energy_kWh')
+    .numeric('predicted_range_km')
+    .numeric('battery_remaining_percent')
+)
+
+
+def _format_result(
+    predicted_time: float,
+    params: Dict[str, Any],
+    weather_encoded: int,
+    weather_info: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Build the response payload for one prediction."""
+    result = {
+        "success": True,
+        "predicted_travel_time_min": float(predicted_time),
+        "predicted_travel_time_hours": float(predicted_time / 60),
+        "input_parameters": {
+            "distance_km": params["distance_km"],
+            "road_type": params["road_type"],
+            "traffic_level": params["traffic_level"],
+            "weather": _WEATHER_NAMES[weather_encoded],
+            "driving_style": params["driving_style"],
+            "predicted_energy_kWh": params["predicted_energy_kWh"],
+            "predicted_range_km": params["predicted_range_km"],
+            "battery_remaining_percent": params["battery_remaining_percent"],
+        }
+    }
+    
+    # Add weather info if available
+    if weather_info:
+        result["weather_info"] = weather_info
+    
+    return result
+
+
 def predict_optimal_path_controller(
     distance_km: float,
     road_type: str,
@@ -87,69 +209,200 @@ def predict_optimal_path_controller(
     try:
         model = _get_model()
         
-        # Encode categorical inputs
-        traffic_encoded = TRAFFIC_LEVEL_MAP.get(traffic_level.lower(), 2)  # Default to medium
-        driving_encoded = DRIVING_STYLE_MAP.get(driving_style, 2)  # Default to Normal
-        road_type_encoded = ROAD_TYPE_MAP.get(road_type.lower(), 0)  # Default to city
-        
         # Get weather if coordinates provided and weather not specified
-        weather_info = None
-        if weather is None and lat is not None and lon is not None:
-            try:
-                weather_data = get_weather_controller(lat, lon, units="metric")
-                weather_encoded = _map_weather_to_encoded(weather_data)
-                weather_info = weather_data
-            except WeatherAPIError as e:
-                # Fall back to default if weather API fails
-                weather_encoded = WEATHER_MAP["sunny"]
-                weather_info = {"error": str(e), "fallback": True}
-        elif weather is not None:
-            weather_encoded = WEATHER_MAP.get(weather.lower(), WEATHER_MAP["sunny"])
-        elif weather is None:
-            # Default weather if not provided
-            weather_encoded = WEATHER_MAP["sunny"]
+        weather_encoded, weather_info = _resolve_weather(lat, lon, weather)
         
-        # Create input DataFrame with exact column order expected by model
-        # Based on the dataset: distance_km, traffic_level, weather, driving_style, predicted_energy_kWh
-        input_data = pd.DataFrame([{
-            'distance_km': distance_km,
-            'road_type': road_type_encoded,
-            'traffic_level': traffic_encoded,
-            'weather': weather_encoded,
-            'driving_style': driving_encoded,
-            'predicted_energy_kWh': predicted_energy_kWh,
-            'predicted_range_km': predicted_range_km,
-            'battery_remaining_percent': battery_remaining_percent,
-        }])
+        params = {
+            "distance_km": distance_km,
+            "road_type": road_type,
+            "traffic_level": traffic_level,
+            "driving_style": driving_style,
+            "predicted_energy_kWh": predicted_energy_kWh,
+            "predicted_range_km": predicted_range_km,
+            "battery_remaining_percent": battery_remaining_percent,
+        }
         
-        # Make prediction
-        predicted_time = model.predict(input_data)
+        # Encode straight into a feature row in the model's column order
+        with observe_stage('optimal_path', 'encode'):
+            input_data = _schema.encode_row({**params, "weather_encoded": weather_encoded})
         
-        result = {
-            "success": True,
-            "predicted_travel_time_min": float(predicted_time[0]),
-            "predicted_travel_time_hours": float(predicted_time[0] / 60),
-            "input_parameters": {
-                "distance_km": distance_km,
-                "road_type": road_type,
-                "traffic_level": traffic_level,
-                "weather": list(WEATHER_MAP.keys())[list(WEATHER_MAP.values()).index(weather_encoded)],
-                "driving_style": driving_style,
-                "predicted_energy_kWh": predicted_energy_kWh,
-                "predicted_range_km": predicted_range_km,
-                "battery_remaining_percent": battery_remaining_percent,
-            }
+        # Make prediction (or reuse the prediction for the same quantized inputs)
+        with observe_stage('optimal_path', 'predict'):
+            predicted_time = _cache.get_or_compute(
+                input_data[0], lambda: float(predict_with(model, _compiled, input_data)[0])
+            )
+        
+        return _format_result(predicted_time, params, weather_encoded, weather_info)
+        
+    except Exception as e:
+        record_error('optimal_path')
+        return {
+            "success": False,
+            "error": str(e),
+            "message": "Failed to predict optimal path travel time",
         }
+
+
+def predict_optimal_path_batch(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Predict travel times for many routes with a single model call.
+    
+    Weather is looked up once per distinct coordinate pair. Returns one
+    result per record in input order; invalid records get an error entry
+    without affecting the rest of the batch.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    weather_by_coords: Dict[Tuple[float, float], Tuple[int, Optional[Dict[str, Any]]]] = {}
+    rows = []
+    
+    for i, record in enumerate(records):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("Record must be a JSON object")
+            missing = [field for field in BATCH_REQUIRED_FIELDS if field not in record]
+            if missing:
+                raise ValueError(f"Missing required fields: {', '.join(missing)}")
+            
+            lat, lon, weather = record.get("lat"), record.get("lon"), record.get("weather")
+            if weather is None and lat is not None and lon is not None:
+                coords = (float(lat), float(lon))
+                if coords not in weather_by_coords:
+                    weather_by_coords[coords] = _resolve_weather(coords[0], coords[1], None)
+                weather_encoded, weather_info = weather_by_coords[coords]
+            else:
+                weather_encoded, weather_info = _resolve_weather(None, None, weather)
+            
+            params = {field: record[field] for field in BATCH_REQUIRED_FIELDS}
+            rows.append((i, {**params, "weather_encoded": weather_encoded}, params, weather_encoded, weather_info))
+        except Exception as e:
+            results[i] = {"success": False, "error": str(e)}
+    
+    if not rows:
+        return results
+    
+    try:
+        model = _get_model()
+        
+        # Encode every row into one preallocated matrix
+        with observe_stage('optimal_path', 'encode'):
+            input_data, encoded, errors = _schema.encode_batch(row[1] for row in rows)
+        for position, message in errors.items():
+            results[rows[position][0]] = {"success": False, "error": message}
         
-        # Add weather info if available
+        with observe_stage('optimal_path', 'predict'):
+            predictions = predict_with(model, _compiled, input_data) if encoded else []
+    except Exception as e:
+        record_error('optimal_path')
+        for row in rows:
+            results[row[0]] = {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to predict optimal path travel time",
+            }
+        return results
+    
+    for position, predicted_time in zip(encoded, predictions):
+        i, _, params, weather_encoded, weather_info = rows[position]
+        results[i] = _format_result(predicted_time, params, weather_encoded, weather_info)
+    
+    return results
+
+
+def route_objective(predicted_energy_kWh: float, predicted_time_min: float) -> float:
+    """Score a route the way the route dataset picks is_optimal (lower is better)."""
+    return ENERGY_WEIGHT * predicted_energy_kWh + TIME_WEIGHT * (predicted_time_min / 60.0)
+
+
+def rank_routes_controller(
+    routes: List[Dict[str, Any]],
+    shared: Dict[str, Any],
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    weather: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Score candidate routes for one trip in a single model call and rank them.
+    
+    Args:
+        routes: Candidate routes, each with distance_km and
+            predicted_energy_kWh, plus optional route_id, road_type,
+            traffic_level and overrides of the shared fields
+        shared: Trip-wide fields (driving_style, predicted_range_km,
+            battery_remaining_percent, and default road_type/traffic_level)
+        lat, lon, weather: Resolved once for all routes, as in /predict
+    
+    Returns:
+        Dict with the routes ranked by route_objective, the optimal route
+        and any routes that could not be scored.
+    """
+    try:
+        model = _get_model()
+        weather_encoded, weather_info = _resolve_weather(lat, lon, weather)
+        
+        failed = []
+        candidates = []
+        for i, route in enumerate(routes):
+            if not isinstance(route, dict):
+                failed.append({"index": i, "error": "Route must be a JSON object"})
+                continue
+            params = {"road_type": "city", "traffic_level": "medium", **shared, **route}
+            missing = [field for field in RANK_SHARED_FIELDS + RANK_ROUTE_FIELDS if field not in params]
+            if missing:
+                failed.append({
+                    "index": i,
+                    "route_id": route.get("route_id"),
+                    "error": f"Missing required fields: {', '.join(missing)}",
+                })
+                continue
+            candidates.append((i, params))
+        
+        with observe_stage('optimal_path', 'encode'):
+            input_data, encoded, errors = _schema.encode_batch(
+                {**params, "weather_encoded": weather_encoded} for _, params in candidates
+            )
+        for position, message in errors.items():
+            i, params = candidates[position]
+            failed.append({"index": i, "route_id": params.get("route_id"), "error": message})
+        
+        with observe_stage('optimal_path', 'predict'):
+            predictions = predict_with(model, _compiled, input_data) if encoded else []
+        
+        ranked = []
+        for position, predicted_time in zip(encoded, predictions):
+            i, params = candidates[position]
+            energy = float(params["predicted_energy_kWh"])
+            ranked.append({
+                "index": i,
+                "route_id": params.get("route_id", chr(ord("A") + i) if i < 26 else str(i)),
+                "distance_km": params["distance_km"],
+                "road_type": params["road_type"],
+                "traffic_level": params["traffic_level"],
+                "predicted_energy_kWh": energy,
+                "predicted_travel_time_min": float(predicted_time),
+                "objective_score": round(route_objective(energy, float(predicted_time)), 4),
+            })
+        ranked.sort(key=lambda r: (r["objective_score"], r["index"]))
+        for rank, route in enumerate(ranked, start=1):
+            route["rank"] = rank
+            route["is_optimal"] = rank == 1
+        
+        result = {
+            "success": bool(ranked),
+            "count": len(ranked),
+            "optimal_route": ranked[0] if ranked else None,
+            "routes": ranked,
+            "failed": sorted(failed, key=lambda f: f["index"]),
+            "weather": _WEATHER_NAMES[weather_encoded],
+            "objective": f"{ENERGY_WEIGHT} * energy_kWh + {TIME_WEIGHT} * time_hours",
+        }
+        if not ranked:
+            result["error"] = "No candidate route could be scored"
         if weather_info:
             result["weather_info"] = weather_info
-        
         return result
-        
+    
     except Exception as e:
+        record_error('optimal_path')
         return {
             "success": False,
             "error": str(e),
-            "message": "Failed to predict optimal path travel time",
+            "message": "Failed to rank routes",
         }
@@ -0,0 +1,84 @@
+"""
+Routing Controller
+Finds minimum-energy or minimum-time routes between dataset cities under a
+battery constraint, using the road graph built from the route dataset
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from services.metrics import observe_stage, record_error
+from services.road_graph import OBJECTIVES, NoRouteError, RoadGraph, build_graph
+
+_graph: Optional[RoadGraph] = None
+_graph_lock = threading.Lock()
+
+
+def _get_graph() -> RoadGraph:
+    """Build the road graph once per process."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                with observe_stage('routing', 'load'):
+                    _graph = build_graph()
+    return _graph
+
+
+def _energy_budget(
+    battery_capacity_kWh: Optional[float],
+    battery_percent: Optional[float],
+    available_energy_kWh: Optional[float],
+    reserve_percent: float,
+) -> Optional[float]:
+    """Usable energy for the trip, keeping reserve_percent of capacity back."""
+    if available_energy_kWh is not None:
+        return max(0.0, float(available_energy_kWh))
+    if battery_capacity_kWh is None or battery_percent is None:
+        return None
+    battery_percent = max(0.0, min(100.0, float(battery_percent)))
+    usable_percent = max(0.0, battery_percent - float(reserve_percent))
+    return float(battery_capacity_kWh) * usable_percent / 100
+
+
+def find_route_controller(
+    origin: str,
+    destination: str,
+    objective: str = "energy",
+    battery_capacity_kWh: Optional[float] = None,
+    battery_percent: Optional[float] = None,
+    available_energy_kWh: Optional[float] = None,
+    reserve_percent: float = 0,
+) -> Dict[str, Any]:
+    """Route between two cities minimising energy or time.
+    
+    The battery constraint is either available_energy_kWh or
+    battery_capacity_kWh with battery_percent; without one the route is
+    unconstrained.
+    """
+    try:
+        graph = _get_graph()
+        objective = str(objective).lower()
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of: {', '.join(OBJECTIVES)}")
+        
+        budget = _energy_budget(battery_capacity_kWh, battery_percent, available_energy_kWh, reserve_percent)
+        with observe_stage('routing', 'predict'):
+            route = graph.route(origin, destination, objective, budget)
+        
+        return {"success": True, "feasible": True, **route}
+    
+    except NoRouteError as e:
+        return {"success": False, "feasible": False, "error": str(e)}
+    except Exception as e:
+        record_error('routing')
+        return {"success": False, "error": str(e)}
+
+
+def route_cities_controller() -> Dict[str, Any]:
+    """Cities and city-pair edges available for routing."""
+    try:
+        graph = _get_graph()
+        return {"success": True, "cities": graph.cities, "edges": graph.n_edges}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
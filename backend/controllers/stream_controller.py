@@ -0,0 +1,103 @@
+"""
+Stream Controller
+Scores NDJSON records in fixed-size micro-batches, reading input only as
+fast as results are written back
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, IO, Iterator, List, Tuple
+
+from controllers.battery_range_controller import predict_battery_range_batch
+from controllers.driving_script_controller import predict_driving_style_batch
+from controllers.energy_controller import predict_energy_consumption_batch
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "512"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", str(64 * 1024)))
+
+STREAM_MODELS: Dict[str, Callable[[List[Any]], List[Dict[str, Any]]]] = {
+    "energy": predict_energy_consumption_batch,
+    "battery": predict_battery_range_batch,
+    "driving": predict_driving_style_batch,
+}
+
+
+def _read_lines(stream: IO[bytes], max_bytes: int) -> Iterator[Tuple[int, Any]]:
+    """Yield (line_number, bytes or error message) for each non-blank line.
+
+    Lines longer than max_bytes are skipped without being held in memory,
+    and reported as an error string.
+    """
+    number = 0
+    while True:
+        line = stream.readline(max_bytes + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > max_bytes and not line.endswith(b"\n"):
+            # Drain the rest of the oversized line in bounded pieces
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_bytes + 1)
+            yield number, f"Line longer than {max_bytes} bytes"
+            continue
+        if line.strip():
+            yield number, line
+
+
+def _score_batch(
+    predict_batch: Callable[[List[Any]], List[Dict[str, Any]]],
+    batch: List[Tuple[int, Any]],
+    totals: Dict[str, int],
+) -> str:
+    """Score one micro-batch and return its NDJSON output."""
+    records, positions = [], []
+    results: List[Dict[str, Any]] = [{} for _ in batch]
+    for i, (_, raw) in enumerate(batch):
+        if isinstance(raw, str):
+            results[i] = {"success": False, "error": raw}
+            continue
+        try:
+            records.append(json.loads(raw))
+            positions.append(i)
+        except ValueError as e:
+            results[i] = {"success": False, "error": f"Invalid JSON: {e}"}
+
+    if records:
+        for i, result in zip(positions, predict_batch(records)):
+            results[i] = result
+
+    lines = []
+    for (number, _), result in zip(batch, results):
+        totals["count"] += 1
+        totals["succeeded"] += bool(result.get("success"))
+        lines.append(json.dumps({"line": number, **result}))
+    return "\n".join(lines) + "\n"
+
+
+def score_stream(stream: IO[bytes], model: str, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """Score NDJSON records from stream with one model, yielding NDJSON.
+
+    Records are read lazily and scored batch_size at a time, so memory use
+    is bounded by one micro-batch. Each output line is the model's batch
+    result for one input line, tagged with its 1-based line number; blank
+    lines are skipped. A final {"done": true, ...} line carries the totals.
+    """
+    predict_batch = STREAM_MODELS[model]
+    totals = {"count": 0, "succeeded": 0}
+    batch: List[Tuple[int, Any]] = []
+
+    for item in _read_lines(stream, STREAM_MAX_LINE_BYTES):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield _score_batch(predict_batch, batch, totals)
+            batch = []
+    if batch:
+        yield _score_batch(predict_batch, batch, totals)
+
+    yield json.dumps({
+        "done": True,
+        "model": model,
+        "count": totals["count"],
+        "succeeded": totals["succeeded"],
+        "failed": totals["count"] - totals["succeeded"],
+    }) + "\n"
@@ -0,0 +1,99 @@
+"""
+Telemetry Controller
+Collects raw samples per trip and predicts the driving style from them
+when the trip ends
+"""
+
+from typing import Any, Dict, Tuple
+
+from controllers.driving_script_controller import CATEGORICAL_COLS, NUMERIC_COLS, predict_driving_style_controller
+from services.metrics import observe_stage
+from services.telemetry import TripClosedError, TripLimitError, parse_samples, store_from_env
+
+# Shared between workers through TELEMETRY_DIR under gunicorn
+_store = store_from_env()
+
+# Fields a caller may send at trip end: the trip context the samples cannot
+# provide, or a better value for a computed feature (e.g. odometer distance)
+CONTEXT_FIELDS = CATEGORICAL_COLS + NUMERIC_COLS
+
+
+def _error(message: str, status: int) -> Tuple[Dict[str, Any], int]:
+    return {"success": False, "error": message}, status
+
+
+def ingest_telemetry(trip_id: str, body: Any) -> Tuple[Dict[str, Any], int]:
+    """Add a batch of samples to a trip, starting the trip if it is new.
+
+    body is {"samples": ...} or the samples themselves; see
+    services.telemetry.parse_samples for the accepted shapes. Invalid
+    samples are reported by index and skipped without failing the batch; a
+    batch with no valid sample is refused and does not start the trip.
+
+    Returns (result, HTTP status).
+    """
+    try:
+        samples, errors = parse_samples(body.get("samples", body) if isinstance(body, dict) else body)
+        if not samples:
+            return {"success": False, "error": "No valid samples", "errors": errors}, 400
+        with observe_stage('telemetry', 'ingest'):
+            accepted, summary = _store.add(trip_id, samples)
+    except TripLimitError as e:
+        return _error(str(e), 429)
+    except TripClosedError as e:
+        return _error(str(e), 409)
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    return {
+        "success": True,
+        **summary,
+        "accepted": accepted,
+        "skipped": len(samples) - accepted,
+        "rejected": len(errors),
+        "errors": errors,
+    }, 200
+
+
+def trip_telemetry(trip_id: str) -> Tuple[Dict[str, Any], int]:
+    """The features of an open trip so far."""
+    try:
+        trip = _store.get(trip_id)
+    except KeyError:
+        return _error(f"Unknown trip: {trip_id}", 404)
+
+    summary = trip.summary()
+    return {
+        "success": True,
+        **summary,
+        "features": trip.features() if summary["samples"] else None,
+    }, 200
+
+
+def end_trip(trip_id: str, body: Any) -> Tuple[Dict[str, Any], int]:
+    """Close a trip and predict its driving style.
+
+    body may carry vehicle_make, vehicle_model, road_type, weather and
+    time_of_day, and may override any computed feature. The features are
+    returned even when the prediction fails, so they can be resent to
+    /api/driving/predict.
+    """
+    try:
+        trip = _store.end(trip_id)
+    except KeyError:
+        return _error(f"Unknown trip: {trip_id}", 404)
+
+    try:
+        features = trip.features()
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    context = body if isinstance(body, dict) else {}
+    features.update({field: context[field] for field in CONTEXT_FIELDS if field in context})
+
+    result = predict_driving_style_controller(features)
+    return {**result, "features": features, "trip": trip.summary()}, 200 if result.get("success") else 400
+
+
+def telemetry_stats() -> Dict[str, int]:
+    return _store.stats()
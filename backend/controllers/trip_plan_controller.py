@@ -0,0 +1,321 @@
+"""
+Trip Plan Controller
+Runs the driving style -> energy -> battery range -> optimal path model chain
+in-process, passing each stage's output directly to the next
+"""
+
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from controllers.driving_script_controller import predict_driving_style_controller, predict_driving_style_batch
+from controllers.energy_controller import predict_energy_consumption, predict_energy_consumption_batch
+from controllers.battery_range_controller import predict_battery_range, predict_battery_range_batch
+from controllers.optimal_path_controller import (
+    predict_optimal_path_controller, predict_optimal_path_batch, resolve_weather,
+)
+
+
+REQUIRED_FIELDS = ["distance_km", "battery_capacity_kWh", "battery_percent"]
+
+DRIVING_FEATURE_DEFAULTS = {
+    "elevation_gain_m": 0,
+    "avg_speed": 60,
+    "max_speed": 80,
+    "acceleration_mean": 1.2,
+    "acceleration_std": 0.36,
+    "braking_intensity": 1.5,
+    "trip_duration_min": 60,
+    "vehicle_make": "MG",
+    "vehicle_model": "ZS EV",
+    "road_type": "city",
+    "weather": "clear",
+    "time_of_day": "evening",
+}
+
+# Coerced to float before the chain runs, so a numeric string is accepted
+# and anything else is an input error rather than a failure mid-chain
+NUMERIC_FIELDS = REQUIRED_FIELDS + [
+    key for key, default in DRIVING_FEATURE_DEFAULTS.items() if not isinstance(default, str)
+] + ["lat", "lon"]
+
+
+def _stage_failed(stage: str, result: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+    """Build the error payload for a chain stage that did not succeed."""
+    return {
+        "success": False,
+        "failed_stage": stage,
+        "error": result.get("error", "Unknown error"),
+        "stage_result": result,
+        "timings_ms": timings,
+    }
+
+
+def _validate(record: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Return a copy of the trip with its numeric fields as floats, or an input error."""
+    if not isinstance(record, dict):
+        return None, "Record must be a JSON object"
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) is None]
+    if missing:
+        return None, f"Missing required fields: {', '.join(missing)}"
+
+    record = dict(record)
+    for field in NUMERIC_FIELDS:
+        if record.get(field) is None:
+            continue
+        try:
+            if isinstance(record[field], bool):
+                raise ValueError
+            record[field] = float(record[field])
+        except (TypeError, ValueError):
+            return None, f"{field} must be a number"
+        if not math.isfinite(record[field]):
+            return None, f"{field} must be a number"
+    if record["battery_capacity_kWh"] <= 0:
+        return None, "battery_capacity_kWh must be greater than 0"
+    return record, None
+
+
+def _summary(
+    driving_style: str,
+    energy: Dict[str, Any],
+    battery: Dict[str, Any],
+    optimal_path: Dict[str, Any],
+    battery_capacity_kWh: float,
+    battery_percent: float,
+) -> Dict[str, Any]:
+    """Trip summary from the stage results."""
+    battery_used_percent = energy["predicted_energy_kWh"] / battery_capacity_kWh * 100
+    return {
+        "driving_style": driving_style,
+        "predicted_energy_kWh": energy["predicted_energy_kWh"],
+        "efficiency_kWh_per_km": energy["efficiency_kWh_per_km"],
+        "predicted_range_km": battery["predicted_range_km"],
+        "predicted_travel_time_min": optimal_path["predicted_travel_time_min"],
+        "battery_used_percent": round(float(battery_used_percent), 2),
+        "battery_remaining_percent": round(float(battery_percent - battery_used_percent), 2),
+        "can_complete_trip": bool(energy["predicted_energy_kWh"] <= battery["available_energy_kWh"]),
+    }
+
+
+def _driving_input(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Driving style features for a trip, filled in with the defaults."""
+    driving_input = {
+        key: input_data.get(key, default) for key, default in DRIVING_FEATURE_DEFAULTS.items()
+    }
+    driving_input["distance_km"] = input_data["distance_km"]
+    driving_input["road_type"] = input_data.get("road_type", "city")
+    # The driving model has its own weather categories, in which "clear" is
+    # the baseline; the trip weather is for the energy and path models
+    driving_input["weather"] = input_data.get("driving_weather") or DRIVING_FEATURE_DEFAULTS["weather"]
+    return driving_input
+
+
+def plan_trip_controller(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the full model chain for one trip.
+
+    Expected input_data keys:
+    - distance_km, battery_capacity_kWh, battery_percent (required)
+    - road_type, traffic_level, weather, lat, lon (optional); without
+      weather, lat/lon are looked up once for both the energy and path models
+    - the driving style features accepted by /api/driving/predict (optional,
+      defaults as in the frontend), with the weather given as
+      driving_weather, or driving_style to skip that stage
+
+    Returns the per-stage results, a summary and per-stage timings in ms.
+    """
+    input_data, error = _validate(input_data)
+    if error:
+        return {
+            "success": False,
+            "failed_stage": "input",
+            "error": error,
+            "required_fields": REQUIRED_FIELDS,
+        }
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    distance_km = input_data["distance_km"]
+    road_type = input_data.get("road_type", "city")
+    traffic_level = input_data.get("traffic_level", "medium")
+    weather: Optional[str] = input_data.get("weather")
+    battery_percent = input_data["battery_percent"]
+
+    # 1. Driving style (skipped when the caller already knows it)
+    stage_start = time.perf_counter()
+    if input_data.get("driving_style"):
+        driving = {
+            "success": True,
+            "predicted_driving_style": input_data["driving_style"],
+            "confidence_score": None,
+            "skipped": True,
+        }
+    else:
+        driving = predict_driving_style_controller(_driving_input(input_data))
+    timings["driving_style"] = (time.perf_counter() - stage_start) * 1000
+    if not driving.get("success"):
+        return _stage_failed("driving_style", driving, timings)
+    driving_style = driving["predicted_driving_style"]
+
+    # Both the energy and path models see the same weather
+    weather_info = None
+    if weather is None and input_data.get("lat") is not None and input_data.get("lon") is not None:
+        stage_start = time.perf_counter()
+        weather, weather_info = resolve_weather(input_data["lat"], input_data["lon"])
+        timings["weather"] = (time.perf_counter() - stage_start) * 1000
+
+    # 2. Energy consumption
+    stage_start = time.perf_counter()
+    energy = predict_energy_consumption(
+        distance_km=distance_km,
+        driving_style=driving_style,
+        road_type=road_type,
+        weather=weather or "sunny",
+        elevation_gain_m=input_data.get("elevation_gain_m", 0),
+        avg_speed=input_data.get("avg_speed", 60),
+    )
+    timings["energy"] = (time.perf_counter() - stage_start) * 1000
+    if not energy.get("success"):
+        return _stage_failed("energy", energy, timings)
+
+    # 3. Battery range
+    stage_start = time.perf_counter()
+    battery = predict_battery_range(
+        battery_capacity_kWh=input_data["battery_capacity_kWh"],
+        battery_percent=battery_percent,
+        efficiency_kWh_per_km=energy["efficiency_kWh_per_km"],
+    )
+    timings["battery_range"] = (time.perf_counter() - stage_start) * 1000
+    if not battery.get("success"):
+        return _stage_failed("battery_range", battery, timings)
+
+    # 4. Optimal path travel time
+    stage_start = time.perf_counter()
+    optimal_path = predict_optimal_path_controller(
+        distance_km=distance_km,
+        road_type=road_type,
+        traffic_level=traffic_level,
+        driving_style=driving_style,
+        predicted_energy_kWh=energy["predicted_energy_kWh"],
+        predicted_range_km=battery["predicted_range_km"],
+        battery_remaining_percent=battery_percent,
+        weather=weather,
+    )
+    timings["optimal_path"] = (time.perf_counter() - stage_start) * 1000
+    if not optimal_path.get("success"):
+        return _stage_failed("optimal_path", optimal_path, timings)
+    if weather_info:
+        optimal_path["weather_info"] = weather_info
+
+    try:
+        summary = _summary(
+            driving_style, energy, battery, optimal_path, input_data["battery_capacity_kWh"], battery_percent
+        )
+    except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+        return _stage_failed("summary", {"error": str(e)}, timings)
+
+    timings["total"] = (time.perf_counter() - started) * 1000
+
+    return {
+        "success": True,
+        "summary": summary,
+        "driving_style": driving,
+        "energy": energy,
+        "battery_range": battery,
+        "optimal_path": optimal_path,
+        "timings_ms": {stage: round(ms, 3) for stage, ms in timings.items()},
+    }
+
+
+def plan_trips_batch(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Run the model chain for many trips, one batched model call per stage.
+
+    Takes the same keys per record as plan_trip_controller. Returns one
+    result per record in input order: {"success": True, "summary": {...}}
+    or {"success": False, "failed_stage": ..., "error": ...}. A record that
+    fails a stage drops out of the later stages without affecting the rest.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    records = list(records)
+    active = []
+    for i, record in enumerate(records):
+        records[i], error = _validate(record)
+        if error:
+            results[i] = {"success": False, "failed_stage": "input", "error": error}
+            continue
+        active.append(i)
+
+    def run_stage(stage: str, predict_batch, inputs: List[Dict[str, Any]], indexes: List[int]) -> Dict[int, Dict[str, Any]]:
+        passed = {}
+        for i, result in zip(indexes, predict_batch(inputs) if inputs else []):
+            if result.get("success"):
+                passed[i] = result
+            else:
+                results[i] = {"success": False, "failed_stage": stage, "error": result.get("error", "Unknown error")}
+        return passed
+
+    # 1. Driving style, only for trips that do not already have one
+    styles = {i: records[i]["driving_style"] for i in active if records[i].get("driving_style")}
+    to_predict = [i for i in active if i not in styles]
+    driving = run_stage(
+        "driving_style", predict_driving_style_batch, [_driving_input(records[i]) for i in to_predict], to_predict
+    )
+    styles.update({i: result["predicted_driving_style"] for i, result in driving.items()})
+    active = [i for i in active if i in styles]
+
+    # Both the energy and path models see the same weather, looked up once
+    # per location
+    weather: Dict[int, Optional[str]] = {}
+    by_coords: Dict[Tuple[float, float], str] = {}
+    for i in active:
+        record = records[i]
+        weather[i] = record.get("weather")
+        if weather[i] is None and record.get("lat") is not None and record.get("lon") is not None:
+            coords = (record["lat"], record["lon"])
+            if coords not in by_coords:
+                by_coords[coords] = resolve_weather(*coords)[0]
+            weather[i] = by_coords[coords]
+
+    # 2. Energy consumption
+    energy = run_stage("energy", predict_energy_consumption_batch, [{
+        "distance_km": records[i]["distance_km"],
+        "driving_style": styles[i],
+        "road_type": records[i].get("road_type", "city"),
+        "weather": weather[i] or "sunny",
+        "elevation_gain_m": records[i].get("elevation_gain_m", 0),
+        "avg_speed": records[i].get("avg_speed", 60),
+    } for i in active], active)
+    active = [i for i in active if i in energy]
+
+    # 3. Battery range
+    battery = run_stage("battery_range", predict_battery_range_batch, [{
+        "battery_capacity_kWh": records[i]["battery_capacity_kWh"],
+        "battery_percent": records[i]["battery_percent"],
+        "efficiency_kWh_per_km": energy[i]["efficiency_kWh_per_km"],
+    } for i in active], active)
+    active = [i for i in active if i in battery]
+
+    # 4. Optimal path travel time
+    optimal_path = run_stage("optimal_path", predict_optimal_path_batch, [{
+        "distance_km": records[i]["distance_km"],
+        "road_type": records[i].get("road_type", "city"),
+        "traffic_level": records[i].get("traffic_level", "medium"),
+        "driving_style": styles[i],
+        "predicted_energy_kWh": energy[i]["predicted_energy_kWh"],
+        "predicted_range_km": battery[i]["predicted_range_km"],
+        "battery_remaining_percent": records[i]["battery_percent"],
+        "weather": weather[i],
+    } for i in active], active)
+
+    for i, path in optimal_path.items():
+        try:
+            results[i] = {
+                "success": True,
+                "summary": _summary(
+                    styles[i], energy[i], battery[i], path, records[i]["battery_capacity_kWh"], records[i]["battery_percent"]
+                ),
+            }
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            results[i] = {"success": False, "failed_stage": "summary", "error": str(e)}
+    return results
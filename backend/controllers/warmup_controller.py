@@ -0,0 +1,161 @@
+"""
+Warm-up Controller
+Loads every model and runs one representative prediction through each, and
+tracks whether the process is ready to serve traffic
+
+The model controllers (and numpy/pandas/sklearn with them) are imported by
+the warm-up calls, not by this module, so the app can import it and answer
+/health before any of them are loaded.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+_status: Dict[str, Any] = {"state": "pending", "models": {}}
+_status_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def _warm_energy() -> Dict[str, Any]:
+    from controllers.energy_controller import predict_energy_consumption, predict_energy_consumption_batch
+
+    predict_energy_consumption_batch([
+        {"distance_km": 40, "driving_style": "Eco", "road_type": "highway", "weather": "light_rain"},
+        {"distance_km": 12, "driving_style": "Aggressive", "road_type": "city", "weather": "sunny"},
+    ])
+    return predict_energy_consumption(50, "Normal", "city", "sunny")
+
+
+def _warm_battery() -> Dict[str, Any]:
+    from controllers.battery_range_controller import predict_battery_range, predict_battery_range_batch
+
+    predict_battery_range_batch([
+        {"battery_capacity_kWh": 60, "battery_percent": 40, "efficiency_kWh_per_km": 0.15},
+        {"battery_capacity_kWh": 40, "battery_percent": 90, "efficiency_kWh_per_km": 0.2},
+    ])
+    return predict_battery_range(50, 80, 0.17)
+
+
+def _warm_optimal_path() -> Dict[str, Any]:
+    from controllers.optimal_path_controller import predict_optimal_path_controller
+
+    return predict_optimal_path_controller(
+        distance_km=50,
+        road_type="city",
+        traffic_level="medium",
+        driving_style="Normal",
+        predicted_energy_kWh=8.5,
+        predicted_range_km=240,
+        battery_remaining_percent=80,
+        weather="sunny",
+    )
+
+
+def _warm_driving() -> Dict[str, Any]:
+    from controllers.driving_script_controller import predict_driving_style_controller
+    from controllers.trip_plan_controller import DRIVING_FEATURE_DEFAULTS
+
+    return predict_driving_style_controller({"distance_km": 50, **DRIVING_FEATURE_DEFAULTS})
+
+
+def _warm_routing() -> Dict[str, Any]:
+    from controllers.routing_controller import find_route_controller
+
+    return find_route_controller("Colombo", "Kandy")
+
+
+def _warm_charging() -> Dict[str, Any]:
+    from controllers.charging_controller import recommend_stations_controller
+
+    return recommend_stations_controller({"origin": "Colombo"})
+
+
+# Name and warm-up call for each model, in load order
+WARMUPS: List[Tuple[str, Callable[[], Dict[str, Any]]]] = [
+    ("energy", _warm_energy),
+    ("battery", _warm_battery),
+    ("optimal_path", _warm_optimal_path),
+    ("driving", _warm_driving),
+    ("routing", _warm_routing),
+    ("charging", _warm_charging),
+]
+
+
+def warm_up_models() -> Dict[str, Any]:
+    """Load and exercise every model once, then mark the process ready.
+
+    A model whose warm-up fails (for example a missing model file) is
+    reported as failed but does not hold back readiness; its endpoints
+    answer with the same error they would have returned anyway.
+    """
+    with _status_lock:
+        _status["state"] = "warming"
+    started = time.perf_counter()
+
+    for name, warm in WARMUPS:
+        model_started = time.perf_counter()
+        try:
+            result = warm()
+            ok, error = bool(result.get("success")), result.get("error")
+        except Exception as e:
+            ok, error = False, str(e)
+        entry = {"ok": ok, "ms": round((time.perf_counter() - model_started) * 1000, 2)}
+        if not ok:
+            entry["error"] = error
+        with _status_lock:
+            _status["models"][name] = entry
+
+    with _status_lock:
+        _status["state"] = "ready"
+        _status["warmup_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    _ready.set()
+    return readiness()
+
+
+def start_background_warm_up() -> threading.Thread:
+    """Run warm_up_models in a daemon thread and return the thread.
+
+    The server binds and answers /health straight away; /ready reports 503
+    until the thread finishes. Requests that arrive first load the models
+    they need themselves. Calling this again returns the running thread.
+    """
+    global _warmup_thread
+    with _status_lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _status["state"] = "warming"
+            _warmup_thread = threading.Thread(target=_warm_up_logged, name="model-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def _warm_up_logged() -> None:
+    status = warm_up_models()
+    failed = sorted(name for name, entry in status["models"].items() if not entry["ok"])
+    logger.info("Models warmed in %.0f ms%s", status["warmup_ms"], f" (failed: {', '.join(failed)})" if failed else "")
+
+
+def mark_ready() -> None:
+    """Mark the process ready without warming (models load on first use)."""
+    with _status_lock:
+        if _status["state"] == "pending":
+            _status["state"] = "ready"
+    _ready.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> Dict[str, Any]:
+    with _status_lock:
+        return {
+            "ready": _ready.is_set(),
+            "state": _status["state"],
+            "warmup_ms": _status.get("warmup_ms"),
+            "models": {name: dict(entry) for name, entry in _status["models"].items()},
+        }
@@ -1,13 +1,32 @@
+"""
+Synthetic Sri Lanka EV dataset generator
+
+Generates the driving style, energy consumption, battery range, charging
+recommender and optimal route datasets plus the charging stations master.
+Rows are generated with vectorized NumPy in fixed-size chunks across worker
+processes and streamed to the CSVs in order, so memory stays bounded by the
+chunks in flight. Output is reproducible for a given --seed and
+--chunk-size (and --reference-date, which anchors trip_date), regardless of
+the number of workers.
+
+Run from the backend directory:
+    python genarated_scripts/script.py                          # 50k trips into backend/data
+    python genarated_scripts/script.py --trips 20000000 --out /tmp/ev --workers 8
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
 import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
-import os
 
 # -----------------------------
 # Helper function to create path
-def mkpath(name):
-    base_path = os.path.join(os.path.dirname(__file__), "..", "data")
+def mkpath(name, base_path=None):
+    base_path = base_path or os.path.join(os.path.dirname(__file__), "..", "data")
     os.makedirs(base_path, exist_ok=True)
     return os.path.join(base_path, name)
 
@@ -16,7 +35,10 @@ def mkpath(name):
 cities = ["Colombo", "Galle", "Kandy", "Matara", "Kurunegala", "Anuradhapura", "Trincomalee", "Jaffna", "Batticaloa", "Ratnapura"]
 road_types = ["city","highway","rural","coastal"]
 weathers = ["sunny","cloudy","light_rain","heavy_rain","monsoon"]
+weather_weights = [0.35,0.25,0.15,0.15,0.10]
 time_of_day_buckets = ["morning","afternoon","evening","night"]
+styles = ["Eco","Normal","Aggressive"]
+style_weights = [0.25,0.6,0.15]
 
 # Vehicle models
 vehicle_models = [
@@ -25,187 +47,375 @@ vehicle_models = [
     {"make":"BYD", "model":"Atto 3", "eff_kwh_per_km":0.17, "weight_kg":1700},
     {"make":"Tesla", "model":"Model 3", "eff_kwh_per_km":0.15, "weight_kg":1620},
 ]
-
-# Charging stations
-charging_stations = []
 station_types = ["AC_7kW","AC_22kW","DC_50kW","DC_120kW"]
-for i, city in enumerate(cities, start=1):
-    for j in range(3):
-        charging_stations.append({
-            "station_id": f"CS_{i:02d}_{j+1}",
-            "name": f"ChargePoint {city} #{j+1}",
-            "city": city,
-            "charger_type": random.choice(station_types),
-            "num_ports": random.choice([1,2,3]),
-            "avg_wait_min": random.randint(0,30),
-            "operational": random.choices([True, False], weights=[0.95,0.05])[0]
-        })
-charging_stations_df = pd.DataFrame(charging_stations)
+
+# Lookup arrays indexed by category code
+VEHICLE_MAKES = np.array([v["make"] for v in vehicle_models])
+VEHICLE_NAMES = np.array([v["model"] for v in vehicle_models])
+VEHICLE_EFF = np.array([v["eff_kwh_per_km"] for v in vehicle_models])
+CITIES = np.array(cities)
+ROAD_TYPES = np.array(road_types)
+WEATHERS = np.array(weathers)
+TIMES_OF_DAY = np.array(time_of_day_buckets)
+STYLES = np.array(styles)
+
+# Latent style (eco, normal, aggressive) -> (mean, std) of each driving signal
+ACCEL_MEAN = np.array([[0.45, 0.15], [0.9, 0.3], [1.8, 0.5]])
+ACCEL_STD = np.array([[0.25, 0.1], [0.6, 0.25], [1.2, 0.4]])
+BRAKING = np.array([[0.25, 0.15], [0.45, 0.25], [1.1, 0.4]])
+
+STYLE_ENERGY_MULT = np.array([0.9, 1.0, 1.3])        # Eco, Normal, Aggressive
+STYLE_RANGE_MULT = np.array([0.95, 1.0, 1.2])
+ROAD_MULT = np.array([1.05, 0.95, 1.0, 1.02])        # city, highway, rural, coastal
+WEATHER_MULT = np.array([1.0, 1.01, 1.03, 1.08, 1.12])
+TRAFFIC_LEVELS = np.array(["low", "medium", "high"])
+TRAFFIC_TIME_MULT = np.array([1.0, 1.05, 1.2])
+HILL_CITIES = [cities.index("Kandy"), cities.index("Ratnapura")]
+
+DRIVING_COLUMNS = [
+    "trip_id", "driver_id", "vehicle_make", "vehicle_model", "origin", "destination", "distance_km",
+    "elevation_gain_m", "trip_date", "avg_speed", "max_speed", "acceleration_mean", "acceleration_std",
+    "braking_intensity", "trip_duration_min", "road_type", "weather", "time_of_day", "driving_style",
+]
+ENERGY_COLUMNS = [
+    "trip_id", "vehicle_model", "distance_km", "driving_style", "road_type", "weather", "elevation_gain_m",
+    "avg_speed", "energy_consumed_kWh", "battery_capacity_kWh", "battery_start_%", "battery_end_%",
+]
+RANGE_COLUMNS = [
+    "trip_id", "vehicle_model", "battery_capacity_kWh", "battery_start_%", "battery_start_kWh",
+    "eff_kWh_per_km", "max_possible_km", "predicted_remaining_km",
+]
+CHARGE_COLUMNS = [
+    "trip_id", "station_id", "station_name", "station_city", "charger_type", "num_ports", "avg_wait_min",
+    "operational", "distance_from_route_km", "is_recommended",
+]
+ROUTE_COLUMNS = [
+    "origin", "destination", "route_id", "route_label", "route_distance_km", "avg_speed_kmh", "traffic_level",
+    "estimated_time_min", "estimated_energy_kWh", "driving_style", "vehicle_model", "weather", "is_optimal",
+]
+
+OUTPUT_FILES = {
+    "driving": "driving_style_dataset_srilanka.csv",
+    "energy": "energy_consumption_dataset_srilanka.csv",
+    "range": "battery_range_dataset_srilanka.csv",
+    "charge": "charging_recommender_dataset_srilanka.csv",
+    "route": "optimal_route_dataset_srilanka.csv",
+}
+HEADERS = {
+    "driving": DRIVING_COLUMNS,
+    "energy": ENERGY_COLUMNS,
+    "range": RANGE_COLUMNS,
+    "charge": CHARGE_COLUMNS,
+    "route": ROUTE_COLUMNS,
+}
+
+# Independent random streams, so e.g. changing --routes leaves trips unchanged
+STREAM_STATIONS, STREAM_TRIPS, STREAM_ROUTES = 0, 1, 2
+
+
+def _rng(seed: int, stream: int, chunk: int = 0) -> np.random.Generator:
+    return np.random.default_rng([seed, stream, chunk])
+
+
+def _ids(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    return (prefix + pd.Series(numbers).astype(str).str.zfill(width)).to_numpy()
+
+
+def _to_csv(columns: Dict[str, Any]) -> str:
+    return pd.DataFrame(columns).to_csv(index=False, header=False)
 
 # -----------------------------
-# Helper for origin-destination sampling
-def sample_od():
-    o = random.choice(cities)
-    d = random.choice([c for c in cities if c != o])
-    idx_o = cities.index(o)
-    idx_d = cities.index(d)
-    base = abs(idx_o - idx_d) * 40 + 20
-    distance = max(5, int(np.random.normal(base, base * 0.25)))
-    elev_gain = int(abs(idx_o - idx_d) * random.uniform(10,50) + (50 if ("Kandy" in (o,d) or "Ratnapura" in (o,d)) else 0))
-    return o, d, distance, elev_gain
+# Charging stations
+
+def generate_stations(seed: int) -> pd.DataFrame:
+    rng = _rng(seed, STREAM_STATIONS)
+    n = len(cities) * 3
+    city_idx = np.repeat(np.arange(len(cities)), 3)
+    slot = np.tile(np.arange(1, 4), len(cities))
+    return pd.DataFrame({
+        "station_id": [f"CS_{i + 1:02d}_{j}" for i, j in zip(city_idx, slot)],
+        "name": [f"ChargePoint {cities[i]} #{j}" for i, j in zip(city_idx, slot)],
+        "city": CITIES[city_idx],
+        "charger_type": np.array(station_types)[rng.integers(0, len(station_types), n)],
+        "num_ports": rng.integers(1, 4, n),
+        "avg_wait_min": rng.integers(0, 31, n),
+        "operational": rng.random(n) < 0.95,
+    })
 
 # -----------------------------
-N_TRIPS = 50000  # number of synthetic trips
-
-# 1) Driving Style Dataset
-driving_rows = []
-for tid in range(N_TRIPS):
-    trip_id = f"TR{tid+1:06d}"
-    driver_id = f"DRV{random.randint(1,400):04d}"
-    vehicle = random.choice(vehicle_models)
-    origin, dest, distance_km, elev_gain_m = sample_od()
-    trip_duration_min = max(3, int(distance_km / max(10, np.random.normal(45,10)) * 60))
-    avg_speed = round(distance_km / (trip_duration_min/60.0) + np.random.normal(0,3), 2)
-    max_speed = round(avg_speed + abs(np.random.normal(10,7)), 2)
-    style_latent = random.choices(["eco","normal","aggressive"], weights=[0.25,0.6,0.15])[0]
-    if style_latent == "eco":
-        accel_mean = round(np.random.normal(0.45, 0.15),3)
-        accel_std = round(abs(np.random.normal(0.25,0.1)),3)
-        braking_intensity = round(abs(np.random.normal(0.25,0.15)),3)
-    elif style_latent == "normal":
-        accel_mean = round(np.random.normal(0.9, 0.3),3)
-        accel_std = round(abs(np.random.normal(0.6,0.25)),3)
-        braking_intensity = round(abs(np.random.normal(0.45,0.25)),3)
-    else:
-        accel_mean = round(np.random.normal(1.8, 0.5),3)
-        accel_std = round(abs(np.random.normal(1.2,0.4)),3)
-        braking_intensity = round(abs(np.random.normal(1.1,0.4)),3)
-    road_type = random.choice(road_types)
-    weather = random.choices(weathers, weights=[0.35,0.25,0.15,0.15,0.10])[0]
-    time_of_day = random.choice(time_of_day_buckets)
+# Trip chunk: driving, energy, battery range and charging rows for the same trips
+
+def generate_trip_chunk(
+    seed: int,
+    chunk: int,
+    start: int,
+    n: int,
+    stations: pd.DataFrame,
+    reference: np.datetime64,
+) -> Dict[str, str]:
+    rng = _rng(seed, STREAM_TRIPS, chunk)
+
+    # 1) Driving Style Dataset
+    trip_numbers = np.arange(start + 1, start + n + 1)
+    vehicle = rng.integers(0, len(vehicle_models), n)
+
+    # Origin-destination: destination uniform over the other cities
+    origin = rng.integers(0, len(cities), n)
+    dest = (origin + rng.integers(1, len(cities), n)) % len(cities)
+    hops = np.abs(origin - dest)
+    base = hops * 40 + 20
+    distance_km = np.maximum(5, np.trunc(rng.normal(base, base * 0.25))).astype(np.int64)
+    hilly = np.isin(origin, HILL_CITIES) | np.isin(dest, HILL_CITIES)
+    elev_gain_m = np.trunc(hops * rng.uniform(10, 50, n) + np.where(hilly, 50, 0)).astype(np.int64)
+
+    trip_duration_min = np.maximum(
+        3, np.trunc(distance_km / np.maximum(10, rng.normal(45, 10, n)) * 60)
+    ).astype(np.int64)
+    avg_speed = np.round(distance_km / (trip_duration_min / 60.0) + rng.normal(0, 3, n), 2)
+    max_speed = np.round(avg_speed + np.abs(rng.normal(10, 7, n)), 2)
+
+    latent = rng.choice(3, size=n, p=style_weights)
+    accel_mean = np.round(rng.normal(ACCEL_MEAN[latent, 0], ACCEL_MEAN[latent, 1]), 3)
+    accel_std = np.round(np.abs(rng.normal(ACCEL_STD[latent, 0], ACCEL_STD[latent, 1])), 3)
+    braking_intensity = np.round(np.abs(rng.normal(BRAKING[latent, 0], BRAKING[latent, 1])), 3)
+
+    road = rng.integers(0, len(road_types), n)
+    weather = rng.choice(len(weathers), size=n, p=weather_weights)
+    time_of_day = rng.integers(0, len(time_of_day_buckets), n)
+
     # label based on simple heuristic
-    if accel_mean < 0.6 and accel_std < 0.5 and braking_intensity < 0.4:
-        style_label = "Eco"
-    elif accel_mean > 1.4 or accel_std > 1.0 or braking_intensity > 0.9:
-        style_label = "Aggressive"
-    else:
-        style_label = "Normal"
-    driving_rows.append({
-        "trip_id": trip_id, "driver_id": driver_id, "vehicle_make": vehicle["make"], "vehicle_model": vehicle["model"],
-        "origin": origin, "destination": dest, "distance_km": distance_km, "elevation_gain_m": elev_gain_m,
-        "trip_date": (datetime.now() - timedelta(days=random.randint(0,365))).strftime("%Y-%m-%d %H:%M:%S"),
-        "avg_speed": max(0.0, round(avg_speed,2)), "max_speed": max(0.0, round(max_speed,2)),
-        "acceleration_mean": max(0.0, accel_mean), "acceleration_std": accel_std, "braking_intensity": braking_intensity,
-        "trip_duration_min": trip_duration_min, "road_type": road_type, "weather": weather,
-        "time_of_day": time_of_day, "driving_style": style_label
+    eco = (accel_mean < 0.6) & (accel_std < 0.5) & (braking_intensity < 0.4)
+    aggressive = (accel_mean > 1.4) | (accel_std > 1.0) | (braking_intensity > 0.9)
+    style = np.where(eco, 0, np.where(aggressive, 2, 1))
+
+    trip_ids = _ids("TR", trip_numbers, 6)
+    trip_date = reference - rng.integers(0, 366, n).astype("timedelta64[D]")
+
+    driving = _to_csv({
+        "trip_id": trip_ids,
+        "driver_id": _ids("DRV", rng.integers(1, 401, n), 4),
+        "vehicle_make": VEHICLE_MAKES[vehicle],
+        "vehicle_model": VEHICLE_NAMES[vehicle],
+        "origin": CITIES[origin],
+        "destination": CITIES[dest],
+        "distance_km": distance_km,
+        "elevation_gain_m": elev_gain_m,
+        "trip_date": np.char.replace(np.datetime_as_string(trip_date, unit="s"), "T", " "),
+        "avg_speed": np.maximum(0.0, avg_speed),
+        "max_speed": np.maximum(0.0, max_speed),
+        "acceleration_mean": np.maximum(0.0, accel_mean),
+        "acceleration_std": accel_std,
+        "braking_intensity": braking_intensity,
+        "trip_duration_min": trip_duration_min,
+        "road_type": ROAD_TYPES[road],
+        "weather": WEATHERS[weather],
+        "time_of_day": TIMES_OF_DAY[time_of_day],
+        "driving_style": STYLES[style],
     })
-driving_df = pd.DataFrame(driving_rows)
-driving_df.to_csv(mkpath("driving_style_dataset_srilanka.csv"), index=False)
-
-# 2) Energy Consumption Dataset
-energy_rows = []
-for _, row in driving_df.iterrows():
-    vehicle = next(v for v in vehicle_models if v["model"] == row["vehicle_model"])
-    base_eff = vehicle["eff_kwh_per_km"]
-    style_mult = {"Eco":0.9, "Normal":1.0, "Aggressive":1.3}[row["driving_style"]]
-    traffic_mult = {"city":1.05, "highway":0.95, "rural":1.0, "coastal":1.02}[row["road_type"]]
-    weather_mult = {"sunny":1.0, "cloudy":1.01, "light_rain":1.03, "heavy_rain":1.08, "monsoon":1.12}[row["weather"]]
-    elev_factor = 1 + (row["elevation_gain_m"] / (row["distance_km"]*100+1))*0.6
-    noise = np.random.normal(0,0.02)
-    energy_kwh = row["distance_km"] * base_eff * style_mult * traffic_mult * weather_mult * elev_factor * (1+noise)
-    battery_capacity = random.choice([40,50,60,75])
-    battery_start_pct = round(random.uniform(40,100),2)
+
+    # 2) Energy Consumption Dataset
+    elev_factor = 1 + (elev_gain_m / (distance_km * 100 + 1)) * 0.6
+    noise = rng.normal(0, 0.02, n)
+    energy_kwh = (distance_km * VEHICLE_EFF[vehicle] * STYLE_ENERGY_MULT[style] * ROAD_MULT[road]
+                  * WEATHER_MULT[weather] * elev_factor * (1 + noise))
+    energy_consumed = np.round(np.maximum(0.01, energy_kwh), 3)
+    battery_capacity = np.array([40, 50, 60, 75])[rng.integers(0, 4, n)]
+    battery_start_pct = np.round(rng.uniform(40, 100, n), 2)
     battery_start_kwh = battery_capacity * battery_start_pct / 100
-    battery_end_kwh = max(0, battery_start_kwh - energy_kwh)
-    battery_end_pct = round(battery_end_kwh / battery_capacity * 100,2)
-    energy_rows.append({
-        "trip_id": row["trip_id"], "vehicle_model": row["vehicle_model"], "distance_km": row["distance_km"],
-        "driving_style": row["driving_style"], "road_type": row["road_type"], "weather": row["weather"],
-        "elevation_gain_m": row["elevation_gain_m"], "avg_speed": row["avg_speed"],
-        "energy_consumed_kWh": round(max(0.01, energy_kwh),3),
-        "battery_capacity_kWh": battery_capacity, "battery_start_%": battery_start_pct, "battery_end_%": battery_end_pct
+    battery_end_kwh = np.maximum(0, battery_start_kwh - energy_kwh)
+
+    energy = _to_csv({
+        "trip_id": trip_ids,
+        "vehicle_model": VEHICLE_NAMES[vehicle],
+        "distance_km": distance_km,
+        "driving_style": STYLES[style],
+        "road_type": ROAD_TYPES[road],
+        "weather": WEATHERS[weather],
+        "elevation_gain_m": elev_gain_m,
+        "avg_speed": np.maximum(0.0, avg_speed),
+        "energy_consumed_kWh": energy_consumed,
+        "battery_capacity_kWh": battery_capacity,
+        "battery_start_%": battery_start_pct,
+        "battery_end_%": np.round(battery_end_kwh / battery_capacity * 100, 2),
+    })
+
+    # 3) Battery Range Dataset
+    eff = VEHICLE_EFF[vehicle] * STYLE_RANGE_MULT[style]
+    battery_range = _to_csv({
+        "trip_id": trip_ids,
+        "vehicle_model": VEHICLE_NAMES[vehicle],
+        "battery_capacity_kWh": battery_capacity,
+        "battery_start_%": battery_start_pct,
+        "battery_start_kWh": np.round(battery_start_kwh, 3),
+        "eff_kWh_per_km": np.round(eff, 4),
+        "max_possible_km": np.round(battery_start_kwh / eff, 2),
+        "predicted_remaining_km": np.maximum(0, np.round((battery_start_kwh - energy_consumed) / eff, 2)),
+    })
+
+    # 4) Charging Station Recommender Dataset
+    # Origin and destination always differ, so each trip has the 3 stations of
+    # each endpoint city (6 candidates) and 3 of them are sampled
+    candidates = np.concatenate([origin[:, None] * 3 + np.arange(3), dest[:, None] * 3 + np.arange(3)], axis=1)
+    picks = np.argsort(rng.random((n, 6)), axis=1)[:, :3]
+    sampled = np.take_along_axis(candidates, picks, axis=1)
+
+    power_factor = np.where(stations["charger_type"].str.startswith("DC").to_numpy(), 0.8, 1.0)
+    avail = np.where(stations["operational"].to_numpy(), 1.0, 0.01)
+    wait = stations["avg_wait_min"].to_numpy()
+    base_km = 5
+    score = base_km * power_factor[sampled] / (avail[sampled] + 0.001) + wait[sampled] * 0.1
+    recommended = np.zeros((n, 3), dtype=np.int64)
+    recommended[np.arange(n), np.argmin(score, axis=1)] = 1
+
+    flat = sampled.ravel()
+    charge = _to_csv({
+        "trip_id": np.repeat(trip_ids, 3),
+        "station_id": stations["station_id"].to_numpy()[flat],
+        "station_name": stations["name"].to_numpy()[flat],
+        "station_city": stations["city"].to_numpy()[flat],
+        "charger_type": stations["charger_type"].to_numpy()[flat],
+        "num_ports": stations["num_ports"].to_numpy()[flat],
+        "avg_wait_min": wait[flat],
+        "operational": stations["operational"].to_numpy()[flat],
+        "distance_from_route_km": np.full(len(flat), base_km),
+        "is_recommended": recommended.ravel(),
     })
-energy_df = pd.DataFrame(energy_rows)
-energy_df.to_csv(mkpath("energy_consumption_dataset_srilanka.csv"), index=False)
-
-# 3) Battery Range Dataset
-range_rows = []
-for _, e in energy_df.iterrows():
-    vehicle = next(v for v in vehicle_models if v["model"]==e["vehicle_model"])
-    style_eff_mult = {"Eco":0.95,"Normal":1.0,"Aggressive":1.2}[e["driving_style"]]
-    eff = vehicle["eff_kwh_per_km"]*style_eff_mult
-    start_kwh = e["battery_capacity_kWh"]*e["battery_start_%"]/100
-    max_possible_km = round(start_kwh / eff,2)
-    predicted_remaining_km = max(0, round((start_kwh - e["energy_consumed_kWh"]) / eff,2))
-    range_rows.append({
-        "trip_id": e["trip_id"], "vehicle_model": e["vehicle_model"], "battery_capacity_kWh": e["battery_capacity_kWh"],
-        "battery_start_%": e["battery_start_%"], "battery_start_kWh": round(start_kwh,3),
-        "eff_kWh_per_km": round(eff,4), "max_possible_km": max_possible_km, "predicted_remaining_km": predicted_remaining_km
+
+    return {"driving": driving, "energy": energy, "range": battery_range, "charge": charge}
+
+# -----------------------------
+# Route chunk: three candidate routes per origin-destination pair
+
+def generate_route_chunk(seed: int, chunk: int, n: int) -> Dict[str, str]:
+    rng = _rng(seed, STREAM_ROUTES, chunk)
+    shape = (n, 3)
+
+    origin = rng.integers(0, len(cities), n)
+    dest = (origin + rng.integers(1, len(cities), n)) % len(cities)
+    base_distance = rng.integers(20, 121, n)
+
+    route_distance = np.maximum(5, np.trunc(base_distance[:, None] * rng.uniform(0.85, 1.25, shape))).astype(np.int64)
+    avg_speed = np.maximum(20, np.trunc(rng.normal(50, 12, shape))).astype(np.int64)
+    traffic = rng.integers(0, 3, shape)
+    time_min = np.trunc(route_distance / np.maximum(10, avg_speed) * 60 * TRAFFIC_TIME_MULT[traffic]).astype(np.int64)
+    vehicle = rng.integers(0, len(vehicle_models), shape)
+    style = rng.choice(3, size=shape, p=style_weights)
+    weather = rng.integers(0, len(weathers), shape)
+    energy_est = np.round(route_distance * VEHICLE_EFF[vehicle] * STYLE_ENERGY_MULT[style] * WEATHER_MULT[weather], 3)
+
+    objective = 0.7 * energy_est + 0.3 * (time_min / 60.0)
+    is_optimal = np.zeros(shape, dtype=np.int64)
+    is_optimal[np.arange(n), np.argmin(objective, axis=1)] = 1
+
+    labels = np.tile(np.array(["A", "B", "C"]), n)
+    origin_names = np.repeat(CITIES[origin], 3)
+    dest_names = np.repeat(CITIES[dest], 3)
+    route_ids = pd.Series(origin_names) + "_" + pd.Series(dest_names) + "_" + pd.Series(labels)
+
+    route = _to_csv({
+        "origin": origin_names,
+        "destination": dest_names,
+        "route_id": route_ids.to_numpy(),
+        "route_label": labels,
+        "route_distance_km": route_distance.ravel(),
+        "avg_speed_kmh": avg_speed.ravel(),
+        "traffic_level": TRAFFIC_LEVELS[traffic].ravel(),
+        "estimated_time_min": time_min.ravel(),
+        "estimated_energy_kWh": energy_est.ravel(),
+        "driving_style": STYLES[style].ravel(),
+        "vehicle_model": VEHICLE_NAMES[vehicle].ravel(),
+        "weather": WEATHERS[weather].ravel(),
+        "is_optimal": is_optimal.ravel(),
     })
-range_df = pd.DataFrame(range_rows)
-range_df.to_csv(mkpath("battery_range_dataset_srilanka.csv"), index=False)
-
-# 4) Charging Station Recommender Dataset
-charge_rows = []
-for _, row in driving_df.iterrows():
-    origin, dest = row["origin"], row["destination"]
-    candidates = [s for s in charging_stations if s["city"] in {origin,dest}]
-    if len(candidates)<3:
-        intermediate = random.choice([c for c in cities if c not in {origin,dest}])
-        candidates += [s for s in charging_stations if s["city"]==intermediate]
-    sample_cands = random.sample(candidates, min(3,len(candidates)))
-    best_score = 1e9
-    best_station = None
-    for s in sample_cands:
-        base = 5 if s["city"] in {origin,dest} else random.randint(10,60)
-        power_factor = 0.8 if "DC" in s["charger_type"] else 1.0
-        avail = 1 if s["operational"] else 0.01
-        score = base*power_factor/(avail+0.001) + s["avg_wait_min"]*0.1
-        if score<best_score:
-            best_score = score
-            best_station = s
-        charge_rows.append({
-            "trip_id": row["trip_id"], "station_id": s["station_id"], "station_name": s["name"], "station_city": s["city"],
-            "charger_type": s["charger_type"], "num_ports": s["num_ports"], "avg_wait_min": s["avg_wait_min"],
-            "operational": s["operational"], "distance_from_route_km": base, "is_recommended": int(s["station_id"]==best_station["station_id"])
-        })
-charge_df = pd.DataFrame(charge_rows)
-charge_df.to_csv(mkpath("charging_recommender_dataset_srilanka.csv"), index=False)
-
-# 5) Optimal Route Dataset
-route_rows = []
-for tid in range(1000):
-    origin = random.choice(cities)
-    dest = random.choice([c for c in cities if c!=origin])
-    base_distance = random.randint(20,120)
-    routes = []
-    for r in ["A","B","C"]:
-        route_distance = max(5,int(base_distance*random.uniform(0.85,1.25)))
-        avg_speed = max(20,int(np.random.normal(50,12)))
-        traffic_level = random.choice(["low","medium","high"])
-        time_min = int(route_distance/max(10,avg_speed)*60*(1 + (0.2 if traffic_level=="high" else 0.05 if traffic_level=="medium" else 0)))
-        veh = random.choice(vehicle_models)
-        style = random.choices(["Eco","Normal","Aggressive"], weights=[0.25,0.6,0.15])[0]
-        weather = random.choice(weathers)
-        style_mult = {"Eco":0.9,"Normal":1.0,"Aggressive":1.3}[style]
-        weather_mult = {"sunny":1.0,"cloudy":1.01,"light_rain":1.03,"heavy_rain":1.08,"monsoon":1.12}[weather]
-        energy_est = route_distance*veh["eff_kwh_per_km"]*style_mult*weather_mult
-        routes.append({
-            "route_label": r, "route_distance_km": route_distance, "avg_speed_kmh": avg_speed,
-            "traffic_level": traffic_level, "estimated_time_min": time_min,
-            "estimated_energy_kWh": round(energy_est,3), "driving_style": style,
-            "vehicle_model": veh["model"], "weather": weather
-        })
-    best = min(routes, key=lambda x: 0.7*x["estimated_energy_kWh"] + 0.3*(x["estimated_time_min"]/60.0))
-    for r in routes:
-        route_rows.append({
-            "origin": origin, "destination": dest, "route_id": f"{origin}_{dest}_{r['route_label']}",
-            **r, "is_optimal": int(r["route_label"]==best["route_label"])
-        })
-route_df = pd.DataFrame(route_rows)
-route_df.to_csv(mkpath("optimal_route_dataset_srilanka.csv"), index=False)
-
-# Charging stations master CSV
-charging_stations_df.to_csv(mkpath("charging_stations_master_srilanka.csv"), index=False)
-
-print("Datasets generated in ./datasets folder!")
+    return {"route": route}
+
+# -----------------------------
+# Orchestration
+
+def _run_task(task: tuple) -> Dict[str, str]:
+    kind, args = task
+    if kind == "trips":
+        return generate_trip_chunk(*args)
+    return generate_route_chunk(*args)
+
+
+def _tasks(config: Dict[str, Any], stations: pd.DataFrame, reference: np.datetime64) -> List[tuple]:
+    seed, chunk_size = config["seed"], config["chunk_size"]
+    tasks = []
+    for chunk, start in enumerate(range(0, config["trips"], chunk_size)):
+        n = min(chunk_size, config["trips"] - start)
+        tasks.append(("trips", (seed, chunk, start, n, stations, reference)))
+    for chunk, start in enumerate(range(0, config["routes"], chunk_size)):
+        n = min(chunk_size, config["routes"] - start)
+        tasks.append(("routes", (seed, chunk, n)))
+    return tasks
+
+
+def generate(
+    trips: int = 50000,
+    routes: int = 1000,
+    seed: int = 42,
+    chunk_size: int = 100000,
+    workers: Optional[int] = None,
+    out_dir: Optional[str] = None,
+    reference_date: Optional[str] = None,
+) -> Dict[str, str]:
+    """Generate every dataset and return {dataset: csv path}.
+
+    Chunks are produced by a process pool and written in chunk order as they
+    complete; at most two chunks per worker are held in memory at a time.
+    """
+    reference = np.datetime64(reference_date or datetime.now().strftime("%Y-%m-%dT%H:%M:%S"), "s")
+    workers = max(1, workers or os.cpu_count() or 1)
+    stations = generate_stations(seed)
+    tasks = _tasks({"trips": trips, "routes": routes, "seed": seed, "chunk_size": chunk_size}, stations, reference)
+
+    paths = {name: mkpath(filename, out_dir) for name, filename in OUTPUT_FILES.items()}
+    files = {name: open(path, "w", newline="") for name, path in paths.items()}
+    try:
+        for name, f in files.items():
+            f.write(",".join(HEADERS[name]) + "\n")
+
+        def write(parts: Dict[str, str]) -> None:
+            for name, text in parts.items():
+                files[name].write(text)
+
+        if workers == 1:
+            for task in tasks:
+                write(_run_task(task))
+        else:
+            window = deque()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for task in tasks:
+                    window.append(pool.submit(_run_task, task))
+                    if len(window) >= workers * 2:
+                        write(window.popleft().result())
+                while window:
+                    write(window.popleft().result())
+    finally:
+        for f in files.values():
+            f.close()
+
+    # Charging stations master CSV
+    paths["stations"] = mkpath("charging_stations_master_srilanka.csv", out_dir)
+    stations.to_csv(paths["stations"], index=False)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--trips", type=int, default=50000, help="Number of synthetic trips")
+    parser.add_argument("--routes", type=int, default=1000, help="Number of origin-destination route groups")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows generated per task")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--out", default=None, help="Output directory (default: backend/data)")
+    parser.add_argument("--reference-date", default=None, help="Anchor for trip_date, e.g. 2025-10-01T12:00:00")
+    args = parser.parse_args(argv)
+
+    paths = generate(args.trips, args.routes, args.seed, args.chunk_size, args.workers, args.out, args.reference_date)
+    print(f"Datasets generated in {os.path.dirname(os.path.abspath(paths['driving']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Gunicorn Configuration
+Pre-fork production server for wsgi:app, configured from the environment
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+wsgi_app = "wsgi:app"
+
+bind = os.getenv("BIND", f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}")
+
+# Import the app (and warm every model) once in the master before forking.
+# GUNICORN_PRELOAD=0 instead has each worker import the app itself, bind
+# straight away and warm its models in the background: faster to come up,
+# but the models are no longer shared between workers
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+if not preload_app:
+    os.environ.setdefault("WARMUP_BACKGROUND", "1")
+
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(2 * multiprocessing.cpu_count() + 1, 8))))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# State the workers share through directories: each worker's metrics, so
+# whichever worker answers /metrics reports the whole server, and open
+# telemetry trips, whose uploads land on any worker. Directories created
+# here are removed on exit; set METRICS_MULTIPROC_DIR (cleared on start) or
+# TELEMETRY_DIR (kept, so open trips survive a restart) to use your own
+_own_dirs = []
+for _variable, _prefix in (("METRICS_MULTIPROC_DIR", "ev-metrics-"), ("TELEMETRY_DIR", "ev-telemetry-")):
+    if not os.getenv(_variable):
+        os.environ[_variable] = tempfile.mkdtemp(prefix=_prefix)
+        _own_dirs.append(os.environ[_variable])
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers after this many requests (0 disables)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    from services.metrics import clear_snapshots
+
+    clear_snapshots(os.environ["METRICS_MULTIPROC_DIR"])
+
+
+def when_ready(server):
+    """Publish what the master counted while preloading (model loads)."""
+    from services.metrics import write_snapshot
+
+    write_snapshot()
+
+
+def post_fork(server, worker):
+    """Per-worker setup: threads and sockets do not carry over from the master."""
+    from controllers.external_api_controller import reset_weather_client, start_weather_refresher
+    from services.metrics import REGISTRY, start_metrics_writer
+
+    # The master's counts are already in its own snapshot
+    REGISTRY.reset()
+    start_metrics_writer()
+    reset_weather_client()
+    if os.getenv("WEATHER_PREFETCH", "1") == "1":
+        start_weather_refresher()
+    if os.getenv("MODEL_WATCH", "1") == "1":
+        from services.model_manager import start_model_manager
+
+        start_model_manager()
+
+
+def worker_exit(server, worker):
+    from services.metrics import write_snapshot
+
+    write_snapshot()
+
+
+def child_exit(server, worker):
+    """Keep an exited worker's counters in the totals, and drop its gauges."""
+    from services.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    for directory in _own_dirs:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,42 @@
+"""
+Shared helpers for the /predict-batch routes
+"""
+
+import os
+from typing import Any, List, Optional, Tuple
+
+from flask import jsonify
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+
+def parse_batch_body(body: Any) -> Tuple[Optional[List[Any]], Optional[Tuple[Any, int]]]:
+    """Extract the record list from a batch request body.
+
+    Accepts either a bare JSON array or an object with a "records" array.
+    Returns (records, None) on success or (None, error_response).
+    """
+    if isinstance(body, dict):
+        body = body.get("records")
+
+    if not isinstance(body, list):
+        return None, (jsonify({"error": "Request body must be a JSON array or an object with a 'records' array"}), 400)
+
+    if len(body) > MAX_BATCH_SIZE:
+        return None, (jsonify({
+            "error": f"Batch too large: {len(body)} records (max {MAX_BATCH_SIZE})"
+        }), 413)
+
+    return body, None
+
+
+def batch_response(results: List[Any]):
+    """Wrap per-record results in the batch response envelope."""
+    succeeded = sum(1 for r in results if r.get("success"))
+    return jsonify({
+        "success": True,
+        "count": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }), 200
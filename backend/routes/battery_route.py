@@ -3,7 +3,7 @@ Battery Range API Routes
 """
 
 from flask import Blueprint, jsonify, request
-from controllers.battery_range_controller import predict_battery_range
+from routes.batch_utils import parse_batch_body, batch_response
 
 battery_bp = Blueprint("battery", __name__)
 
@@ -19,6 +19,7 @@ def predict_range():
         "efficiency_kWh_per_km": 0.171
     }
     """
+    from controllers.battery_range_controller import predict_battery_range
     body = request.get_json(silent=True)
     
     if not body:
@@ -45,3 +46,50 @@ def predict_range():
         return jsonify(result), 200
     else:
         return jsonify(result), 400
+
+@battery_bp.route("/predict-batch", methods=["POST"])
+def predict_range_batch():
+    """
+    Predict battery range for many battery states in one model call
+    
+    Expects a JSON array (or {"records": [...]}) of objects with the same
+    fields as /predict. Results keep the input order; invalid records are
+    reported per row with "success": false.
+    """
+    from controllers.battery_range_controller import predict_battery_range_batch
+    records, error = parse_batch_body(request.get_json(silent=True))
+    if error:
+        return error
+    
+    return batch_response(predict_battery_range_batch(records))
+
+@battery_bp.route("/sweep", methods=["POST"])
+def sweep_range():
+    """
+    Predict battery range over a grid of battery states in one model call
+    
+    Expects JSON body with, for each field, a fixed value, a list of values
+    or a range:
+    {
+        "battery_capacity_kWh": 50.3,
+        "battery_percent": {"min": 10, "max": 100, "step": 5},
+        "efficiency_kWh_per_km": {"min": 0.12, "max": 0.22, "steps": 11}
+    }
+    
+    The grid (capped at MAX_SWEEP_POINTS) is returned as flat arrays in
+    row-major order over "shape", efficiency varying fastest.
+    """
+    from controllers.battery_range_controller import sweep_battery_range
+    body = request.get_json(silent=True)
+    
+    if not body or not isinstance(body, dict):
+        return jsonify({"error": "Request body must be valid JSON"}), 400
+    
+    result = sweep_battery_range(body)
+    
+    if result.get("success"):
+        return jsonify(result), 200
+    elif result.get("max_points"):
+        return jsonify(result), 413
+    else:
+        return jsonify(result), 400
@@ -0,0 +1,58 @@
+"""
+Charging Station API Routes
+"""
+
+from flask import Blueprint, jsonify, request
+
+charging_bp = Blueprint("charging", __name__)
+
+@charging_bp.route("/recommend", methods=["POST"])
+def recommend_stations():
+    """
+    Rank charging stations along a route or near a point
+    
+    Expects JSON body with:
+    {
+        "route": ["Colombo", "Kurunegala", "Jaffna"],  // Optional - cities on the trip
+        "origin": "Colombo",  // Optional - added to the route cities
+        "destination": "Jaffna",  // Optional - added to the route cities
+        "lat": 6.9271,  // Optional - search around a point
+        "lon": 79.8612,  // Optional
+        "radius_km": 50,  // Optional - default 50
+        "charger_type": "DC_50kW",  // Optional - string or list
+        "dc_only": false,  // Optional
+        "operational_only": true,  // Optional
+        "limit": 3  // Optional - default 3
+    }
+    """
+    from controllers.charging_controller import recommend_stations_controller
+    body = request.get_json(silent=True)
+    
+    if not body:
+        return jsonify({"error": "Request body must be valid JSON"}), 400
+    
+    result = recommend_stations_controller(body)
+    
+    if result.get("success"):
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
+
+@charging_bp.route("/stations", methods=["GET"])
+def list_stations():
+    """
+    List charging stations
+    
+    Query parameters: city, charger_type, operational (true/false or 1/0), all optional
+    """
+    from controllers.charging_controller import list_stations_controller
+    result = list_stations_controller(
+        city=request.args.get("city"),
+        charger_type=request.args.get("charger_type"),
+        operational=request.args.get("operational"),
+    )
+    
+    if result.get("success"):
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
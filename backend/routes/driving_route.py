@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, request
 
-from controllers.driving_script_controller import demo_driving_controller, predict_driving_style_controller
+from routes.batch_utils import parse_batch_body, batch_response
 
 
 # Blueprint for driving-related endpoints
@@ -9,6 +9,7 @@ driving_bp = Blueprint("driving", __name__)
 
 @driving_bp.route("/demo", methods=["GET"])
 def demo():
+	from controllers.driving_script_controller import demo_driving_controller
 	data = demo_driving_controller()
 	return jsonify(data), 200
 
@@ -34,6 +35,7 @@ def predict_driving_style():
 		"time_of_day": "evening"
 	}
 	"""
+	from controllers.driving_script_controller import predict_driving_style_controller
 	body = request.get_json(silent=True)
 	
 	if not body:
@@ -46,3 +48,80 @@ def predict_driving_style():
 	else:
 		return jsonify(result), 400
 
+
+@driving_bp.route("/predict-batch", methods=["POST"])
+def predict_driving_style_batch_route():
+	"""Predict driving styles for many trips in one model call.
+	
+	Expects a JSON array (or {"records": [...]}) of objects with the same
+	features as /predict. Results keep the input order; invalid records are
+	reported per row with "success": false.
+	"""
+	from controllers.driving_script_controller import predict_driving_style_batch
+	records, error = parse_batch_body(request.get_json(silent=True))
+	if error:
+		return error
+	
+	return batch_response(predict_driving_style_batch(records))
+
+
+@driving_bp.route("/telemetry", methods=["GET"])
+def telemetry_stats_route():
+	"""Counts of open, ended and expired telemetry trips."""
+	from controllers.telemetry_controller import telemetry_stats
+	return jsonify(telemetry_stats()), 200
+
+
+@driving_bp.route("/telemetry/<trip_id>", methods=["POST"])
+def ingest_telemetry_route(trip_id):
+	"""Upload raw samples for a trip in progress.
+	
+	Expects {"samples": [...]} with one {"t", "speed", "accel", "elevation"}
+	object per sample, or the same fields as arrays:
+	{
+		"samples": {
+			"t": [0.0, 0.1, 0.2],
+			"speed": [42.0, 42.3, 42.5],
+			"accel": [0.8, 0.7, -0.2]
+		}
+	}
+	Either form may also be sent as the whole body, without "samples".
+	t is the sample time in seconds (required; samples not later than the
+	last one received are skipped, so a retried upload is not counted
+	twice), speed in km/h, accel in m/s^2 and elevation in m (optional).
+	The first upload starts the trip.
+	"""
+	from controllers.telemetry_controller import ingest_telemetry
+	body = request.get_json(silent=True)
+	
+	if body is None:
+		return jsonify({"error": "Request body must be valid JSON"}), 400
+	
+	result, status = ingest_telemetry(trip_id, body)
+	return jsonify(result), status
+
+
+@driving_bp.route("/telemetry/<trip_id>", methods=["GET"])
+def trip_telemetry_route(trip_id):
+	"""Sample counts and driving style features of an open trip so far."""
+	from controllers.telemetry_controller import trip_telemetry
+	result, status = trip_telemetry(trip_id)
+	return jsonify(result), status
+
+
+@driving_bp.route("/telemetry/<trip_id>/end", methods=["POST"])
+def end_trip_route(trip_id):
+	"""End a trip and predict its driving style from the aggregated samples.
+	
+	Optional JSON body with the trip context:
+	{
+		"vehicle_make": "MG",
+		"vehicle_model": "ZS EV",
+		"road_type": "city",
+		"weather": "clear",
+		"time_of_day": "evening"
+	}
+	"""
+	from controllers.telemetry_controller import end_trip
+	result, status = end_trip(trip_id, request.get_json(silent=True))
+	return jsonify(result), status
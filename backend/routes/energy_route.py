@@ -3,7 +3,7 @@ Energy Consumption API Routes
 """
 
 from flask import Blueprint, jsonify, request
-from controllers.energy_controller import predict_energy_consumption
+from routes.batch_utils import parse_batch_body, batch_response
 
 energy_bp = Blueprint("energy", __name__)
 
@@ -27,6 +27,7 @@ def predict_energy():
     - road_type: "city", "highway", "rural", "coastal"
     - weather: "sunny", "clear", "light_rain", "heavy_rain", "monsoon", "cloudy"
     """
+    from controllers.energy_controller import predict_energy_consumption
     body = request.get_json(silent=True)
     
     if not body:
@@ -60,3 +61,19 @@ def predict_energy():
         return jsonify(result), 200
     else:
         return jsonify(result), 400
+
+@energy_bp.route("/predict-batch", methods=["POST"])
+def predict_energy_batch():
+    """
+    Predict energy consumption for many trips in one model call
+    
+    Expects a JSON array (or {"records": [...]}) of objects with the same
+    fields as /predict. Results keep the input order; invalid records are
+    reported per row with "success": false.
+    """
+    from controllers.energy_controller import predict_energy_consumption_batch
+    records, error = parse_batch_body(request.get_json(silent=True))
+    if error:
+        return error
+    
+    return batch_response(predict_energy_consumption_batch(records))
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, request
 
-from controllers.optimal_path_controller import predict_optimal_path_controller
+from routes.batch_utils import MAX_BATCH_SIZE, parse_batch_body, batch_response
 
 
 optimal_path_bp = Blueprint("optimal_path", __name__)
@@ -30,6 +30,7 @@ def predict_travel_time():
     - driving_style: "Eco", "Normal", "Aggressive"
     - weather: "sunny", "cloudy", "light_rain", "heavy_rain", "monsoon"
     """
+    from controllers.optimal_path_controller import predict_optimal_path_controller
     body = request.get_json(silent=True)
     
     if not body:
@@ -71,3 +72,69 @@ def predict_travel_time():
         return jsonify(result), 200
     else:
         return jsonify(result), 400
+
+
+@optimal_path_bp.route("/predict-batch", methods=["POST"])
+def predict_travel_time_batch():
+    """Predict travel times for many routes in one model call.
+    
+    Expects a JSON array (or {"records": [...]}) of objects with the same
+    fields as /predict. Weather is fetched once per distinct lat/lon pair.
+    Results keep the input order; invalid records are reported per row
+    with "success": false.
+    """
+    from controllers.optimal_path_controller import predict_optimal_path_batch
+    records, error = parse_batch_body(request.get_json(silent=True))
+    if error:
+        return error
+    
+    return batch_response(predict_optimal_path_batch(records))
+
+
+@optimal_path_bp.route("/rank", methods=["POST"])
+def rank_routes():
+    """Rank candidate routes for one trip with a single model call.
+    
+    Expects JSON body with:
+    {
+        "driving_style": "Normal",
+        "predicted_range_km": 200.0,
+        "battery_remaining_percent": 80.0,
+        "road_type": "city",  // Optional - default for every route
+        "traffic_level": "medium",  // Optional - default for every route
+        "lat": 6.9271,  // Optional - weather is looked up once
+        "lon": 79.8612,  // Optional
+        "weather": "sunny",  // Optional - overrides weather API
+        "routes": [
+            {"route_id": "A", "distance_km": 52, "predicted_energy_kWh": 8.1, "traffic_level": "high"},
+            {"route_id": "B", "distance_km": 61, "predicted_energy_kWh": 9.4, "road_type": "highway"}
+        ]
+    }
+    
+    Routes are ranked by 0.7 * energy_kWh + 0.3 * time_hours, lowest first.
+    """
+    from controllers.optimal_path_controller import rank_routes_controller
+    body = request.get_json(silent=True)
+    
+    if not body or not isinstance(body, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    
+    routes = body.get("routes")
+    if not isinstance(routes, list) or not routes:
+        return jsonify({"error": "'routes' must be a non-empty array"}), 400
+    if len(routes) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Too many routes: {len(routes)} (max {MAX_BATCH_SIZE})"}), 413
+    
+    shared = {key: value for key, value in body.items() if key not in ("routes", "lat", "lon", "weather")}
+    result = rank_routes_controller(
+        routes,
+        shared,
+        lat=body.get("lat"),
+        lon=body.get("lon"),
+        weather=body.get("weather"),
+    )
+    
+    if result.get("success"):
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
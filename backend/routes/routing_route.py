@@ -0,0 +1,62 @@
+"""
+Routing API Routes
+"""
+
+from flask import Blueprint, jsonify, request
+
+routing_bp = Blueprint("routing", __name__)
+
+@routing_bp.route("/route", methods=["POST"])
+def find_route():
+    """
+    Find the minimum-energy or minimum-time route between two cities
+    
+    Expects JSON body with:
+    {
+        "origin": "Colombo",
+        "destination": "Jaffna",
+        "objective": "energy",  // Optional - "energy" (default) or "time"
+        "battery_capacity_kWh": 50,  // Optional battery constraint
+        "battery_percent": 80,  // Optional battery constraint
+        "available_energy_kWh": 30,  // Optional - overrides capacity/percent
+        "reserve_percent": 10  // Optional - battery percent to keep in reserve
+    }
+    """
+    from controllers.routing_controller import find_route_controller
+    body = request.get_json(silent=True)
+    
+    if not body:
+        return jsonify({"error": "Request body must be valid JSON"}), 400
+    
+    missing = [field for field in ("origin", "destination") if field not in body]
+    if missing:
+        return jsonify({
+            "error": f"Missing required fields: {', '.join(missing)}",
+            "required_fields": ["origin", "destination"]
+        }), 400
+    
+    result = find_route_controller(
+        origin=body["origin"],
+        destination=body["destination"],
+        objective=body.get("objective", "energy"),
+        battery_capacity_kWh=body.get("battery_capacity_kWh"),
+        battery_percent=body.get("battery_percent"),
+        available_energy_kWh=body.get("available_energy_kWh"),
+        reserve_percent=body.get("reserve_percent", 0),
+    )
+    
+    if result.get("success"):
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
+
+@routing_bp.route("/cities", methods=["GET"])
+def route_cities():
+    """List the cities the routing graph covers"""
+    from controllers.routing_controller import route_cities_controller
+    result = route_cities_controller()
+    
+    if result.get("success"):
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
@@ -0,0 +1,40 @@
+"""
+Streaming Bulk Scoring API Routes
+"""
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from routes.batch_utils import MAX_BATCH_SIZE
+
+stream_bp = Blueprint("stream", __name__)
+
+@stream_bp.route("/<model>", methods=["POST"])
+def score(model):
+    """
+    Score an NDJSON upload with one model, streaming NDJSON results back
+
+    model is one of: energy, battery, driving. The body has one JSON object
+    per line with the same fields as that model's /predict endpoint; it may
+    be sent with chunked transfer encoding. Optional query parameter
+    batch_size sets the micro-batch size (default STREAM_BATCH_SIZE).
+
+    Each output line is {"line": n, ...result}, and the last line is
+    {"done": true, "count": ..., "succeeded": ..., "failed": ...}.
+    """
+    from controllers.stream_controller import STREAM_BATCH_SIZE, STREAM_MODELS, score_stream
+    if model not in STREAM_MODELS:
+        return jsonify({
+            "error": f"Unknown model: {model}",
+            "models": sorted(STREAM_MODELS),
+        }), 404
+
+    batch_size = request.args.get("batch_size", STREAM_BATCH_SIZE, type=int)
+    if not batch_size or batch_size < 1:
+        return jsonify({"error": "batch_size must be a positive integer"}), 400
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+
+    # The generator pulls input only when the server asks for more output,
+    # so a slow reader throttles how fast the upload is consumed
+    return Response(
+        stream_with_context(score_stream(request.stream, model, batch_size)),
+        mimetype="application/x-ndjson",
+    )
@@ -0,0 +1,40 @@
+"""
+Trip Planning API Routes
+"""
+
+from flask import Blueprint, jsonify, request
+
+trip_bp = Blueprint("trip", __name__)
+
+@trip_bp.route("/plan", methods=["POST"])
+def plan_trip():
+    """
+    Run the full driving -> energy -> battery -> optimal path chain in one call
+    
+    Expects JSON body with:
+    {
+        "distance_km": 50.0,
+        "battery_capacity_kWh": 50.3,
+        "battery_percent": 80,
+        "road_type": "city",  // Optional
+        "traffic_level": "medium",  // Optional
+        "weather": "sunny",  // Optional - otherwise looked up from lat/lon
+        "lat": 6.9271,  // Optional
+        "lon": 79.8612,  // Optional
+        "avg_speed": 60,  // Optional driving features, see /api/driving/predict
+        "driving_weather": "clear",  // Optional - weather for the driving style model
+        "driving_style": "Normal"  // Optional - skips the driving style model
+    }
+    """
+    from controllers.trip_plan_controller import plan_trip_controller
+    body = request.get_json(silent=True)
+    
+    if not body:
+        return jsonify({"error": "Request body must be valid JSON"}), 400
+    
+    result = plan_trip_controller(body)
+    
+    if result.get("success"):
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
@@ -0,0 +1,327 @@
+"""
+Score a trips CSV or Parquet file offline through the full model chain
+
+Runs driving style -> energy -> battery range -> optimal path on each chunk
+of the input in a process pool whose workers load the models once. Each
+finished chunk is written to <output>.parts/ straight away, and the parts
+are merged into the output at the end, so an interrupted run picks up
+after the last completed chunk when started again with the same arguments.
+
+Input columns are the /api/trip/plan fields: distance_km,
+battery_capacity_kWh and battery_percent (or battery_start_%) are required;
+driving_style skips the driving style model for that trip. Weather comes
+from the weather column (default sunny); lat/lon lookups are only made
+with --live-weather. A row with a missing or non-numeric required value, or
+a battery capacity of 0, is written out with failed_stage "input" and does
+not affect the rest of its chunk.
+
+Run from the backend directory:
+    python score_trips.py data/energy_consumption_dataset_srilanka.csv scored.csv
+    python score_trips.py trips.parquet scored.parquet --chunk-size 20000 --workers 4
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Every row is a new trip; the prediction caches would only add overhead
+os.environ.setdefault("PREDICTION_CACHE_ENABLED", "0")
+
+import numpy as np
+import pandas as pd
+
+from controllers.trip_plan_controller import plan_trips_batch
+
+# Bump when the part file layout changes so older partial runs are discarded
+PARTS_FORMAT_VERSION = 1
+
+COLUMN_ALIASES = {"battery_start_%": "battery_percent"}
+
+SUMMARY_COLUMNS = [
+    "driving_style", "predicted_energy_kWh", "efficiency_kWh_per_km", "predicted_range_km",
+    "predicted_travel_time_min", "battery_used_percent", "battery_remaining_percent", "can_complete_trip",
+]
+
+
+# -----------------------------
+# Input
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet files need pyarrow: pip install pyarrow")
+    return pq
+
+
+def count_rows(path: str) -> int:
+    """Number of data rows, read from Parquet metadata or by counting lines."""
+    if _is_parquet(path):
+        return _parquet().ParquetFile(path).metadata.num_rows
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(0, lines - 1)
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    if _is_parquet(path):
+        for batch in _parquet().ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+# -----------------------------
+# Scoring (runs in the worker processes)
+
+def _init_worker() -> None:
+    """Load every model once per worker, before its first chunk."""
+    from controllers.warmup_controller import warm_up_models
+    warm_up_models()
+
+
+def _records(chunk: pd.DataFrame, live_weather: bool) -> List[Dict[str, Any]]:
+    chunk = chunk.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if v not in chunk.columns})
+    if not live_weather:
+        chunk = chunk.drop(columns=[c for c in ("lat", "lon") if c in chunk.columns])
+    # NaN cells count as missing, so model defaults apply
+    return [
+        {key: value for key, value in record.items() if not (isinstance(value, float) and np.isnan(value))}
+        for record in chunk.to_dict("records")
+    ]
+
+
+def score_chunk(chunk: pd.DataFrame, offset: int, id_column: Optional[str], live_weather: bool) -> pd.DataFrame:
+    """Score one chunk and return one output row per input row."""
+    results = plan_trips_batch(_records(chunk, live_weather))
+    out = pd.DataFrame({"row": np.arange(offset, offset + len(chunk))})
+    if id_column and id_column in chunk.columns:
+        out[id_column] = chunk[id_column].to_numpy()
+    out["success"] = [r["success"] for r in results]
+    out["failed_stage"] = [r.get("failed_stage") for r in results]
+    out["error"] = [r.get("error") for r in results]
+    for column in SUMMARY_COLUMNS:
+        out[column] = [r["summary"][column] if r["success"] else None for r in results]
+    return out
+
+
+def _part_path(parts_dir: str, index: int) -> str:
+    return os.path.join(parts_dir, f"part_{index:06d}.csv")
+
+
+def _score_task(task: Tuple[int, int, pd.DataFrame, Optional[str], bool, str]) -> Tuple[int, int, int]:
+    """Score a chunk and write its part file atomically; return (index, rows, succeeded)."""
+    index, offset, chunk, id_column, live_weather, parts_dir = task
+    scored = score_chunk(chunk, offset, id_column, live_weather)
+    path = _part_path(parts_dir, index)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    scored.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return index, len(scored), int(scored["success"].sum())
+
+
+# -----------------------------
+# Resume state and output
+
+def _run_signature(input_path: str, chunk_size: int, id_column: Optional[str], live_weather: bool) -> Dict[str, Any]:
+    stat = os.stat(input_path)
+    return {
+        "format_version": PARTS_FORMAT_VERSION,
+        "input": os.path.abspath(input_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "chunk_size": chunk_size,
+        "id_column": id_column,
+        "live_weather": live_weather,
+    }
+
+
+def prepare_parts(parts_dir: str, signature: Dict[str, Any]) -> Set[int]:
+    """Return the indexes of chunks a previous identical run finished.
+
+    Parts from a run with different input or settings are discarded.
+    """
+    manifest = os.path.join(parts_dir, "manifest.json")
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            if json.load(f) == signature:
+                return {
+                    int(entry[5:11]) for entry in os.listdir(parts_dir)
+                    if entry.startswith("part_") and entry.endswith(".csv")
+                }
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir)
+    with open(manifest, "w") as f:
+        json.dump(signature, f)
+    return set()
+
+
+# Text columns that may be entirely empty in a chunk; typed explicitly so
+# every Parquet row group gets the same schema
+TEXT_COLUMNS = ["failed_stage", "error", "driving_style"]
+
+
+def merge_parts(parts_dir: str, n_chunks: int, output_path: str, id_column: Optional[str] = None) -> None:
+    """Concatenate the part files in chunk order into the output file."""
+    tmp = f"{output_path}.tmp"
+    paths = [_part_path(parts_dir, index) for index in range(n_chunks)]
+    if _is_parquet(output_path):
+        pq = _parquet()
+        import pyarrow as pa
+        writer = None
+        try:
+            for path in paths:
+                text = [c for c in TEXT_COLUMNS + [id_column] if c]
+                part = pd.read_csv(path, dtype={c: "string" for c in text})
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(tmp, "wb") as out:
+            for n, path in enumerate(paths):
+                with open(path, "rb") as part:
+                    if n:
+                        part.readline()  # header
+                    shutil.copyfileobj(part, out)
+    os.replace(tmp, output_path)
+
+
+# -----------------------------
+# Driver
+
+class Progress:
+    def __init__(self, total_rows: int, quiet: bool = False):
+        self.total_rows = total_rows
+        self.quiet = quiet
+        self.rows = 0
+        self.scored_rows = 0
+        self.succeeded = 0
+        self.started = time.perf_counter()
+
+    def update(self, rows: int, succeeded: int, resumed: bool = False) -> None:
+        self.rows += rows
+        if not resumed:
+            self.scored_rows += rows
+            self.succeeded += succeeded
+        if self.quiet:
+            return
+        elapsed = time.perf_counter() - self.started
+        rate = self.scored_rows / elapsed if elapsed > 0 else 0.0
+        percent = 100.0 * self.rows / self.total_rows if self.total_rows else 100.0
+        eta = (self.total_rows - self.rows) / rate if rate > 0 else 0.0
+        print(f"\r{self.rows:>10,}/{self.total_rows:,} rows ({percent:5.1f}%)  "
+              f"{rate:>9,.0f} rows/s  eta {eta:>5.0f}s", end="", file=sys.stderr, flush=True)
+
+    def finish(self) -> Dict[str, Any]:
+        if not self.quiet:
+            print(file=sys.stderr)
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "scored_rows": self.scored_rows,
+            "succeeded": self.succeeded,
+            "seconds": round(elapsed, 2),
+            "rows_per_second": round(self.scored_rows / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    chunk_size: int = 10000,
+    workers: Optional[int] = None,
+    id_column: Optional[str] = "trip_id",
+    live_weather: bool = False,
+    quiet: bool = False,
+) -> Dict[str, Any]:
+    """Score input_path into output_path, resuming a previous partial run.
+
+    At most two chunks per worker are in flight, so memory stays bounded by
+    the chunk size rather than the input size.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    parts_dir = f"{output_path}.parts"
+    done = prepare_parts(parts_dir, _run_signature(input_path, chunk_size, id_column, live_weather))
+    progress = Progress(count_rows(input_path), quiet)
+
+    seen = {"chunks": 0}
+
+    def tasks() -> Iterator[Tuple[int, int, pd.DataFrame, Optional[str], bool, str]]:
+        offset = 0
+        for index, chunk in enumerate(read_chunks(input_path, chunk_size)):
+            seen["chunks"] = index + 1
+            if index in done:
+                progress.update(len(chunk), 0, resumed=True)
+            else:
+                yield index, offset, chunk, id_column, live_weather, parts_dir
+            offset += len(chunk)
+
+    if workers == 1:
+        _init_worker()
+        for task in tasks():
+            _, rows, succeeded = _score_task(task)
+            progress.update(rows, succeeded)
+    else:
+        window = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for task in tasks():
+                window.append(pool.submit(_score_task, task))
+                if len(window) >= workers * 2:
+                    progress.update(*window.popleft().result()[1:])
+            while window:
+                progress.update(*window.popleft().result()[1:])
+
+    merge_parts(parts_dir, seen["chunks"], output_path, id_column)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+
+    summary = progress.finish()
+    summary.update({"output": output_path, "chunks": seen["chunks"], "resumed_chunks": len(done)})
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="Trips CSV or Parquet file")
+    parser.add_argument("output", help="Output CSV or Parquet file")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows scored per task")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--id-column", default="trip_id", help="Input column copied to the output (default: trip_id)")
+    parser.add_argument("--live-weather", action="store_true", help="Look up weather for rows with lat/lon")
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary = score_file(
+        args.input, args.output, args.chunk_size, args.workers, args.id_column, args.live_weather, args.quiet
+    )
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        resumed = f", {summary['resumed_chunks']} resumed" if summary["resumed_chunks"] else ""
+        print(f"Scored {summary['scored_rows']:,} rows ({summary['succeeded']:,} succeeded) in "
+              f"{summary['chunks']} chunks{resumed} -> {summary['output']}")
+        print(f"Done in {summary['seconds']:.1f}s ({summary['rows_per_second'] or 0:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
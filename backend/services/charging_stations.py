@@ -0,0 +1,205 @@
+"""
+Charging Stations
+Loads the charging station master CSV once into in-memory indexes by id,
+city, charger type and operational status, plus a latitude-sorted city index
+"""
+
+import bisect
+import csv
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from services.cities import CHARGING_STATIONS_PATH, CITY_COORDINATES
+
+# Scoring from the charging recommender dataset (genarated_scripts/script.py):
+# score = distance * power_factor / (availability + 0.001) + avg_wait_min * 0.1
+# Lower is better.
+DC_POWER_FACTOR = 0.8
+AC_POWER_FACTOR = 1.0
+OPERATIONAL_AVAILABILITY = 1.0
+OFFLINE_AVAILABILITY = 0.01
+WAIT_WEIGHT = 0.1
+
+# Stations have no coordinates of their own; a station in a city on the route
+# is treated as this far off the route, as in the generated dataset
+ROUTE_CITY_DISTANCE_KM = 5.0
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.2
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _parse_bool(value: str) -> bool:
+    return str(value).strip().lower() in ("true", "1", "yes")
+
+
+class StationIndex:
+    """Charging stations held as parallel lists with lookup indexes.
+
+    Every index maps a key to the sorted positions of its stations, so
+    filtering by city, charger type or status is a dict lookup instead of a
+    scan. The static part of each station's score (power factor over
+    availability, and the wait term) is computed once at load.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, str]]):
+        self.station_id: List[str] = []
+        self.name: List[str] = []
+        self.city: List[str] = []
+        self.charger_type: List[str] = []
+        self.num_ports: List[int] = []
+        self.avg_wait_min: List[float] = []
+        self.operational: List[bool] = []
+
+        for row in rows:
+            self.station_id.append(row["station_id"])
+            self.name.append(row["name"])
+            self.city.append(row["city"])
+            self.charger_type.append(row["charger_type"])
+            self.num_ports.append(int(row["num_ports"]))
+            self.avg_wait_min.append(float(row["avg_wait_min"]))
+            self.operational.append(_parse_bool(row["operational"]))
+
+        self.by_id: Dict[str, int] = {sid: i for i, sid in enumerate(self.station_id)}
+        self.by_city = self._group(city.lower() for city in self.city)
+        self.by_type = self._group(ctype.upper() for ctype in self.charger_type)
+        self.by_status = self._group(self.operational)
+        self.city_names = {city.lower(): city for city in self.city}
+
+        self._distance_factor = [
+            (DC_POWER_FACTOR if ctype.upper().startswith("DC") else AC_POWER_FACTOR)
+            / ((OPERATIONAL_AVAILABILITY if up else OFFLINE_AVAILABILITY) + 0.001)
+            for ctype, up in zip(self.charger_type, self.operational)
+        ]
+        self._wait_term = [wait * WAIT_WEIGHT for wait in self.avg_wait_min]
+
+        # Station cities with known coordinates, sorted by latitude so a
+        # radius query only checks the cities inside the latitude band
+        located = sorted(
+            (CITY_COORDINATES[city][0], CITY_COORDINATES[city][1], city.lower())
+            for city in self.city_names.values() if city in CITY_COORDINATES
+        )
+        self._city_lats = [lat for lat, _, _ in located]
+        self._city_points = located
+
+    def __len__(self) -> int:
+        return len(self.station_id)
+
+    @staticmethod
+    def _group(keys: Iterable[Any]) -> Dict[Any, List[int]]:
+        groups: Dict[Any, List[int]] = {}
+        for i, key in enumerate(keys):
+            groups.setdefault(key, []).append(i)
+        return groups
+
+    def _allowed_types(self, charger_types: Optional[Sequence[str]], dc_only: bool) -> Optional[set]:
+        if not charger_types and not dc_only:
+            return None
+        types = {t.upper() for t in charger_types} if charger_types else set(self.by_type)
+        if dc_only:
+            types = {t for t in types if t.startswith("DC")}
+        return types
+
+    def cities_within(self, lat: float, lon: float, radius_km: float) -> Dict[str, float]:
+        """Station cities within radius_km of a point, with their distance."""
+        band = radius_km / KM_PER_DEGREE_LAT
+        lo = bisect.bisect_left(self._city_lats, lat - band)
+        hi = bisect.bisect_right(self._city_lats, lat + band)
+        found = {}
+        for city_lat, city_lon, key in self._city_points[lo:hi]:
+            distance = haversine_km(lat, lon, city_lat, city_lon)
+            if distance <= radius_km:
+                found[key] = distance
+        return found
+
+    def score(self, i: int, distance_km: float) -> float:
+        return distance_km * self._distance_factor[i] + self._wait_term[i]
+
+    def station(self, i: int) -> Dict[str, Any]:
+        return {
+            "station_id": self.station_id[i],
+            "name": self.name[i],
+            "city": self.city[i],
+            "charger_type": self.charger_type[i],
+            "num_ports": self.num_ports[i],
+            "avg_wait_min": self.avg_wait_min[i],
+            "operational": self.operational[i],
+        }
+
+    def find(
+        self,
+        city: Optional[str] = None,
+        charger_type: Optional[str] = None,
+        operational: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
+        """Stations matching every given filter."""
+        groups = []
+        if city is not None:
+            groups.append(self.by_city.get(city.strip().lower(), []))
+        if charger_type is not None:
+            groups.append(self.by_type.get(charger_type.strip().upper(), []))
+        if operational is not None:
+            groups.append(self.by_status.get(bool(operational), []))
+        if not groups:
+            return [self.station(i) for i in range(len(self))]
+
+        groups.sort(key=len)
+        matches = set(groups[0]).intersection(*groups[1:])
+        return [self.station(i) for i in sorted(matches)]
+
+    def recommend(
+        self,
+        cities: Optional[Sequence[str]] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        radius_km: float = 50.0,
+        charger_types: Optional[Sequence[str]] = None,
+        dc_only: bool = False,
+        operational_only: bool = False,
+        limit: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """Rank stations in the given route cities and/or near a point.
+
+        Stations in a route city are ROUTE_CITY_DISTANCE_KM off the route;
+        stations found by lat/lon are as far as their city centre. Unknown
+        cities are ignored. Returns up to limit stations, best first.
+        """
+        distances: Dict[str, float] = {}
+        for city in cities or []:
+            key = str(city).strip().lower()
+            if key in self.by_city:
+                distances[key] = ROUTE_CITY_DISTANCE_KM
+        if lat is not None and lon is not None:
+            for key, distance in self.cities_within(float(lat), float(lon), float(radius_km)).items():
+                distances[key] = min(distance, distances.get(key, distance))
+
+        allowed = self._allowed_types(charger_types, dc_only)
+        candidates = []
+        for key, distance in distances.items():
+            for i in self.by_city[key]:
+                if allowed is not None and self.charger_type[i].upper() not in allowed:
+                    continue
+                if operational_only and not self.operational[i]:
+                    continue
+                candidates.append((self.score(i, distance), i, distance))
+
+        ranked = []
+        for rank, (score, i, distance) in enumerate(heapq.nsmallest(max(0, int(limit)), candidates), start=1):
+            ranked.append({
+                **self.station(i),
+                "distance_from_route_km": round(distance, 2),
+                "score": round(score, 3),
+                "rank": rank,
+            })
+        return ranked
+
+
+def load_stations(path: str = CHARGING_STATIONS_PATH) -> StationIndex:
+    with open(path, newline="") as f:
+        return StationIndex(csv.DictReader(f))
@@ -0,0 +1,40 @@
+"""
+Sri Lankan city reference data shared by the weather, routing and
+charging station services
+"""
+
+import csv
+import os
+from typing import Dict, List, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+CHARGING_STATIONS_PATH = os.path.join(DATA_DIR, "charging_stations_master_srilanka.csv")
+
+# The ten cities the synthetic datasets are generated for (genarated_scripts/script.py)
+DATASET_CITIES = [
+    "Colombo", "Galle", "Kandy", "Matara", "Kurunegala",
+    "Anuradhapura", "Trincomalee", "Jaffna", "Batticaloa", "Ratnapura",
+]
+
+# City centre coordinates (lat, lon); matches SRI_LANKAN_CITIES in UI/js/constants.js
+CITY_COORDINATES: Dict[str, Tuple[float, float]] = {
+    "Colombo": (6.9271, 79.8612),
+    "Kandy": (7.2906, 80.6337),
+    "Galle": (6.0535, 80.2210),
+    "Jaffna": (9.6615, 80.0255),
+    "Negombo": (7.2008, 79.8358),
+    "Trincomalee": (8.5874, 81.2152),
+    "Batticaloa": (7.7310, 81.6747),
+    "Matara": (5.9549, 80.5550),
+    "Anuradhapura": (8.3114, 80.4037),
+    "Ratnapura": (6.6828, 80.4034),
+    "Kurunegala": (7.4863, 80.3647),
+}
+
+
+def charging_station_cities(path: str = CHARGING_STATIONS_PATH) -> List[str]:
+    """Return the distinct cities listed in the charging station master CSV."""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        return sorted({row["city"] for row in csv.DictReader(f) if row.get("city")})
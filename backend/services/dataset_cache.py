@@ -0,0 +1,170 @@
+"""
+Dataset Cache
+Converts each CSV once into a columnar directory of .npy files that are
+memory-mapped on load, with categorical and numeric dtypes narrowed
+"""
+
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.model_store import dataset_checksum
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BACKEND_DIR, ".cache", "datasets")
+
+# Bump when the on-disk layout changes so older caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+# Object columns with more distinct values than this (ids) stay strings
+MAX_CATEGORIES = 32767
+
+
+def _narrow_int(values: np.ndarray) -> np.ndarray:
+    if len(values) == 0:
+        return values.astype(np.int16)
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _encode_column(series: pd.Series) -> Dict[str, Any]:
+    """Pick the narrowest storage for one CSV column.
+
+    Returns {"kind", "values", and "categories" for categoricals}. Floats are
+    stored as float32 (tree models cast their inputs to float32 anyway),
+    integers as the smallest signed type that holds them and low-cardinality
+    strings as integer codes into a sorted category list, which matches
+    LabelEncoder's ordering.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return {"kind": "bool", "values": series.to_numpy(dtype=np.bool_)}
+    if pd.api.types.is_integer_dtype(series):
+        return {"kind": "int", "values": _narrow_int(series.to_numpy())}
+    if pd.api.types.is_float_dtype(series):
+        return {"kind": "float", "values": series.to_numpy(dtype=np.float32)}
+
+    strings = series.astype(str)
+    categories = np.sort(strings.unique())
+    if len(categories) <= MAX_CATEGORIES:
+        codes = np.searchsorted(categories, strings.to_numpy())
+        return {"kind": "category", "values": _narrow_int(codes), "categories": categories.tolist()}
+    return {"kind": "string", "values": strings.to_numpy(dtype=str)}
+
+
+def cache_dir(path: str, checksum: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-v{CACHE_FORMAT_VERSION}-{checksum[:16]}")
+
+
+def build_cache(path: str, checksum: Optional[str] = None) -> str:
+    """Convert a CSV into its columnar cache directory and return the path.
+
+    The directory is written under a temporary name and renamed into place,
+    and caches of older versions of the same CSV are removed.
+    """
+    checksum = checksum or dataset_checksum(path)
+    target = cache_dir(path, checksum)
+    if os.path.exists(os.path.join(target, "meta.json")):
+        return target
+
+    df = pd.read_csv(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        encoded = _encode_column(df[name])
+        filename = f"col_{i:03d}.npy"
+        np.save(os.path.join(tmp, filename), encoded["values"], allow_pickle=False)
+        columns.append({
+            "name": name,
+            "file": filename,
+            "kind": encoded["kind"],
+            "dtype": str(encoded["values"].dtype),
+            "categories": encoded.get("categories"),
+        })
+
+    meta = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source": os.path.basename(path),
+        "checksum": checksum,
+        "rows": int(len(df)),
+        "columns": columns,
+    }
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Another process finished the same cache first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    stem_prefix = os.path.basename(target).rsplit("-", 1)[0] + "-"
+    for entry in os.listdir(CACHE_DIR):
+        stale = os.path.join(CACHE_DIR, entry)
+        if entry.startswith(stem_prefix) and stale != target and not entry.endswith(".tmp"):
+            shutil.rmtree(stale, ignore_errors=True)
+    return target
+
+
+def read_meta(path: str, checksum: Optional[str] = None) -> Dict[str, Any]:
+    directory = build_cache(path, checksum)
+    with open(os.path.join(directory, "meta.json")) as f:
+        return json.load(f)
+
+
+def load_columns(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    checksum: Optional[str] = None,
+    decode: bool = True,
+) -> Dict[str, Any]:
+    """Memory-map the requested columns of a dataset.
+
+    Returns {column: array}. Numeric arrays are read-only memory maps.
+    Categoricals are pandas Categoricals when decode is true, otherwise
+    their raw integer codes.
+    """
+    checksum = checksum or dataset_checksum(path)
+    directory = build_cache(path, checksum)
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+
+    by_name = {column["name"]: column for column in meta["columns"]}
+    wanted: List[str] = list(columns) if columns is not None else [column["name"] for column in meta["columns"]]
+    missing = [name for name in wanted if name not in by_name]
+    if missing:
+        raise KeyError(f"Columns not in {meta['source']}: {', '.join(missing)}")
+
+    out: Dict[str, Any] = {}
+    for name in wanted:
+        column = by_name[name]
+        values = np.load(os.path.join(directory, column["file"]), mmap_mode="r", allow_pickle=False)
+        if column["kind"] == "category" and decode:
+            values = pd.Categorical.from_codes(values, categories=column["categories"])
+        out[name] = values
+    return out
+
+
+def load_dataset(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    checksum: Optional[str] = None,
+) -> pd.DataFrame:
+    """Load a dataset as a DataFrame backed by the memory-mapped cache.
+
+    Only the requested columns are read. Numeric columns are not copied
+    until something writes to them.
+    """
+    arrays = load_columns(path, columns, checksum)
+    return pd.DataFrame(arrays, copy=False)
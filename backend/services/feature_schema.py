@@ -0,0 +1,116 @@
+"""
+Feature Schemas
+Precompiled record-to-matrix encoders. Each schema maps request fields to
+model columns through lookup tables built once at model load, and writes
+straight into a preallocated NumPy row or batch matrix
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class FeatureSchema:
+    """Encodes dict records into the column layout a model was trained on.
+
+    Three kinds of field are supported:
+    - numeric: copied as float, with a default for missing values
+    - categorical: looked up in a value -> code table (label encoding)
+    - one_hot: sets the column for the value to 1, e.g. "road_type_highway"
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self.n_features = len(self.columns)
+        self._index = {column: i for i, column in enumerate(self.columns)}
+        self._numeric: List[Tuple[str, int, Optional[float]]] = []
+        self._categorical: List[Tuple[str, int, Dict[Any, float], Optional[float], Optional[Callable[[Any], Any]]]] = []
+        self._one_hot: List[Tuple[str, Dict[str, int]]] = []
+
+    def numeric(self, field: str, column: Optional[str] = None, default: Optional[float] = None) -> "FeatureSchema":
+        """Copy a numeric field; missing values use default or raise if None."""
+        self._numeric.append((field, self._index[column or field], default))
+        return self
+
+    def categorical(
+        self,
+        field: str,
+        table: Dict[Any, int],
+        column: Optional[str] = None,
+        default: Optional[int] = None,
+        normalize: Optional[Callable[[Any], Any]] = None,
+    ) -> "FeatureSchema":
+        """Label-encode a field through a precomputed value -> code table."""
+        codes = {value: float(code) for value, code in table.items()}
+        fallback = float(default) if default is not None else None
+        self._categorical.append((field, self._index[column or field], codes, fallback, normalize))
+        return self
+
+    def one_hot(self, field: str, prefix: Optional[str] = None) -> "FeatureSchema":
+        """One-hot encode a field into the existing "<prefix>_<value>" columns.
+
+        Values without a column (the category dropped at training time, or
+        unseen values) leave every column for the field at 0.
+        """
+        prefix = f"{prefix or field}_"
+        table = {
+            column[len(prefix):]: i for i, column in enumerate(self.columns) if column.startswith(prefix)
+        }
+        self._one_hot.append((field, table))
+        return self
+
+    def encode_into(self, out: np.ndarray, record: Dict[str, Any]) -> None:
+        """Write one record into a zeroed output row."""
+        for field, column, default in self._numeric:
+            value = record.get(field)
+            if value is None:
+                if default is None:
+                    raise ValueError(f"Missing required field: {field}")
+                value = default
+            out[column] = float(value)
+
+        for field, column, codes, fallback, normalize in self._categorical:
+            value = record.get(field)
+            if normalize is not None and value is not None:
+                value = normalize(value)
+            code = codes.get(value, fallback)
+            if code is None:
+                raise ValueError(f"Unknown value for {field}: {value!r}")
+            out[column] = code
+
+        for field, table in self._one_hot:
+            column = table.get(str(record.get(field)))
+            if column is not None:
+                out[column] = 1.0
+
+    def encode_row(self, record: Dict[str, Any]) -> np.ndarray:
+        """Encode one record as a (1, n_features) matrix."""
+        out = np.zeros((1, self.n_features), dtype=np.float64)
+        self.encode_into(out[0], record)
+        return out
+
+    def encode_batch(self, records: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, List[int], Dict[int, str]]:
+        """Encode many records into one matrix.
+
+        Returns (X, encoded, errors): X holds the rows that encoded cleanly,
+        encoded lists their positions in the input, and errors maps the
+        position of every rejected record to its message.
+        """
+        records = list(records)
+        out = np.zeros((len(records), self.n_features), dtype=np.float64)
+        encoded: List[int] = []
+        errors: Dict[int, str] = {}
+
+        for i, record in enumerate(records):
+            row = out[len(encoded)]
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("Record must be a JSON object")
+                self.encode_into(row, record)
+            except Exception as e:
+                row[:] = 0.0
+                errors[i] = str(e)
+                continue
+            encoded.append(i)
+
+        return out[:len(encoded)], encoded, errors
@@ -0,0 +1,305 @@
+"""
+HTTP Client
+Pooled keep-alive HTTP client for upstream APIs, with per-request deadlines
+taken from the caller's remaining budget and a circuit breaker
+"""
+
+import contextvars
+import http.client
+import json
+import queue
+import ssl
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+Origin = Tuple[str, str, int]
+
+# Absolute time.monotonic() deadline of the current request, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def start_budget(seconds: Optional[float]) -> contextvars.Token:
+    """Give the current context a deadline `seconds` from now (None clears it)."""
+    return _deadline.set(time.monotonic() + seconds if seconds is not None else None)
+
+
+def end_budget(token: contextvars.Token) -> None:
+    _deadline.reset(token)
+
+
+@contextmanager
+def request_budget(seconds: Optional[float]) -> Iterator[None]:
+    """Run a block with a deadline; nested budgets can only shorten it."""
+    remaining = remaining_budget()
+    if remaining is not None and (seconds is None or remaining < seconds):
+        seconds = remaining
+    token = start_budget(seconds)
+    try:
+        yield
+    finally:
+        end_budget(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected for `reset_timeout` seconds. Then a single trial call
+    is let through (half-open): success closes the circuit, failure opens
+    it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {"rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked()
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._current_state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_abandoned(self) -> None:
+        """A call gave up for its caller's reasons; upstream health is unknown."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats["opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, state=self._current_state_locked(), failures=self._failures)
+
+    def _current_state_locked(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+
+class HTTPClient:
+    """GET-JSON client that reuses keep-alive connections per origin.
+
+    Each origin gets a bounded LIFO pool of idle connections, so concurrent
+    callers each hold their own connection and idle ones are reused instead
+    of paying for a new TCP/TLS handshake. The socket timeout of every call
+    is the smaller of `timeout` and the caller's remaining budget. A call cut
+    short by the budget raises DeadlineExceeded and is not held against the
+    upstream by the circuit breaker.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        pool_size: int = 8,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.breaker = breaker
+        self._pools: Dict[Origin, "queue.LifoQueue[http.client.HTTPConnection]"] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+        self._stats = {
+            "requests": 0, "connections_opened": 0, "connections_reused": 0, "errors": 0, "deadline_exceeded": 0,
+        }
+
+    def get_json(self, url: str) -> Any:
+        """GET url and decode the JSON body.
+
+        Raises DeadlineExceeded when the caller's budget is spent before or
+        during the call, CircuitOpenError while the breaker rejects calls,
+        HTTPStatusError for non-200 responses and OSError/HTTPException for
+        transport failures.
+        """
+        # Before the breaker, which may hand this call its half-open trial
+        self._call_timeout()
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError("Upstream circuit is open")
+
+        try:
+            status, body = self._get(url)
+        except DeadlineExceeded:
+            # The caller ran out of time, which says nothing about upstream health
+            with self._lock:
+                self._stats["deadline_exceeded"] += 1
+            if self.breaker is not None:
+                self.breaker.record_abandoned()
+            raise
+        except Exception:
+            self._record(failure=True)
+            raise
+
+        if status != 200:
+            # Client errors other than rate limiting say nothing about upstream health
+            self._record(failure=status >= 500 or status == 429)
+            raise HTTPStatusError(status, f"Request failed with status {status}")
+
+        self._record(failure=False)
+        return json.loads(body.decode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, idle_connections=sum(pool.qsize() for pool in self._pools.values()))
+        if self.breaker is not None:
+            stats["circuit"] = self.breaker.stats()
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    def _record(self, failure: bool) -> None:
+        if failure:
+            with self._lock:
+                self._stats["errors"] += 1
+        if self.breaker is not None:
+            if failure:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    def _call_timeout(self) -> float:
+        remaining = remaining_budget()
+        if remaining is None:
+            return self.timeout
+        if remaining <= 0:
+            raise DeadlineExceeded("Request budget exhausted before upstream call")
+        return min(self.timeout, remaining)
+
+    def _get(self, url: str) -> Tuple[int, bytes]:
+        parts = urllib.parse.urlsplit(url)
+        origin = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        pool = self._pool(origin)
+        with self._lock:
+            self._stats["requests"] += 1
+
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh connection in that case
+        retried = False
+        while True:
+            timeout = self._call_timeout()
+            conn, reused = self._acquire(pool, origin, timeout)
+            try:
+                conn.request("GET", target, headers={"Accept": "application/json", "Connection": "keep-alive"})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and not retried:
+                    retried = True
+                    continue
+                raise
+            except TimeoutError as e:
+                conn.close()
+                if timeout < self.timeout:
+                    raise DeadlineExceeded("Request budget ran out during upstream call") from e
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(pool, conn)
+            return resp.status, body
+
+    def _pool(self, origin: Origin) -> "queue.LifoQueue[http.client.HTTPConnection]":
+        with self._lock:
+            pool = self._pools.get(origin)
+            if pool is None:
+                pool = self._pools[origin] = queue.LifoQueue(maxsize=self.pool_size)
+            return pool
+
+    def _acquire(self, pool, origin: Origin, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            conn = pool.get_nowait()
+            reused = True
+        except queue.Empty:
+            scheme, host, port = origin
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+            else:
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            reused = False
+
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        with self._lock:
+            self._stats["connections_reused" if reused else "connections_opened"] += 1
+        return conn, reused
+
+    def _release(self, pool, conn: http.client.HTTPConnection) -> None:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
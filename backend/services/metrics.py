@@ -0,0 +1,501 @@
+"""
+Metrics
+Minimal Prometheus-compatible counters, gauges and histograms, HTTP request
+instrumentation for the Flask app and per-stage timers for the controllers.
+Served in the Prometheus text exposition format at /metrics
+
+Every process counts on its own. Under a pre-fork server, set
+METRICS_MULTIPROC_DIR (gunicorn.conf.py does) and each worker writes its
+values to a snapshot file there; whichever worker answers /metrics adds up
+every worker's snapshot, so the totals cover the whole server.
+"""
+
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from services.prediction_cache import all_cache_stats
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+# One metric's values as stored in a snapshot file: JSON-friendly rows
+Rows = List[list]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# How often each worker rewrites its snapshot; other workers' values in a
+# scrape are at most this many seconds old
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+DEAD_SNAPSHOT = "metrics_dead.json"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    kind = "untyped"
+    # Whether exited workers' values still count towards the total
+    keep_dead = True
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def snapshot(self) -> Rows:
+        """This process's values as JSON-friendly rows."""
+
+    @abstractmethod
+    def rows(self, merged: Any) -> Rows:
+        """Merged values back in snapshot form."""
+
+    @abstractmethod
+    def merge(self, snapshots: Iterable[Rows]) -> Any:
+        """Combine several processes' snapshots."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Forget this process's values."""
+
+    @abstractmethod
+    def render(self, merged: Any = None) -> List[str]:
+        """Exposition lines for this process's values, or for merged ones."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def set_total(self, *labelvalues: str, value: float) -> None:
+        """Mirror a running total kept by another component."""
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0.0)
+
+    def snapshot(self) -> Rows:
+        with self._lock:
+            return self.rows(self._values)
+
+    def rows(self, merged: Dict[LabelValues, float]) -> Rows:
+        return [[list(labels), value] for labels, value in merged.items()]
+
+    def merge(self, snapshots: Iterable[Rows]) -> Dict[LabelValues, float]:
+        values: Dict[LabelValues, float] = {}
+        for rows in snapshots:
+            for labels, value in rows:
+                key = tuple(labels)
+                values[key] = values.get(key, 0.0) + value
+        return values
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self, merged: Optional[Dict[LabelValues, float]] = None) -> List[str]:
+        if merged is None:
+            with self._lock:
+                merged = dict(self._values)
+        items = sorted(merged.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+    keep_dead = False
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: str) -> int:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return sum(series[0]) if series else 0
+
+    def snapshot(self) -> Rows:
+        with self._lock:
+            return self.rows(self._series)
+
+    def rows(self, merged: Dict[LabelValues, list]) -> Rows:
+        return [[list(labels), list(counts), total] for labels, (counts, total) in merged.items()]
+
+    def merge(self, snapshots: Iterable[Rows]) -> Dict[LabelValues, list]:
+        series: Dict[LabelValues, list] = {}
+        for rows in snapshots:
+            for labels, counts, total in rows:
+                key = tuple(labels)
+                merged = series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+                if len(counts) != len(merged[0]):
+                    continue  # written by a process with other buckets
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+        return series
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self, merged: Optional[Dict[LabelValues, list]] = None) -> List[str]:
+        if merged is None:
+            with self._lock:
+                merged = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        items = sorted(merged.items())
+        lines = self.header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Add a callable that refreshes mirrored metrics before each scrape or snapshot."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _collect(self) -> List[_Metric]:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception:
+                continue
+        return metrics
+
+    def snapshot(self) -> Dict[str, Rows]:
+        return {metric.name: metric.snapshot() for metric in self._collect()}
+
+    def reset(self) -> None:
+        """Forget every value, e.g. the master's counts inherited by a forked worker."""
+        for metric in self._collect():
+            metric.reset()
+
+    def render(self, directory: Optional[str] = None) -> str:
+        """The exposition text: this process's values, or every worker's summed."""
+        directory = directory or multiprocess_dir()
+        if directory:
+            write_snapshot(directory, self)
+            live, dead = read_snapshots(directory)
+        metrics = self._collect()
+        lines: List[str] = []
+        for metric in metrics:
+            if directory:
+                sources = live + dead if metric.keep_dead else live
+                lines.extend(metric.render(metric.merge(snapshot.get(metric.name, []) for snapshot in sources)))
+            else:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def multiprocess_dir() -> Optional[str]:
+    return os.getenv("METRICS_MULTIPROC_DIR") or None
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics_{pid}.json")
+
+
+def _write_json(path: str, data: Dict[str, Rows]) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Rows]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(directory: Optional[str] = None, registry: Optional[Registry] = None) -> None:
+    """Publish this process's values for the other workers' scrapes."""
+    directory = directory or multiprocess_dir()
+    if directory:
+        _write_json(_snapshot_path(directory, os.getpid()), (registry or REGISTRY).snapshot())
+
+
+def read_snapshots(directory: str) -> Tuple[List[Dict[str, Rows]], List[Dict[str, Rows]]]:
+    """(live workers' snapshots, [exited workers' totals])."""
+    live = []
+    for path in sorted(glob.glob(os.path.join(directory, "metrics_*.json"))):
+        if os.path.basename(path) != DEAD_SNAPSHOT:
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                live.append(snapshot)
+    dead = _read_json(os.path.join(directory, DEAD_SNAPSHOT))
+    return live, [dead] if dead else []
+
+
+def mark_process_dead(pid: int, directory: Optional[str] = None, registry: Optional[Registry] = None) -> None:
+    """Fold an exited worker's counters into the dead total and drop its gauges.
+
+    Called by the gunicorn master only, so the dead total has one writer.
+    """
+    directory = directory or multiprocess_dir()
+    if not directory:
+        return
+    path = _snapshot_path(directory, pid)
+    snapshot = _read_json(path)
+    if snapshot is not None:
+        dead_path = os.path.join(directory, DEAD_SNAPSHOT)
+        dead = _read_json(dead_path) or {}
+        for metric in (registry or REGISTRY)._collect():
+            if metric.keep_dead:
+                merged = metric.merge([dead.get(metric.name, []), snapshot.get(metric.name, [])])
+                dead[metric.name] = metric.rows(merged)
+        _write_json(dead_path, dead)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def clear_snapshots(directory: str) -> None:
+    """Remove snapshots left by a previous server run."""
+    for path in glob.glob(os.path.join(directory, "metrics_*.json*")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class MetricsWriter:
+    """Daemon thread that periodically rewrites this worker's snapshot."""
+
+    def __init__(self, directory: str, interval: float = METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetricsWriter":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def flush(self) -> None:
+        try:
+            write_snapshot(self.directory)
+        except Exception as e:
+            logger.warning("Writing the metrics snapshot failed: %s", e)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+_writer: Optional[MetricsWriter] = None
+_writer_lock = threading.Lock()
+
+
+def start_metrics_writer() -> Optional[MetricsWriter]:
+    """Start this worker's snapshot writer when metrics are shared (idempotent)."""
+    global _writer
+    directory = multiprocess_dir()
+    if not directory:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = MetricsWriter(directory)
+        return _writer.start()
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests handled", ["blueprint", "route", "method", "status"]))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["blueprint", "route"]))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ["blueprint"]))
+HTTP_ERRORS = REGISTRY.register(Counter(
+    "http_request_errors_total", "HTTP requests that raised or returned a 5xx", ["blueprint", "route"]))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "model_stage_duration_seconds",
+    "Time spent per prediction stage (load, encode, predict, upstream_weather, serialize)",
+    ["model", "stage"]))
+PREDICTION_ERRORS = REGISTRY.register(Counter(
+    "prediction_errors_total", "Predictions that returned an error", ["model"]))
+PREDICTION_CACHE = {
+    "hits": REGISTRY.register(Counter("prediction_cache_hits_total", "Prediction cache hits", ["cache"])),
+    "misses": REGISTRY.register(Counter("prediction_cache_misses_total", "Prediction cache misses", ["cache"])),
+    "evictions": REGISTRY.register(Counter(
+        "prediction_cache_evictions_total", "Prediction cache evictions", ["cache"])),
+    "size": REGISTRY.register(Gauge("prediction_cache_size", "Prediction cache entries", ["cache"])),
+}
+
+
+def _mirror_prediction_caches() -> None:
+    """Copy the prediction caches' own counters into the registry."""
+    for cache, stats in all_cache_stats().items():
+        for field, metric in PREDICTION_CACHE.items():
+            metric.set_total(cache, value=stats[field])
+
+
+REGISTRY.register_collector(_mirror_prediction_caches)
+
+
+def observe_stage(model: str, stage: str):
+    """Context manager timing one stage of a model's prediction path."""
+    return STAGE_LATENCY.time(model, stage)
+
+
+def record_error(model: str) -> None:
+    PREDICTION_ERRORS.inc(model)
+
+
+def install_metrics(app) -> None:
+    """Instrument a Flask app and expose /metrics.
+
+    Adds request counters, latency histograms and in-flight gauges labelled
+    by blueprint and route rule (not raw path, to bound cardinality), and
+    times JSON serialization as the "serialize" stage of each blueprint.
+    """
+    from flask import Response, g, has_request_context, request
+
+    if os.getenv("METRICS_ENABLED", "1") != "1":
+        return
+
+    json_provider = app.json
+    dumps = json_provider.dumps
+
+    def timed_dumps(obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return dumps(obj, **kwargs)
+        finally:
+            if has_request_context():
+                STAGE_LATENCY.observe(time.perf_counter() - start, request.blueprint or "app", "serialize")
+
+    json_provider.dumps = timed_dumps
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_blueprint = request.blueprint or "app"
+        HTTP_IN_FLIGHT.inc(g._metrics_blueprint)
+
+    @app.after_request
+    def _record_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record_request(exc):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return
+        blueprint = g.pop("_metrics_blueprint", "app")
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        status = g.pop("_metrics_status", 500 if exc is not None else 200)
+
+        HTTP_IN_FLIGHT.dec(blueprint)
+        HTTP_LATENCY.observe(time.perf_counter() - start, blueprint, route)
+        HTTP_REQUESTS.inc(blueprint, route, request.method, str(status))
+        if exc is not None or status >= 500:
+            HTTP_ERRORS.inc(blueprint, route)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
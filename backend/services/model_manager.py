@@ -0,0 +1,408 @@
+"""
+Model Manager
+Hot-swappable model slots, and a background worker that retrains models
+when their datasets in backend/data change
+
+Each controller serves its model from a ModelSlot. A slot holds one
+LoadedModel (predictor, compiled forest, encoders, version), built in full
+before it is published with a single assignment, so a request always uses
+one complete version. The ModelManager polls the datasets of loaded models;
+when one changes it grows the served forest with warm-started trees (or
+refits it when the features changed), validates the candidate on a holdout,
+saves the artifact and swaps it in. Other processes serving the same model
+pick the saved artifact up on their next poll.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "60"))
+HOLDOUT_FRACTION = float(os.getenv("MODEL_HOLDOUT_FRACTION", "0.2"))
+INCREMENT_TREES = int(os.getenv("MODEL_INCREMENT_TREES", "25"))
+# Past this many trees a forest is refit from scratch instead of grown
+MAX_TREES = int(os.getenv("MODEL_MAX_TREES", "300"))
+# How far a candidate's holdout score may fall below the served model's
+MAX_REGRESSION = float(os.getenv("MODEL_MAX_REGRESSION", "0.02"))
+# A training lock file older than this is assumed to belong to a dead process
+TRAIN_LOCK_TTL = float(os.getenv("MODEL_TRAIN_LOCK_TTL", "3600"))
+HOLDOUT_SEED = 42
+HISTORY_SIZE = 100
+
+# Holdout metric candidates are judged on, per task (higher is better)
+PRIMARY_METRIC = {"regression": "r2", "classification": "accuracy"}
+
+_slots: Dict[str, "ModelSlot"] = {}
+_history: "deque[Dict[str, Any]]" = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+
+
+class LoadedModel:
+    """One served version of a model: everything a prediction reads."""
+
+    def __init__(
+        self,
+        version: str,
+        model: Any,
+        compiled: Any = None,
+        schema: Any = None,
+        labels: Optional[List[str]] = None,
+    ):
+        self.version = version
+        self.model = model
+        self.compiled = compiled
+        self.schema = schema
+        self.labels = labels
+        # The artifact minus its estimator, which load_predictor may have
+        # replaced with a shared forest
+        self.metadata: Dict[str, Any] = {}
+        self.trees: Optional[int] = None
+        self.source = "load"
+        self.load_ms = 0.0
+        self.loaded_at = time.time()
+
+    @property
+    def feature_columns(self) -> Optional[List[str]]:
+        return self.metadata.get("feature_columns")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "trees": self.trees,
+            "load_ms": self.load_ms,
+            "loaded_at": round(self.loaded_at, 3),
+            "metrics": self.metadata.get("metrics", {}),
+        }
+
+
+class ModelSlot:
+    """The served version of one model, loaded on first use and swapped atomically.
+
+    load() returns the artifact dict for the first load; build(artifact)
+    turns an artifact into a LoadedModel. The slot registers itself with
+    the model manager under name, which must match a training.MODEL_SPECS
+    entry for the model to be retrained.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        artifact_name: str,
+        dataset_path: str,
+        load: Callable[[], Dict[str, Any]],
+        build: Callable[[Dict[str, Any]], LoadedModel],
+        cache: Any = None,
+    ):
+        self.name = name
+        self.artifact_name = artifact_name
+        self.dataset_path = dataset_path
+        self.cache = cache
+        self._load = load
+        self._build = build
+        self._current: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        # (size, mtime) of the artifact file the current version came from
+        self.artifact_stat: Optional[Tuple[int, int]] = None
+        _slots[name] = self
+
+    @property
+    def current(self) -> Optional[LoadedModel]:
+        return self._current
+
+    def get(self) -> LoadedModel:
+        """The current version, loading it first if nothing is loaded yet."""
+        loaded = self._current
+        if loaded is None:
+            with self._lock:
+                if self._current is None:
+                    started = time.perf_counter()
+                    self._publish(self._load(), "load", started)
+                loaded = self._current
+        return loaded
+
+    def install(self, artifact: Dict[str, Any], source: str, started: Optional[float] = None) -> LoadedModel:
+        """Build a version from artifact and make it the current one."""
+        with self._lock:
+            return self._publish(artifact, source, started if started is not None else time.perf_counter())
+
+    def _publish(self, artifact: Dict[str, Any], source: str, started: float) -> LoadedModel:
+        from services.model_store import artifact_path
+
+        loaded = self._build(artifact)
+        loaded.metadata = {key: value for key, value in artifact.items() if key != "model"}
+        estimators = getattr(artifact["model"], "estimators_", None)
+        loaded.trees = len(estimators) if estimators is not None else None
+        loaded.source = source
+        loaded.load_ms = round((time.perf_counter() - started) * 1000, 2)
+        loaded.loaded_at = time.time()
+
+        self.artifact_stat = _stat(artifact_path(self.artifact_name))
+        # The swap: requests that already hold the old version finish with it
+        self._current = loaded
+        if self.cache is not None:
+            self.cache.bind(loaded.version)
+        _record({"model": self.name, "accepted": True, **loaded.summary()})
+        return loaded
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _record(entry: Dict[str, Any]) -> None:
+    entry.setdefault("at", round(time.time(), 3))
+    with _history_lock:
+        _history.append(entry)
+
+
+def model_versions() -> Dict[str, Any]:
+    """The version each loaded model is serving, and recent loads and rejections."""
+    with _history_lock:
+        history = [dict(entry) for entry in _history]
+    return {
+        "models": {name: slot.current.summary() for name, slot in _slots.items() if slot.current is not None},
+        "history": history,
+    }
+
+
+def holdout_split(n: int, fraction: float, seed: int = HOLDOUT_SEED) -> Tuple[Any, Any]:
+    """Shuffled (train, holdout) row indexes with fraction of the rows held out."""
+    import numpy as np
+
+    order = np.random.default_rng(seed).permutation(n)
+    n_holdout = min(n - 1, max(1, int(round(n * fraction))))
+    return np.sort(order[n_holdout:]), np.sort(order[:n_holdout])
+
+
+@contextmanager
+def _train_lock(artifact_name: str) -> Iterator[bool]:
+    """Cross-process lock so one process per models/ directory retrains a model."""
+    from services import model_store
+
+    os.makedirs(model_store.MODELS_DIR, exist_ok=True)
+    path = os.path.join(model_store.MODELS_DIR, f"{artifact_name}.train.lock")
+    try:
+        if time.time() - os.path.getmtime(path) > TRAIN_LOCK_TTL:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        yield False
+        return
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield True
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ModelManager:
+    """Daemon thread that keeps loaded models in step with their datasets."""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else MODEL_WATCH_INTERVAL
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = threading.Lock()
+        # Dataset (size, mtime) already handled, and checksums whose candidate was rejected
+        self._dataset_stats: Dict[str, Tuple[int, int]] = {}
+        self._rejected: Dict[str, str] = {}
+
+    def start(self) -> "ModelManager":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-manager", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check_all()
+
+    def check_all(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self.check(name) for name in list(_slots)}
+
+    def check(self, name: str) -> Dict[str, Any]:
+        """Bring one loaded model up to date with its artifact and dataset.
+
+        Returns {"status": ...}: not_loaded, current, reloaded (another
+        process saved a newer artifact), updated, rejected, busy (another
+        process is training it) or failed.
+        """
+        slot = _slots[name]
+        loaded = slot.current
+        if loaded is None:
+            return {"status": "not_loaded"}
+
+        with self._busy:
+            try:
+                reloaded = self._reload_if_replaced(slot, loaded)
+                if reloaded is not None:
+                    return {"status": "reloaded", "version": reloaded.version}
+
+                stat = _stat(slot.dataset_path)
+                if stat is None or stat == self._dataset_stats.get(name):
+                    return {"status": "current"}
+                from services.model_store import dataset_checksum
+
+                checksum = dataset_checksum(slot.dataset_path)
+                if checksum in (loaded.metadata.get("dataset_checksum"), self._rejected.get(name)):
+                    self._dataset_stats[name] = stat
+                    return {"status": "current"}
+
+                outcome = self._retrain(slot, loaded, checksum)
+                if outcome["status"] != "busy":
+                    self._dataset_stats[name] = stat
+                return outcome
+            except Exception as e:
+                logger.warning("Model update failed for %s: %s", name, e)
+                return {"status": "failed", "error": str(e)}
+
+    def _reload_if_replaced(self, slot: ModelSlot, loaded: LoadedModel) -> Optional[LoadedModel]:
+        """Install the artifact on disk if another process replaced it."""
+        from services.model_store import artifact_path, artifact_version, load_artifact
+
+        stat = _stat(artifact_path(slot.artifact_name))
+        if stat is None or stat == slot.artifact_stat or not os.path.exists(slot.dataset_path):
+            return None
+        started = time.perf_counter()
+        artifact = load_artifact(slot.artifact_name, slot.dataset_path)
+        if artifact is None or artifact_version(artifact) == loaded.version:
+            slot.artifact_stat = stat
+            return None
+        return slot.install(artifact, "reload", started)
+
+    def _warm_start_base(self, slot: ModelSlot, loaded: LoadedModel, prepared: Dict[str, Any], y_train: Any) -> Any:
+        """The served forest if new trees can be added to it, else None."""
+        import numpy as np
+        from services.model_store import artifact_version, load_artifact
+
+        metadata = loaded.metadata
+        if metadata.get("feature_columns") != prepared["feature_columns"]:
+            return None
+        served_encoders = metadata.get("encoders") or {}
+        for column, encoder in prepared.get("encoders", {}).items():
+            if column not in served_encoders or list(served_encoders[column].classes_) != list(encoder.classes_):
+                return None
+
+        # Reread the estimator: the served predictor may be a compact forest
+        artifact = load_artifact(slot.artifact_name, slot.dataset_path, checksum=metadata.get("dataset_checksum"))
+        if artifact is None or artifact_version(artifact) != loaded.version:
+            return None
+        model = artifact["model"]
+        if "warm_start" not in model.get_params() or not hasattr(model, "estimators_"):
+            return None
+        if len(model.estimators_) + INCREMENT_TREES > MAX_TREES:
+            return None
+        if hasattr(model, "classes_") and not np.array_equal(np.unique(y_train), model.classes_):
+            return None
+        return model
+
+    def _retrain(self, slot: ModelSlot, loaded: LoadedModel, checksum: str) -> Dict[str, Any]:
+        import numpy as np
+        from services import training
+        from services.model_store import save_artifact
+
+        with _train_lock(slot.artifact_name) as acquired:
+            if not acquired:
+                return {"status": "busy"}
+
+            started = time.perf_counter()
+            prepared = training.prepare_dataset(slot.name, slot.dataset_path, checksum)
+            X, y = prepared["X"], np.asarray(prepared["y"])
+            train, holdout = holdout_split(len(y), HOLDOUT_FRACTION)
+
+            base = self._warm_start_base(slot, loaded, prepared, y[train])
+            if base is not None:
+                update = "incremental"
+                candidate = training.extend_forest(base, X.iloc[train], y[train], INCREMENT_TREES)
+            else:
+                update = "retrain"
+                candidate = training.fit_estimator(slot.name, X.iloc[train], y[train])
+            # The warm-started trees may have seen some holdout rows in the old
+            # dataset, so an incremental candidate's score leans optimistic
+            scores = training.score_predictions(slot.name, y[holdout], candidate.predict(X.iloc[holdout]))
+            task = training.MODEL_SPECS[slot.name]["task"]
+            accepted, reason = _validate(task, scores, loaded.metadata.get("metrics") or {}, len(np.unique(y)))
+            train_ms = round((time.perf_counter() - started) * 1000, 2)
+
+            if not accepted:
+                self._rejected[slot.name] = checksum
+                _record({
+                    "model": slot.name, "accepted": False, "source": update,
+                    "reason": reason, "holdout": scores, "train_ms": train_ms,
+                })
+                logger.warning("Rejected %s candidate for %s: %s", update, slot.name, reason)
+                return {"status": "rejected", "update": update, "reason": reason, "holdout": scores}
+
+            metrics = {
+                "rows": int(len(y)),
+                "holdout_rows": int(len(holdout)),
+                "holdout": scores,
+                "update": update,
+                "validation": reason,
+                "train_seconds": round(train_ms / 1000, 2),
+            }
+            artifact = save_artifact(
+                slot.artifact_name,
+                candidate,
+                slot.dataset_path,
+                feature_columns=prepared["feature_columns"],
+                encoders=prepared.get("encoders", {}),
+                metrics=metrics,
+                checksum=checksum,
+            )
+            installed = slot.install(artifact, update)
+            logger.info("Swapped in %s %s (%s, %s)", slot.name, installed.version, update, reason)
+            return {"status": "updated", "update": update, "version": installed.version, "holdout": scores}
+
+
+def _validate(task: str, scores: Dict[str, float], served_metrics: Dict[str, Any], n_classes: int) -> Tuple[bool, str]:
+    """Accept a candidate whose holdout score keeps up with the served model's.
+
+    The reference is the served model's own holdout score, else its
+    cross-validation score. Without either, the candidate only has to beat
+    a constant prediction (r2 > 0) or chance (accuracy > 1 / classes).
+    """
+    metric = PRIMARY_METRIC[task]
+    score = scores[metric]
+    for basis in ("holdout", "cv"):
+        reference = (served_metrics.get(basis) or {}).get(metric)
+        if reference is not None:
+            ok = score >= reference - MAX_REGRESSION
+            return ok, f"{metric} {score:.4f} vs served {basis} {reference:.4f}"
+    floor = 0.0 if task == "regression" else 1.0 / max(1, n_classes)
+    return score > floor, f"{metric} {score:.4f} vs floor {floor:.4f}"
+
+
+_manager: Optional[ModelManager] = None
+_manager_lock = threading.Lock()
+
+
+def start_model_manager() -> ModelManager:
+    """Start this process's model manager (idempotent)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ModelManager()
+        return _manager.start()
@@ -0,0 +1,135 @@
+"""
+Model Artifact Store
+Persists trained models together with their encoders and feature columns
+under backend/models/, keyed to a checksum of the dataset they were fit on
+"""
+
+import hashlib
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import sklearn
+
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
+
+# Bump when the artifact layout changes so older files are treated as stale
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def dataset_checksum(path: str) -> str:
+    """Return the SHA-256 hex digest of a dataset file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_path(name: str) -> str:
+    """Path of the versioned artifact file for a model name."""
+    return os.path.join(MODELS_DIR, f"{name}.v{ARTIFACT_FORMAT_VERSION}.pkl")
+
+
+def artifact_version(artifact: Dict[str, Any]) -> str:
+    """Short identifier that changes whenever an artifact is rebuilt."""
+    return f"{artifact['dataset_checksum'][:12]}-{int(artifact['created_at'] * 1000)}"
+
+
+def file_version(path: str) -> str:
+    """Identifier for a plain model file, derived from its size and mtime."""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def save_artifact(
+    name: str,
+    model: Any,
+    dataset_path: str,
+    feature_columns: List[str],
+    encoders: Optional[Dict[str, Any]] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    checksum: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Write a model artifact atomically and return it.
+
+    The file is written to a temporary path and renamed into place so a
+    concurrent reader never sees a partially written artifact.
+    """
+    artifact = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "name": name,
+        "model": model,
+        "encoders": encoders or {},
+        "feature_columns": list(feature_columns),
+        "dataset_path": os.path.basename(dataset_path),
+        "dataset_checksum": checksum or dataset_checksum(dataset_path),
+        "sklearn_version": sklearn.__version__,
+        "metrics": metrics or {},
+        "created_at": time.time(),
+    }
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    path = artifact_path(name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return artifact
+
+
+def load_artifact(name: str, dataset_path: str, checksum: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Load an artifact if it exists and is still fresh.
+
+    Returns None when the file is missing, unreadable, written by another
+    format or scikit-learn version, or trained on a different dataset.
+    """
+    path = artifact_path(name)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "rb") as f:
+            artifact = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(artifact, dict):
+        return None
+    if artifact.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        return None
+    if artifact.get("sklearn_version") != sklearn.__version__:
+        return None
+    if artifact.get("dataset_checksum") != (checksum or dataset_checksum(dataset_path)):
+        return None
+
+    return artifact
+
+
+def load_or_train(
+    name: str,
+    dataset_path: str,
+    train_fn: Callable[[], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Return a fresh artifact, retraining only when it is missing or stale.
+
+    train_fn must return a dict with "model" and "feature_columns" and may
+    include "encoders" and "metrics".
+    """
+    checksum = dataset_checksum(dataset_path)
+    artifact = load_artifact(name, dataset_path, checksum=checksum)
+    if artifact is not None:
+        return artifact
+
+    trained = train_fn()
+    return save_artifact(
+        name,
+        trained["model"],
+        dataset_path,
+        feature_columns=trained["feature_columns"],
+        encoders=trained.get("encoders"),
+        metrics=trained.get("metrics"),
+        checksum=checksum,
+    )
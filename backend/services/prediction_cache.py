@@ -0,0 +1,137 @@
+"""
+Prediction Cache
+Bounded in-process LRU caches for model outputs, keyed on the encoded
+feature vector rounded to a configurable precision per column
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+_registry: Dict[str, "PredictionCache"] = {}
+_registry_lock = threading.Lock()
+
+
+def _precision_overrides(name: str) -> Dict[str, int]:
+    """Parse PREDICTION_CACHE_PRECISION_<NAME>="column=digits,column=digits"."""
+    raw = os.getenv(f"PREDICTION_CACHE_PRECISION_{name.upper()}", "")
+    overrides = {}
+    for item in raw.split(","):
+        if "=" in item:
+            column, digits = item.split("=", 1)
+            overrides[column.strip()] = int(digits)
+    return overrides
+
+
+class PredictionCache:
+    """LRU cache from quantized feature vectors to predictions.
+
+    Columns listed in `precision` are rounded to that many decimal places
+    before forming the key; other columns are used as-is (label codes,
+    one-hot flags). The cache is tied to a model version and clears itself
+    whenever a different version is bound.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        columns: Sequence[str],
+        precision: Optional[Dict[str, int]] = None,
+        maxsize: Optional[int] = None,
+    ):
+        self.name = name
+        self.columns = list(columns)
+        digits = dict(precision or {})
+        digits.update(_precision_overrides(name))
+        self._digits: List[Optional[int]] = [digits.get(column) for column in self.columns]
+        self.maxsize = maxsize if maxsize is not None else int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+        self.enabled = os.getenv("PREDICTION_CACHE_ENABLED", "1") == "1" and self.maxsize > 0
+        self.version: Optional[Hashable] = None
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+        with _registry_lock:
+            _registry[name] = self
+
+    def key(self, row: Sequence[float]) -> tuple:
+        return tuple(
+            float(value) if digits is None else round(float(value), digits)
+            for value, digits in zip(row, self._digits)
+        )
+
+    def bind(self, version: Hashable) -> None:
+        """Associate the cache with a model version, clearing it on change."""
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self._invalidations += 1
+                self._entries.clear()
+                self.version = version
+
+    def get_or_compute(
+        self,
+        row: Sequence[float],
+        compute: Callable[[], Any],
+        version: Optional[Hashable] = None,
+    ) -> Any:
+        """Return the cached prediction for row, computing it on a miss.
+
+        version is the model version compute() predicts with; a caller still
+        holding a version other than the bound one bypasses the cache.
+        """
+        if not self.enabled:
+            return compute()
+
+        key = self.key(row)
+        with self._lock:
+            bound = self.version
+            current = version is None or version == bound
+            if current and key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            if current:
+                self._misses += 1
+
+        value = compute()
+
+        with self._lock:
+            # Drop results computed against a model that was swapped meanwhile
+            if current and bound == self.version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "version": str(self.version) if self.version is not None else None,
+            }
+
+
+def all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every prediction cache created in this process."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,233 @@
+"""
+Road Graph
+In-memory graph of the dataset cities built from the optimal route dataset,
+with precomputed all-pairs tables and energy-constrained A* routing
+"""
+
+import heapq
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.cities import DATASET_CITIES, DATA_DIR
+
+ROUTE_DATASET_PATH = os.path.join(DATA_DIR, "optimal_route_dataset_srilanka.csv")
+
+OBJECTIVES = ("energy", "time")
+
+
+class NoRouteError(ValueError):
+    pass
+
+
+class RoadGraph:
+    """Undirected city graph in CSR form.
+
+    Each city pair seen in the dataset becomes one edge whose distance,
+    time and energy are the medians over every sampled alternative for that
+    pair (both directions). Neighbour lists are stored as CSR arrays:
+    neighbours of node i are indices[indptr[i]:indptr[i + 1]], with the
+    matching edge weights at the same positions.
+
+    All-pairs minimum energy and minimum time (Floyd-Warshall) are computed
+    once at build time. Unconstrained queries are table lookups; they also
+    serve as exact, consistent A* heuristics for constrained queries.
+    """
+
+    def __init__(self, cities: Sequence[str], edges: pd.DataFrame):
+        self.cities = list(cities)
+        self.index = {city: i for i, city in enumerate(self.cities)}
+        self._lookup = {city.lower(): i for i, city in enumerate(self.cities)}
+        n = len(self.cities)
+
+        src = np.concatenate([edges["u"].to_numpy(), edges["v"].to_numpy()])
+        dst = np.concatenate([edges["v"].to_numpy(), edges["u"].to_numpy()])
+        order = np.lexsort((dst, src))
+        src, dst = src[order], dst[order]
+
+        self.indptr = np.searchsorted(src, np.arange(n + 1)).astype(np.int32)
+        self.indices = dst.astype(np.int32)
+        self.distance_km = np.tile(edges["distance_km"].to_numpy(np.float64), 2)[order]
+        self.time_min = np.tile(edges["time_min"].to_numpy(np.float64), 2)[order]
+        self.energy_kwh = np.tile(edges["energy_kWh"].to_numpy(np.float64), 2)[order]
+        self.samples = np.tile(edges["samples"].to_numpy(np.int32), 2)[order]
+
+        # Plain lists for the query loop; indexing them is much cheaper than
+        # indexing NumPy arrays element by element
+        self._adjacency: List[List[Tuple[int, int]]] = [
+            [(int(self.indices[k]), k) for k in range(self.indptr[i], self.indptr[i + 1])] for i in range(n)
+        ]
+        self._weights = {
+            "energy": self.energy_kwh.tolist(),
+            "time": self.time_min.tolist(),
+            "distance": self.distance_km.tolist(),
+        }
+
+        self._cost: Dict[str, np.ndarray] = {}
+        self._next: Dict[str, np.ndarray] = {}
+        for objective in OBJECTIVES:
+            self._cost[objective], self._next[objective] = self._all_pairs(self._weights[objective])
+        self._cost_lists = {objective: self._cost[objective].tolist() for objective in OBJECTIVES}
+        self._next_lists = {objective: self._next[objective].tolist() for objective in OBJECTIVES}
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def _all_pairs(self, weights: List[float]) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(self.cities)
+        cost = np.full((n, n), np.inf)
+        nxt = np.full((n, n), -1, dtype=np.int32)
+        np.fill_diagonal(cost, 0.0)
+        np.fill_diagonal(nxt, np.arange(n))
+        for i in range(n):
+            for j, k in self._adjacency[i]:
+                if weights[k] < cost[i, j]:
+                    cost[i, j] = weights[k]
+                    nxt[i, j] = j
+        for m in range(n):
+            through = cost[:, m:m + 1] + cost[m:m + 1, :]
+            better = through < cost
+            cost = np.where(better, through, cost)
+            nxt = np.where(better, nxt[:, m:m + 1], nxt)
+        return cost, nxt
+
+    def _node(self, city: str) -> int:
+        i = self._lookup.get(str(city).strip().lower())
+        if i is not None:
+            return i
+        raise NoRouteError(f"Unknown city: {city}. Known cities: {', '.join(self.cities)}")
+
+    def _table_path(self, objective: str, source: int, target: int) -> List[int]:
+        nxt = self._next_lists[objective]
+        if nxt[source][target] < 0:
+            return []
+        path = [source]
+        while path[-1] != target:
+            path.append(nxt[path[-1]][target])
+        return path
+
+    def _edge(self, u: int, v: int, objective: str) -> int:
+        """Position of the u -> v edge used on a path (cheapest for objective)."""
+        weights = self._weights[objective]
+        return min((k for j, k in self._adjacency[u] if j == v), key=weights.__getitem__)
+
+    def _constrained_min_time(self, source: int, target: int, budget: float) -> Optional[List[int]]:
+        """A* over (node, energy used) labels, minimising time within budget.
+
+        A label is pruned when the energy it has used plus the least energy
+        still needed to reach the target exceeds the budget, or when another
+        label at the same node is at least as good in both time and energy.
+        """
+        time_w = self._weights["time"]
+        energy_w = self._weights["energy"]
+        h_time = self._cost_lists["time"]
+        h_energy = self._cost_lists["energy"]
+
+        labels: List[List[Tuple[float, float]]] = [[] for _ in self.cities]
+        heap = [(h_time[source][target], 0.0, 0.0, source, (source,))]
+        while heap:
+            _, elapsed, used, node, path = heapq.heappop(heap)
+            if node == target:
+                return list(path)
+            if any(t <= elapsed and e <= used for t, e in labels[node]):
+                continue
+            labels[node].append((elapsed, used))
+            for j, k in self._adjacency[node]:
+                if j in path:
+                    continue
+                next_used = used + energy_w[k]
+                if next_used + h_energy[j][target] > budget:
+                    continue
+                next_elapsed = elapsed + time_w[k]
+                heapq.heappush(heap, (next_elapsed + h_time[j][target], next_elapsed, next_used, j, path + (j,)))
+        return None
+
+    def route(
+        self,
+        origin: str,
+        destination: str,
+        objective: str = "energy",
+        energy_budget_kwh: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Minimum-energy or minimum-time route between two cities.
+
+        With energy_budget_kwh the route must not use more energy than the
+        budget; NoRouteError is raised when no route fits.
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of: {', '.join(OBJECTIVES)}")
+        source, target = self._node(origin), self._node(destination)
+
+        path = self._table_path(objective, source, target)
+        if not path:
+            raise NoRouteError(f"No route between {origin} and {destination}")
+
+        if energy_budget_kwh is not None:
+            min_energy = self._cost_lists["energy"][source][target]
+            if min_energy > energy_budget_kwh:
+                raise NoRouteError(
+                    f"No route within {energy_budget_kwh:.2f} kWh; the minimum is {min_energy:.2f} kWh"
+                )
+            if objective == "time" and self._path_total(path, "energy", "time") > energy_budget_kwh:
+                path = self._constrained_min_time(source, target, energy_budget_kwh)
+
+        return self._describe(path, objective, energy_budget_kwh)
+
+    def _path_total(self, path: List[int], weight: str, objective: str) -> float:
+        weights = self._weights[weight]
+        return sum(weights[self._edge(u, v, objective)] for u, v in zip(path, path[1:]))
+
+    def _describe(self, path: List[int], objective: str, budget: Optional[float]) -> Dict[str, Any]:
+        legs = []
+        totals = {"distance_km": 0.0, "time_min": 0.0, "energy_kWh": 0.0}
+        for u, v in zip(path, path[1:]):
+            k = self._edge(u, v, objective)
+            leg = {
+                "from": self.cities[u],
+                "to": self.cities[v],
+                "distance_km": self._weights["distance"][k],
+                "time_min": self._weights["time"][k],
+                "energy_kWh": self._weights["energy"][k],
+            }
+            for key in totals:
+                totals[key] += leg[key]
+            legs.append(leg)
+
+        result = {
+            "objective": objective,
+            "path": [self.cities[i] for i in path],
+            "legs": legs,
+            "total_distance_km": round(totals["distance_km"], 2),
+            "total_time_min": round(totals["time_min"], 2),
+            "total_energy_kWh": round(totals["energy_kWh"], 3),
+        }
+        if budget is not None:
+            result["energy_budget_kWh"] = round(budget, 3)
+            result["energy_remaining_kWh"] = round(budget - totals["energy_kWh"], 3)
+        return result
+
+
+def build_graph(path: str = ROUTE_DATASET_PATH, cities: Sequence[str] = DATASET_CITIES) -> RoadGraph:
+    """Aggregate the route dataset into one median-weighted edge per city pair."""
+    df = pd.read_csv(path, usecols=[
+        "origin", "destination", "route_distance_km", "estimated_time_min", "estimated_energy_kWh",
+    ])
+    index = {city: i for i, city in enumerate(cities)}
+    df = df[df["origin"].isin(index) & df["destination"].isin(index) & (df["origin"] != df["destination"])]
+
+    a = df["origin"].map(index).to_numpy()
+    b = df["destination"].map(index).to_numpy()
+    grouped = pd.DataFrame({
+        "u": np.minimum(a, b),
+        "v": np.maximum(a, b),
+        "distance_km": df["route_distance_km"].to_numpy(),
+        "time_min": df["estimated_time_min"].to_numpy(),
+        "energy_kWh": df["estimated_energy_kWh"].to_numpy(),
+    }).groupby(["u", "v"])
+
+    edges = grouped.median().reset_index()
+    edges["samples"] = grouped.size().to_numpy()
+    return RoadGraph(cities, edges)
@@ -0,0 +1,158 @@
+"""
+Shared Model Storage
+Writes compact compiled forests to .npy files once and memory-maps them
+read-only, so every server worker shares the same model pages
+"""
+
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from services.tree_engine import CompiledForest, compile_model
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BACKEND_DIR, ".cache", "models")
+
+# Bump when the on-disk layout changes so older files are rebuilt
+STORAGE_FORMAT_VERSION = 1
+
+_reports: Dict[str, Dict[str, Any]] = {}
+_reports_lock = threading.Lock()
+
+
+def shared_models_enabled() -> bool:
+    return os.getenv("SHARED_MODELS", "0") == "1"
+
+
+def storage_dir(name: str, version: str) -> str:
+    return os.path.join(CACHE_DIR, f"{name}-v{STORAGE_FORMAT_VERSION}-{version}")
+
+
+def save_forest(forest: CompiledForest, directory: str) -> str:
+    """Write a forest's arrays and parameters into directory atomically.
+
+    Older versions of the same model are removed once the new one is in
+    place.
+    """
+    if os.path.exists(os.path.join(directory, "meta.json")):
+        return directory
+
+    tmp = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for key, values in forest.arrays().items():
+        np.save(os.path.join(tmp, f"{key}.npy"), np.ascontiguousarray(values), allow_pickle=False)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"format_version": STORAGE_FORMAT_VERSION, **forest.params()}, f)
+
+    try:
+        os.replace(tmp, directory)
+    except OSError:
+        # Another worker finished the same model first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    parent = os.path.dirname(directory)
+    prefix = os.path.basename(directory).rsplit("-", 1)[0] + "-"
+    for entry in os.listdir(parent):
+        stale = os.path.join(parent, entry)
+        if entry.startswith(prefix) and stale != directory and not entry.endswith(".tmp"):
+            shutil.rmtree(stale, ignore_errors=True)
+    return directory
+
+
+def load_forest(directory: str) -> CompiledForest:
+    """Memory-map a saved forest read-only."""
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    meta.pop("format_version", None)
+    arrays = {
+        key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode="r", allow_pickle=False)
+        for key in ("feature", "threshold", "left", "right", "value", "missing_left", "roots")
+    }
+    return CompiledForest(**arrays, **meta)
+
+
+def estimator_bytes(model: Any) -> int:
+    """Bytes held by the node and value arrays of a fitted tree ensemble."""
+    trees = getattr(model, "estimators_", None)
+    trees = [model] if trees is None else np.ravel(np.asarray(trees, dtype=object))
+    total = 0
+    for tree in trees:
+        state = getattr(tree, "tree_", None)
+        if state is None:
+            continue
+        state = state.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+
+def load_predictor(name: str, version: str, model: Any) -> Tuple[Any, Optional[CompiledForest]]:
+    """Return (predictor, compiled) for a freshly loaded model.
+
+    With SHARED_MODELS=1 and a compilable model, both are the compact forest
+    mapped from .cache/models, and the sklearn estimator can be dropped.
+    Otherwise the predictor is the model itself with a private compiled
+    copy for small batches, as before. Either way the model's memory use is
+    recorded for memory_report().
+    """
+    compiled = compile_model(model)
+    report: Dict[str, Any] = {
+        "estimator": type(model).__name__,
+        "version": version,
+        "sklearn_bytes": estimator_bytes(model),
+        "compiled_bytes": compiled.nbytes if compiled is not None else 0,
+    }
+
+    if compiled is None or not shared_models_enabled():
+        report.update({"shared": False, "private_bytes": report["sklearn_bytes"] + report["compiled_bytes"]})
+        _record(name, report)
+        return model, compiled
+
+    compact = compiled.compact()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    mapped = load_forest(save_forest(compact, storage_dir(name, version)))
+    report.update({
+        "shared": True,
+        "compact_bytes": compact.nbytes,
+        "private_bytes": 0,
+        "path": storage_dir(name, version),
+    })
+    _record(name, report)
+    return mapped, mapped
+
+
+def _record(name: str, report: Dict[str, Any]) -> None:
+    with _reports_lock:
+        _reports[name] = report
+
+
+def _process_memory() -> Dict[str, int]:
+    """Resident and shared bytes of this process (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(v) for v in f.read().split()[:3])
+    except (OSError, ValueError):
+        return {}
+    page = os.sysconf("SC_PAGE_SIZE")
+    return {"rss_bytes": resident * page, "shared_bytes": shared * page}
+
+
+def memory_report() -> Dict[str, Any]:
+    """Per-model memory of the models loaded in this process.
+
+    sklearn_bytes and compiled_bytes are what each worker holds privately
+    without shared storage; compact_bytes is the size of the mapped files
+    every worker shares when SHARED_MODELS=1.
+    """
+    with _reports_lock:
+        models = {name: dict(report) for name, report in _reports.items()}
+    return {
+        "shared_models": shared_models_enabled(),
+        "models": models,
+        "private_bytes": sum(report["private_bytes"] for report in models.values()),
+        "process": _process_memory(),
+    }
@@ -0,0 +1,479 @@
+"""
+Telemetry Aggregator
+Per-trip running statistics over raw vehicle samples, turned into the
+trip-level features the driving style model takes
+
+Vehicles upload their samples in batches while a trip is in progress. Each
+open trip keeps a fixed handful of numbers (Welford mean and variance of
+the acceleration magnitude, max speed, integrated distance and time,
+deceleration total, hard braking count), so memory per trip stays the same
+however long the trip runs. Trips are locked one at a time, so uploads for
+different trips never wait on each other.
+
+TelemetryStore keeps trips in this process. Under a pre-fork server a
+trip's uploads land on different workers, so FileTelemetryStore keeps each
+trip's state in a small file in a directory the workers share
+(TELEMETRY_DIR, which gunicorn.conf.py sets up), updated under a
+cross-process file lock.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Deceleration (m/s^2) at or above which a braking event is counted
+HARD_BRAKE = float(os.getenv("TELEMETRY_HARD_BRAKE", "3.0"))
+# Gaps between samples longer than this (seconds) are not integrated into
+# distance or driving time: the vehicle was parked or out of coverage
+MAX_GAP_S = float(os.getenv("TELEMETRY_MAX_GAP", "5"))
+# Trips without an upload for this long are dropped
+TRIP_TTL = float(os.getenv("TELEMETRY_TRIP_TTL", "1800"))
+MAX_TRIPS = int(os.getenv("TELEMETRY_MAX_TRIPS", "10000"))
+MAX_SAMPLES = int(os.getenv("TELEMETRY_MAX_SAMPLES", "6000"))
+
+SAMPLE_FIELDS = ("t", "speed", "accel", "elevation")
+
+Sample = Tuple[float, float, float, Optional[float]]
+
+
+class TripClosedError(RuntimeError):
+    """Samples arrived for a trip that has already ended or expired."""
+
+
+class TripLimitError(RuntimeError):
+    """Too many trips are open to start another one."""
+
+
+def _number(value: Any, field: str, required: bool = True) -> Optional[float]:
+    if value is None:
+        if required:
+            raise ValueError(f"missing {field}")
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{field} must be a number")
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{field} must be finite")
+    return value
+
+
+def parse_samples(body: Any) -> Tuple[List[Sample], List[Dict[str, Any]]]:
+    """Validate uploaded samples.
+
+    Accepts a list of {"t", "speed", "accel", "elevation"} objects, or the
+    same fields as equal-length arrays ({"t": [...], "speed": [...], ...}),
+    which is much smaller on the wire. t is the sample time in seconds on
+    the vehicle's clock and is required: it is what lets a retried upload
+    be recognised. speed is in km/h, accel is longitudinal acceleration in
+    m/s^2 and elevation (m) is optional. Returns the valid samples in order
+    and one error per invalid one.
+    """
+    if isinstance(body, dict):
+        columns = {field: body[field] for field in SAMPLE_FIELDS if field in body}
+        if not all(isinstance(values, list) for values in columns.values()):
+            raise ValueError("Sample columns must be arrays")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Sample columns must all have the same length")
+        count = lengths.pop() if lengths else 0
+        body = [{field: values[i] for field, values in columns.items()} for i in range(count)]
+    if not isinstance(body, list):
+        raise ValueError("samples must be an array of objects or an object of arrays")
+    if len(body) > MAX_SAMPLES:
+        raise ValueError(f"Too many samples: {len(body)} (max {MAX_SAMPLES})")
+
+    samples: List[Sample] = []
+    errors: List[Dict[str, Any]] = []
+    for index, raw in enumerate(body):
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("sample must be an object")
+            speed = _number(raw.get("speed"), "speed")
+            if speed < 0:
+                raise ValueError("speed must not be negative")
+            samples.append((
+                _number(raw.get("t"), "t"),
+                speed,
+                _number(raw.get("accel"), "accel"),
+                _number(raw.get("elevation"), "elevation", required=False),
+            ))
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+    return samples, errors
+
+
+class TripAccumulator:
+    """Running statistics for one trip, updated one sample at a time."""
+
+    __slots__ = (
+        "trip_id", "started_at", "touched_at", "closed", "_lock",
+        "samples", "out_of_order", "_accel_mean", "_accel_m2", "_decel_total",
+        "braking_events", "_braking", "max_speed", "_speed_total",
+        "distance_km", "driving_s", "elevation_gain_m",
+        "_last_t", "_last_speed", "_last_elevation",
+    )
+
+    def __init__(self, trip_id: str):
+        self.trip_id = trip_id
+        self.started_at = self.touched_at = time.time()
+        self.closed = False
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.out_of_order = 0
+        # Welford's mean and sum of squared deviations of |accel|
+        self._accel_mean = 0.0
+        self._accel_m2 = 0.0
+        self._decel_total = 0.0
+        self.braking_events = 0
+        self._braking = False
+        self.max_speed = 0.0
+        self._speed_total = 0.0
+        self.distance_km = 0.0
+        self.driving_s = 0.0
+        self.elevation_gain_m = 0.0
+        self._last_t: Optional[float] = None
+        self._last_speed = 0.0
+        self._last_elevation: Optional[float] = None
+
+    def state(self) -> Dict[str, Any]:
+        """Every running statistic, as JSON-friendly values."""
+        with self._lock:
+            return {name: getattr(self, name) for name in _STATE_FIELDS}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "TripAccumulator":
+        trip = cls(state["trip_id"])
+        for name in _STATE_FIELDS:
+            if name in state:
+                setattr(trip, name, state[name])
+        return trip
+
+    def add(self, samples: Iterable[Sample]) -> int:
+        """Fold samples in, in order; returns how many were accepted.
+
+        Samples not later than the last one accepted (a retried upload, or
+        batches sent out of order) are skipped.
+        """
+        with self._lock:
+            if self.closed:
+                raise TripClosedError(f"Trip {self.trip_id} has already ended")
+            accepted = 0
+            for t, speed, accel, elevation in samples:
+                if self._fold(t, speed, accel, elevation):
+                    accepted += 1
+            return accepted
+
+    def _fold(self, t: float, speed: float, accel: float, elevation: Optional[float]) -> bool:
+        last_t = self._last_t
+        if last_t is not None:
+            dt = t - last_t
+            if dt <= 0:
+                self.out_of_order += 1
+                return False
+            if dt <= MAX_GAP_S:
+                self.driving_s += dt
+                self.distance_km += (speed + self._last_speed) / 2 * dt / 3600
+
+        self.samples += 1
+        magnitude = abs(accel)
+        delta = magnitude - self._accel_mean
+        self._accel_mean += delta / self.samples
+        self._accel_m2 += delta * (magnitude - self._accel_mean)
+
+        if accel < 0:
+            self._decel_total -= accel
+        braking = -accel >= HARD_BRAKE
+        if braking and not self._braking:
+            self.braking_events += 1
+        self._braking = braking
+
+        self.max_speed = max(self.max_speed, speed)
+        self._speed_total += speed
+        if elevation is not None:
+            if self._last_elevation is not None and elevation > self._last_elevation:
+                self.elevation_gain_m += elevation - self._last_elevation
+            self._last_elevation = elevation
+        self._last_t = t
+        self._last_speed = speed
+        return True
+
+    def features(self) -> Dict[str, float]:
+        """The trip so far as /api/driving/predict's numeric inputs.
+
+        acceleration_mean and acceleration_std describe the acceleration
+        magnitude, and braking_intensity is the mean deceleration per
+        sample, matching how the training dataset's columns are scaled.
+        avg_speed is distance over driving time.
+        """
+        with self._lock:
+            if not self.samples:
+                raise ValueError(f"No samples received for trip {self.trip_id}")
+            if self.driving_s > 0:
+                avg_speed = self.distance_km / (self.driving_s / 3600)
+            else:
+                avg_speed = self._speed_total / self.samples
+            variance = self._accel_m2 / (self.samples - 1) if self.samples > 1 else 0.0
+            return {
+                "distance_km": round(self.distance_km, 3),
+                "elevation_gain_m": round(self.elevation_gain_m, 1),
+                "avg_speed": round(avg_speed, 2),
+                "max_speed": round(self.max_speed, 2),
+                "acceleration_mean": round(self._accel_mean, 3),
+                "acceleration_std": round(math.sqrt(variance), 3),
+                "braking_intensity": round(self._decel_total / self.samples, 3),
+                "trip_duration_min": round(self.driving_s / 60, 2),
+            }
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "trip_id": self.trip_id,
+                "samples": self.samples,
+                "out_of_order": self.out_of_order,
+                "braking_events": self.braking_events,
+                "started_at": round(self.started_at, 3),
+                "updated_at": round(self.touched_at, 3),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self.closed = True
+
+
+_STATE_FIELDS = tuple(name for name in TripAccumulator.__slots__ if name != "_lock")
+
+
+class TelemetryStore:
+    """Open trips by id in this process, least recently updated first.
+
+    The store lock only guards the trip table; samples are folded under the
+    trip's own lock, so uploads for different trips run concurrently. As in
+    FileTelemetryStore, an ended trip leaves a marker behind until it
+    expires, so late uploads are refused rather than starting the trip over.
+    """
+
+    def __init__(self, ttl: float = TRIP_TTL, max_trips: int = MAX_TRIPS):
+        self.ttl = ttl
+        self.max_trips = max_trips
+        self._trips: "OrderedDict[str, TripAccumulator]" = OrderedDict()
+        # Ended trip ids by end time, oldest first
+        self._ended_at: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._expired = 0
+        self._ended = 0
+
+    def _expire(self, now: float) -> None:
+        while self._ended_at and now - next(iter(self._ended_at.values())) > self.ttl:
+            self._ended_at.popitem(last=False)
+        while self._trips:
+            trip = next(iter(self._trips.values()))
+            if now - trip.touched_at <= self.ttl:
+                return
+            self._trips.popitem(last=False)
+            trip.close()
+            self._expired += 1
+
+    def open(self, trip_id: str) -> TripAccumulator:
+        """The trip's accumulator, starting the trip on its first upload."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if trip_id in self._ended_at:
+                raise TripClosedError(f"Trip {trip_id} has already ended")
+            trip = self._trips.get(trip_id)
+            if trip is None:
+                if len(self._trips) >= self.max_trips:
+                    raise TripLimitError(f"Too many open trips (max {self.max_trips})")
+                trip = self._trips[trip_id] = TripAccumulator(trip_id)
+            else:
+                self._trips.move_to_end(trip_id)
+            trip.touched_at = now
+            return trip
+
+    def add(self, trip_id: str, samples: List[Sample]) -> Tuple[int, Dict[str, Any]]:
+        """Fold samples into the trip; returns (accepted, trip summary)."""
+        trip = self.open(trip_id)
+        return trip.add(samples), trip.summary()
+
+    def get(self, trip_id: str) -> TripAccumulator:
+        with self._lock:
+            self._expire(time.time())
+            return self._trips[trip_id]
+
+    def end(self, trip_id: str) -> TripAccumulator:
+        """Close the trip; later uploads for it are refused until it expires."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            trip = self._trips.pop(trip_id)
+            self._ended_at[trip_id] = now
+            self._ended += 1
+        trip.close()
+        return trip
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._expire(time.time())
+            return {"open_trips": len(self._trips), "ended": self._ended, "expired": self._expired}
+
+
+class FileTelemetryStore:
+    """Open trips as state files in a directory shared by every worker.
+
+    Each upload locks the trip (one of LOCK_STRIPES lock files, picked by
+    the trip id's hash), reads its state, folds the samples in and writes
+    the state back, so any worker can take any upload. An ended trip leaves
+    a marker behind until it expires, so late uploads are refused rather
+    than starting the trip over.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, directory: str, ttl: float = TRIP_TTL, max_trips: int = MAX_TRIPS):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_trips = max_trips
+        self._swept_at = 0.0
+        os.makedirs(os.path.join(directory, "locks"), exist_ok=True)
+
+    def _paths(self, trip_id: str) -> Tuple[str, str, str]:
+        """(open trip state, ended marker, lock) paths for a trip id."""
+        digest = hashlib.sha1(trip_id.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        stripe = int(digest[:8], 16) % self.LOCK_STRIPES
+        return f"{base}.trip", f"{base}.ended", os.path.join(self.directory, "locks", f"{stripe}.lock")
+
+    @contextmanager
+    def _locked(self, lock_path: str) -> Iterator[None]:
+        import fcntl
+
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _read(self, path: str) -> Optional[TripAccumulator]:
+        try:
+            with open(path) as f:
+                return TripAccumulator.from_state(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, trip: TripAccumulator) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(trip.state(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _count(self, field: str) -> None:
+        with self._locked(os.path.join(self.directory, "locks", "stats.lock")):
+            counts = self._counts()
+            counts[field] += 1
+            path = os.path.join(self.directory, "stats.json")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(counts, f)
+            os.replace(tmp, path)
+
+    def _counts(self) -> Dict[str, int]:
+        try:
+            with open(os.path.join(self.directory, "stats.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"ended": 0, "expired": 0}
+
+    def _open_trips(self) -> int:
+        with os.scandir(self.directory) as entries:
+            return sum(1 for entry in entries if entry.name.endswith(".trip"))
+
+    def _sweep(self, now: float) -> None:
+        """Drop idle trips and old markers, at most once a minute per process."""
+        if now - self._swept_at < min(60.0, self.ttl):
+            return
+        self._swept_at = now
+        with os.scandir(self.directory) as entries:
+            stale = [
+                entry.name for entry in entries
+                if entry.name.endswith((".trip", ".ended")) and now - entry.stat().st_mtime > self.ttl
+            ]
+        for name in stale:
+            trip = self._read(os.path.join(self.directory, name))
+            if trip is None:
+                continue
+            state_path, ended_path, lock_path = self._paths(trip.trip_id)
+            with self._locked(lock_path):
+                for path in (state_path, ended_path):
+                    current = self._read(path)
+                    if current is not None and now - current.touched_at > self.ttl:
+                        self._remove(path)
+                        if path == state_path:
+                            self._count("expired")
+
+    def add(self, trip_id: str, samples: List[Sample]) -> Tuple[int, Dict[str, Any]]:
+        """Fold samples into the trip; returns (accepted, trip summary)."""
+        now = time.time()
+        self._sweep(now)
+        state_path, ended_path, lock_path = self._paths(trip_id)
+        with self._locked(lock_path):
+            ended = self._read(ended_path)
+            if ended is not None and now - ended.touched_at <= self.ttl:
+                raise TripClosedError(f"Trip {trip_id} has already ended")
+            trip = self._read(state_path)
+            if trip is not None and now - trip.touched_at > self.ttl:
+                self._count("expired")
+                trip = None
+            if trip is None:
+                if self._open_trips() >= self.max_trips:
+                    raise TripLimitError(f"Too many open trips (max {self.max_trips})")
+                trip = TripAccumulator(trip_id)
+            trip.touched_at = now
+            accepted = trip.add(samples)
+            self._write(state_path, trip)
+        return accepted, trip.summary()
+
+    def get(self, trip_id: str) -> TripAccumulator:
+        """A copy of the open trip's current state."""
+        state_path, _, lock_path = self._paths(trip_id)
+        with self._locked(lock_path):
+            trip = self._read(state_path)
+        if trip is None or time.time() - trip.touched_at > self.ttl:
+            raise KeyError(trip_id)
+        return trip
+
+    def end(self, trip_id: str) -> TripAccumulator:
+        """Close the trip; later uploads for it are refused until it expires."""
+        state_path, ended_path, lock_path = self._paths(trip_id)
+        with self._locked(lock_path):
+            trip = self._read(state_path)
+            if trip is None or time.time() - trip.touched_at > self.ttl:
+                raise KeyError(trip_id)
+            trip.closed = True
+            trip.touched_at = time.time()
+            self._write(ended_path, trip)
+            self._remove(state_path)
+        self._count("ended")
+        return trip
+
+    def stats(self) -> Dict[str, int]:
+        self._sweep(time.time())
+        return {"open_trips": self._open_trips(), **self._counts()}
+
+
+def store_from_env() -> Any:
+    """A FileTelemetryStore in TELEMETRY_DIR when set, else an in-process store."""
+    directory = os.getenv("TELEMETRY_DIR")
+    return FileTelemetryStore(directory) if directory else TelemetryStore()
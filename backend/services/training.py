@@ -0,0 +1,364 @@
+"""
+Training Pipeline
+Builds every model from the CSVs in backend/data, with cached parsed
+datasets and cross-validation splits, and writes versioned artifacts
+"""
+
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, r2_score
+from sklearn.model_selection import KFold, StratifiedKFold
+from sklearn.preprocessing import LabelEncoder
+
+from services.dataset_cache import load_dataset
+from services.model_store import dataset_checksum, save_artifact
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
+CACHE_DIR = os.path.join(BACKEND_DIR, ".cache")
+
+
+# -----------------------------
+# Split cache
+
+def _cache_path(kind: str, filename: str) -> str:
+    directory = os.path.join(CACHE_DIR, kind)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+
+def _atomic_write(path: str, write: Callable[[Any], None]) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def cv_splits(
+    name: str,
+    checksum: str,
+    y: np.ndarray,
+    folds: int,
+    seed: int,
+    stratified: bool = False,
+) -> List[Dict[str, np.ndarray]]:
+    """Train/test index pairs for K-fold CV, cached per dataset checksum."""
+    kind = "stratified" if stratified else "kfold"
+    cached = _cache_path("splits", f"{name}-{checksum[:16]}-{kind}{folds}-seed{seed}-n{len(y)}.npz")
+
+    if os.path.exists(cached):
+        try:
+            with np.load(cached) as data:
+                return [{"train": data[f"train_{i}"], "test": data[f"test_{i}"]} for i in range(folds)]
+        except Exception:
+            pass
+
+    splitter = (StratifiedKFold if stratified else KFold)(n_splits=folds, shuffle=True, random_state=seed)
+    splits = [
+        {"train": train.astype(np.int32), "test": test.astype(np.int32)}
+        for train, test in splitter.split(np.zeros(len(y)), y)
+    ]
+    arrays = {}
+    for i, split in enumerate(splits):
+        arrays[f"train_{i}"] = split["train"]
+        arrays[f"test_{i}"] = split["test"]
+    _atomic_write(cached, lambda f: np.savez(f, **arrays))
+    return splits
+
+
+# -----------------------------
+# Per-model preparation
+#
+# Each prepare function turns the raw frame into the feature matrix, target
+# and encoders the serving controller expects.
+
+def _prepare_energy(df: pd.DataFrame) -> Dict[str, Any]:
+    encoders = {}
+    for col in ["driving_style", "road_type", "weather"]:
+        encoders[col] = LabelEncoder()
+        df[col + "_encoded"] = encoders[col].fit_transform(df[col])
+
+    feature_columns = ["distance_km", "elevation_gain_m", "avg_speed",
+                       "driving_style_encoded", "road_type_encoded", "weather_encoded"]
+    return {
+        "X": df[feature_columns],
+        "y": df["energy_consumed_kWh"],
+        "feature_columns": feature_columns,
+        "encoders": encoders,
+    }
+
+
+def _prepare_battery(df: pd.DataFrame) -> Dict[str, Any]:
+    feature_columns = ["battery_capacity_kWh", "battery_start_%", "eff_kWh_per_km"]
+    return {
+        "X": df[feature_columns],
+        "y": df["predicted_remaining_km"],
+        "feature_columns": feature_columns,
+    }
+
+
+DRIVING_NUMERIC_COLS = [
+    "distance_km", "elevation_gain_m", "avg_speed", "max_speed",
+    "acceleration_mean", "acceleration_std", "braking_intensity", "trip_duration_min",
+]
+DRIVING_CATEGORICAL_COLS = ["vehicle_make", "vehicle_model", "road_type", "weather", "time_of_day"]
+
+
+def _prepare_driving(df: pd.DataFrame) -> Dict[str, Any]:
+    # As in driving_style.ipynb: cap outliers at the 99th percentile and
+    # one-hot encode with drop_first
+    for col in DRIVING_NUMERIC_COLS:
+        df[col] = df[col].clip(upper=df[col].quantile(0.99))
+
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(df["driving_style"])
+    X = pd.get_dummies(df[DRIVING_NUMERIC_COLS + DRIVING_CATEGORICAL_COLS],
+                       columns=DRIVING_CATEGORICAL_COLS, drop_first=True, dtype=float)
+    return {
+        "X": X,
+        "y": y,
+        "feature_columns": X.columns.tolist(),
+        "encoders": {"driving_style": label_encoder},
+    }
+
+
+OPTIMAL_PATH_FEATURES = [
+    "distance_km", "road_type", "traffic_level", "weather", "driving_style",
+    "predicted_energy_kWh", "predicted_range_km", "battery_remaining_percent",
+]
+
+
+def _prepare_optimal_path(df: pd.DataFrame) -> Dict[str, Any]:
+    # As in Optimal_path_finder.ipynb: drop travel-time outliers (1.5 IQR),
+    # then label encode the categoricals
+    target = df["expected_travel_time_min"]
+    q1, q3 = target.quantile(0.25), target.quantile(0.75)
+    iqr = q3 - q1
+    df = df[(target >= q1 - 1.5 * iqr) & (target <= q3 + 1.5 * iqr)].copy()
+
+    encoders = {}
+    for col in ["road_type", "traffic_level", "weather", "driving_style"]:
+        encoders[col] = LabelEncoder()
+        df[col] = encoders[col].fit_transform(df[col])
+    return {
+        "X": df[OPTIMAL_PATH_FEATURES],
+        "y": df["expected_travel_time_min"],
+        "feature_columns": list(OPTIMAL_PATH_FEATURES),
+        "encoders": encoders,
+    }
+
+
+def _n_jobs_kwargs(estimator_cls: Any, n_jobs: Optional[int]) -> Dict[str, Any]:
+    return {"n_jobs": n_jobs} if "n_jobs" in estimator_cls().get_params() else {}
+
+
+MODEL_SPECS: Dict[str, Dict[str, Any]] = {
+    "energy": {
+        "artifact": "energy_consumption_rf",
+        "dataset": "energy_consumption_dataset_srilanka.csv",
+        "prepare": _prepare_energy,
+        "columns": ["distance_km", "driving_style", "road_type", "weather",
+                    "elevation_gain_m", "avg_speed", "energy_consumed_kWh"],
+        "estimator": RandomForestRegressor,
+        "params": {"n_estimators": 100, "random_state": 42, "max_depth": 10},
+        "task": "regression",
+    },
+    "battery": {
+        "artifact": "battery_range_rf",
+        "dataset": "battery_range_dataset_srilanka.csv",
+        "prepare": _prepare_battery,
+        "columns": ["battery_capacity_kWh", "battery_start_%", "eff_kWh_per_km", "predicted_remaining_km"],
+        "estimator": RandomForestRegressor,
+        "params": {"n_estimators": 100, "random_state": 42, "max_depth": 10},
+        "task": "regression",
+    },
+    "driving": {
+        "artifact": "driving_style_rf",
+        "dataset": "driving_style_dataset_srilanka.csv",
+        "prepare": _prepare_driving,
+        "columns": DRIVING_NUMERIC_COLS + DRIVING_CATEGORICAL_COLS + ["driving_style"],
+        "estimator": RandomForestClassifier,
+        "params": {"random_state": 42},
+        "task": "classification",
+    },
+    "optimal_path": {
+        "artifact": "optimal_path_gbr",
+        "dataset": "optimal_route_time_dataset_srilanka.csv",
+        "prepare": _prepare_optimal_path,
+        "columns": OPTIMAL_PATH_FEATURES + ["expected_travel_time_min"],
+        "estimator": GradientBoostingRegressor,
+        "params": {"random_state": 100},
+        "task": "regression",
+    },
+}
+
+
+# -----------------------------
+# Training
+
+def dataset_path(name: str) -> str:
+    return os.path.join(DATA_DIR, MODEL_SPECS[name]["dataset"])
+
+
+def _build_estimator(spec: Dict[str, Any], n_jobs: Optional[int]) -> Any:
+    estimator_cls = spec["estimator"]
+    return estimator_cls(**spec["params"], **_n_jobs_kwargs(estimator_cls, n_jobs))
+
+
+def _score(task: str, y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    if task == "classification":
+        return {
+            "accuracy": float(accuracy_score(y_true, y_pred)),
+            "f1_macro": float(f1_score(y_true, y_pred, average="macro")),
+        }
+    return {
+        "r2": float(r2_score(y_true, y_pred)),
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+    }
+
+
+def score_predictions(name: str, y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    """Metrics for a model's predictions: r2/mae or accuracy/f1_macro."""
+    return _score(MODEL_SPECS[name]["task"], y_true, y_pred)
+
+
+def prepare_dataset(name: str, path: Optional[str] = None, checksum: Optional[str] = None) -> Dict[str, Any]:
+    """Load a model's dataset and run its prepare step (X, y, feature_columns, encoders)."""
+    spec = MODEL_SPECS[name]
+    path = path or dataset_path(name)
+    return spec["prepare"](load_dataset(path, spec["columns"], checksum or dataset_checksum(path)))
+
+
+def fit_estimator(name: str, X: Any, y: np.ndarray, n_jobs: Optional[int] = None) -> Any:
+    """Fit a fresh estimator for a model, ready to serve."""
+    model = _build_estimator(MODEL_SPECS[name], n_jobs)
+    model.fit(X, y)
+    # Serve with the estimator's default parallelism, not the training pool's
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=None)
+    return model
+
+
+def extend_forest(model: Any, X: Any, y: np.ndarray, n_new_trees: int) -> Any:
+    """Copy of a fitted forest with n_new_trees more trees fit on X, y.
+
+    Uses warm start, so the existing trees are kept as they are and only
+    the new ones see X, y.
+    """
+    extended = copy.deepcopy(model)
+    extended.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees)
+    extended.fit(X, y)
+    extended.set_params(warm_start=False)
+    return extended
+
+
+def fit_model(
+    name: str,
+    folds: int = 0,
+    seed: int = 42,
+    n_jobs: Optional[int] = None,
+    checksum: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Fit one model on its full dataset, optionally scoring K-fold CV first.
+
+    Returns the dict load_or_train expects: model, feature_columns,
+    encoders and metrics (mean and per-fold CV scores).
+    """
+    spec = MODEL_SPECS[name]
+    path = dataset_path(name)
+    checksum = checksum or dataset_checksum(path)
+    prepared = prepare_dataset(name, path, checksum)
+    X = prepared["X"]
+    y = np.asarray(prepared["y"])
+
+    metrics: Dict[str, Any] = {"rows": int(len(y))}
+    if folds >= 2:
+        splits = cv_splits(name, checksum, y, folds, seed, stratified=spec["task"] == "classification")
+        scores = []
+        for split in splits:
+            model = _build_estimator(spec, n_jobs)
+            model.fit(X.iloc[split["train"]], y[split["train"]])
+            scores.append(_score(spec["task"], y[split["test"]], model.predict(X.iloc[split["test"]])))
+        metrics["cv_folds"] = folds
+        metrics["cv"] = {key: float(np.mean([s[key] for s in scores])) for key in scores[0]}
+        metrics["cv_per_fold"] = scores
+
+    model = fit_estimator(name, X, y, n_jobs)
+
+    return {
+        "model": model,
+        "feature_columns": prepared["feature_columns"],
+        "encoders": prepared.get("encoders", {}),
+        "metrics": metrics,
+    }
+
+
+def train_model(name: str, folds: int = 5, seed: int = 42, n_jobs: Optional[int] = None) -> Dict[str, Any]:
+    """Train one model and write its artifact; returns a summary for the CLI."""
+    path = dataset_path(name)
+    if not os.path.exists(path):
+        return {"name": name, "status": "skipped", "reason": f"Dataset not found: {os.path.basename(path)}"}
+
+    start = time.perf_counter()
+    checksum = dataset_checksum(path)
+    trained = fit_model(name, folds=folds, seed=seed, n_jobs=n_jobs, checksum=checksum)
+    trained["metrics"]["train_seconds"] = round(time.perf_counter() - start, 2)
+
+    save_artifact(
+        MODEL_SPECS[name]["artifact"],
+        trained["model"],
+        path,
+        feature_columns=trained["feature_columns"],
+        encoders=trained["encoders"],
+        metrics=trained["metrics"],
+        checksum=checksum,
+    )
+    return {
+        "name": name,
+        "status": "trained",
+        "artifact": MODEL_SPECS[name]["artifact"],
+        "metrics": trained["metrics"],
+    }
+
+
+def train_all(
+    names: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+    folds: int = 5,
+    seed: int = 42,
+) -> List[Dict[str, Any]]:
+    """Train independent models concurrently in a process pool.
+
+    The CPU cores are split between the concurrently running models so that
+    tree fitting inside each worker still uses every core overall.
+    """
+    names = list(names or MODEL_SPECS)
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or len(names), len(names)))
+    n_jobs = max(1, cpus // workers)
+
+    results = {}
+    if workers == 1:
+        for name in names:
+            try:
+                results[name] = train_model(name, folds, seed, n_jobs)
+            except Exception as e:
+                results[name] = {"name": name, "status": "failed", "reason": str(e)}
+        return [results[name] for name in names]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(train_model, name, folds, seed, n_jobs): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {"name": name, "status": "failed", "reason": str(e)}
+    return [results[name] for name in names]
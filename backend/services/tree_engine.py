@@ -0,0 +1,289 @@
+"""
+Compiled Tree Ensemble Engine
+Flattens fitted scikit-learn tree ensembles into contiguous NumPy node arrays
+and evaluates single rows and small batches without sklearn's per-call
+validation and joblib dispatch
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+
+# Rows evaluated per traversal pass; bounds the (n_trees, rows) index arrays
+CHUNK_ROWS = 2048
+
+# Above this many rows sklearn's multi-threaded Cython traversal wins, so
+# predict_with hands larger batches back to the estimator
+SMALL_BATCH_ROWS = 128
+
+
+def _index_dtype(size: int) -> np.dtype:
+    """Smallest unsigned integer type that indexes an array of this size."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if size <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class CompiledForest:
+    """A tree ensemble as flat node arrays.
+
+    Every tree's nodes are concatenated into shared arrays (feature,
+    threshold, left, right, value) and each tree is identified by its root
+    offset. Leaves point to themselves, so all rows can be walked for a
+    fixed `max_depth` steps in lock-step across every tree at once.
+
+    Prediction is `baseline + scale * sum(tree leaf values)`, accumulated
+    tree by tree in the same order sklearn uses so results match exactly:
+    - random forest: baseline 0, scale 1 / n_trees applied after the sum
+    - gradient boosting: baseline init_ prediction, scale learning_rate per tree
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        missing_left: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        kind: str,
+        scale: float = 1.0,
+        baseline: float = 0.0,
+        relative_children: bool = False,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.kind = kind
+        self.scale = scale
+        self.baseline = baseline
+        # Compact forests store child indexes relative to their tree's root
+        self.relative_children = relative_children
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays().values())
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "missing_left": self.missing_left,
+            "roots": self.roots,
+        }
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "kind": self.kind,
+            "scale": self.scale,
+            "baseline": self.baseline,
+            "relative_children": self.relative_children,
+        }
+
+    def compact(self) -> "CompiledForest":
+        """Return the same forest with narrowed node arrays.
+
+        Thresholds become float32, rounded down: inputs are float32, and for
+        any float32 x, x <= t exactly when x <= the largest float32 not above
+        t, so predictions are unchanged. Child indexes are stored relative
+        to their tree's root, so they fit the size of the largest tree rather
+        than the whole forest; they and the feature indexes use the smallest
+        integer type that holds them. Leaf values stay float64.
+        """
+        if self.relative_children:
+            return self
+
+        threshold = self.threshold.astype(np.float32)
+        above = threshold.astype(np.float64) > self.threshold
+        threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+
+        tree_of_node = np.repeat(np.arange(self.n_trees), np.diff(np.append(self.roots, self.n_nodes)))
+        base = self.roots[tree_of_node]
+        tree_sizes = np.diff(np.append(self.roots, self.n_nodes))
+        child_dtype = _index_dtype(int(tree_sizes.max()) if len(tree_sizes) else 0)
+
+        return CompiledForest(
+            feature=self.feature.astype(_index_dtype(self.n_features)),
+            threshold=threshold,
+            left=(self.left - base).astype(child_dtype),
+            right=(self.right - base).astype(child_dtype),
+            value=self.value,
+            missing_left=self.missing_left,
+            roots=self.roots.astype(_index_dtype(self.n_nodes)),
+            **{**self.params(), "relative_children": True},
+        )
+
+    @classmethod
+    def from_trees(cls, trees: List[Any], n_features: int, kind: str, scale: float = 1.0, baseline: float = 0.0) -> "CompiledForest":
+        features, thresholds, lefts, rights, values, missing, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for tree in trees:
+            t = tree.tree_
+            n = t.node_count
+            node_ids = np.arange(n, dtype=np.int32)
+            is_leaf = t.children_left == -1
+
+            features.append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+            # Leaves compare against +inf and loop back to themselves
+            thresholds.append(np.where(is_leaf, np.inf, t.threshold).astype(np.float64))
+            lefts.append((np.where(is_leaf, node_ids, t.children_left) + offset).astype(np.int32))
+            rights.append((np.where(is_leaf, node_ids, t.children_right) + offset).astype(np.int32))
+            values.append(t.value.reshape(n, -1)[:, 0].astype(np.float64))
+            missing_go_left = getattr(t, "missing_go_to_left", None)
+            missing.append(
+                (np.asarray(missing_go_left, dtype=bool) | is_leaf) if missing_go_left is not None else is_leaf.copy()
+            )
+            roots.append(offset)
+
+            offset += n
+            max_depth = max(max_depth, t.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            missing_left=np.concatenate(missing),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features=n_features,
+            kind=kind,
+            scale=scale,
+            baseline=baseline,
+        )
+
+    def leaf_values(self, X: Any) -> np.ndarray:
+        """Return leaf values as an (n_trees, n_rows) array."""
+        # sklearn evaluates trees on float32 inputs; match it exactly
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features}")
+
+        flat = X.astype(np.float64).ravel()
+        row_offsets = (np.arange(X.shape[0], dtype=np.int64) * self.n_features)[None, :]
+
+        roots = self.roots.astype(np.int64)[:, None]
+        node = np.repeat(roots, X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.missing_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+            if self.relative_children:
+                node = node + roots
+
+        return self.value[node]
+
+    def predict(self, X: Any) -> np.ndarray:
+        X = np.asarray(X)
+        if X.ndim == 2 and X.shape[0] > CHUNK_ROWS:
+            return np.concatenate([
+                self._predict_chunk(X[start:start + CHUNK_ROWS])
+                for start in range(0, X.shape[0], CHUNK_ROWS)
+            ])
+        return self._predict_chunk(X)
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.leaf_values(X)
+        if self.kind == "gradient_boosting":
+            # Stage-wise: baseline + lr * v1 + lr * v2 + ... (sequential over axis 0)
+            stages = np.empty((leaves.shape[0] + 1, leaves.shape[1]), dtype=np.float64)
+            stages[0] = self.baseline
+            np.multiply(leaves, self.scale, out=stages[1:])
+            return np.add.accumulate(stages, axis=0)[-1]
+        # accumulate is strictly sequential, unlike sum's pairwise reduction
+        total = np.add.accumulate(leaves, axis=0)[-1]
+        if self.kind == "random_forest":
+            total /= self.n_trees
+        return total
+
+
+def compile_model(model: Any) -> Optional[CompiledForest]:
+    """Compile a fitted regressor, or return None if it is not supported.
+
+    Supports RandomForestRegressor, single-output DecisionTreeRegressor and
+    GradientBoostingRegressor with an identity link and constant init.
+    """
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is None:
+        return None
+
+    if isinstance(model, RandomForestRegressor):
+        if getattr(model, "n_outputs_", 1) != 1:
+            return None
+        return CompiledForest.from_trees(model.estimators_, n_features, "random_forest")
+
+    if isinstance(model, DecisionTreeRegressor):
+        if model.n_outputs_ != 1:
+            return None
+        return CompiledForest.from_trees([model], n_features, "tree")
+
+    if isinstance(model, GradientBoostingRegressor):
+        if model.loss not in ("squared_error", "absolute_error", "huber", "quantile"):
+            return None
+        if model.init_ == "zero":
+            baseline = 0.0
+        else:
+            baseline = getattr(model.init_, "constant_", None)
+            if baseline is None:
+                return None
+            baseline = float(np.asarray(baseline, dtype=np.float64).ravel()[0])
+        return CompiledForest.from_trees(
+            list(model.estimators_[:, 0]),
+            n_features,
+            "gradient_boosting",
+            scale=float(model.learning_rate),
+            baseline=baseline,
+        )
+
+    return None
+
+
+def predict_with(model: Any, compiled: Optional[CompiledForest], X: Any) -> np.ndarray:
+    """Predict with the compiled engine for small inputs, sklearn otherwise."""
+    if compiled is not None and len(X) <= SMALL_BATCH_ROWS:
+        return compiled.predict(X)
+    return model.predict(as_model_input(model, X))
+
+
+def as_model_input(model: Any, X: Any) -> Any:
+    """Label a raw feature matrix with the column names the model was fit on.
+
+    sklearn warns when an estimator fit on a DataFrame receives a bare
+    array; wrapping only at the sklearn boundary keeps encoders array-based.
+    """
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None and isinstance(X, np.ndarray):
+        return pd.DataFrame(X, columns=names)
+    return X
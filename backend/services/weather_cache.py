@@ -0,0 +1,224 @@
+"""
+Weather Cache
+TTL cache for weather lookups keyed by a rounded coordinate bucket, with
+single-flight fetching, stale-while-revalidate and a background refresher
+that keeps known cities warm
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[float, float, str], Dict[str, Any]]
+BucketKey = Tuple[float, float, str]
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value: Dict[str, Any], fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+
+
+class _Flight:
+    """One in-progress upstream fetch that concurrent callers wait on."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class WeatherCache:
+    """Bucketed TTL cache with request coalescing.
+
+    Coordinates are rounded to `precision` decimal places (2 places is about
+    1.1 km), so nearby lookups share an entry. Entries are fresh for `ttl`
+    seconds; for a further `stale_ttl` seconds they are still served while a
+    single background fetch refreshes them.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        stale_ttl: float = 1800.0,
+        precision: int = 2,
+        max_entries: int = 1024,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.precision = precision
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[BucketKey, _Entry]" = OrderedDict()
+        self._inflight: Dict[BucketKey, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "fetches": 0, "errors": 0}
+
+    def bucket(self, lat: float, lon: float, units: str = "metric") -> BucketKey:
+        return (round(float(lat), self.precision), round(float(lon), self.precision), units)
+
+    def get(
+        self,
+        lat: float,
+        lon: float,
+        units: str,
+        fetch: Fetcher,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Return weather for the bucket containing (lat, lon).
+
+        Fetches upstream only on a miss, and only once per bucket no matter
+        how many callers miss concurrently. Upstream errors propagate to
+        every caller waiting on that fetch; a caller that joined someone
+        else's fetch gives up with TimeoutError after `timeout` seconds.
+        """
+        key = self.bucket(lat, lon, units)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    self._refresh_in_background_locked(key, fetch)
+                    return entry.value
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if leader:
+            self._run_flight(key, flight, fetch)
+        elif not flight.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for an in-progress weather fetch")
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def refresh(self, lat: float, lon: float, units: str, fetch: Fetcher) -> None:
+        """Fetch a bucket now (joining any in-progress fetch) and store it."""
+        key = self.bucket(lat, lon, units)
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+        if leader:
+            self._run_flight(key, flight, fetch)
+        else:
+            flight.done.wait()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), inflight=len(self._inflight))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def _refresh_in_background_locked(self, key: BucketKey, fetch: Fetcher) -> None:
+        if key in self._inflight:
+            return
+        flight = _Flight()
+        self._inflight[key] = flight
+        threading.Thread(
+            target=self._run_flight, args=(key, flight, fetch), name="weather-cache-refresh", daemon=True
+        ).start()
+
+    def _run_flight(self, key: BucketKey, flight: _Flight, fetch: Fetcher) -> None:
+        lat, lon, units = key
+        try:
+            value = fetch(lat, lon, units)
+            flight.value = value
+            with self._lock:
+                self._stats["fetches"] += 1
+                self._entries[key] = _Entry(value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+
+class WeatherRefresher:
+    """Daemon thread that periodically refreshes a fixed set of locations."""
+
+    def __init__(
+        self,
+        cache: WeatherCache,
+        fetch: Fetcher,
+        locations: Iterable[Tuple[float, float]],
+        interval: Optional[float] = None,
+        units: str = "metric",
+    ):
+        self.cache = cache
+        self.fetch = fetch
+        self.locations = list(locations)
+        # Refresh well inside the TTL so entries never go stale
+        self.interval = interval if interval is not None else max(1.0, cache.ttl / 2)
+        self.units = units
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "WeatherRefresher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weather-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def refresh_all(self) -> None:
+        for lat, lon in self.locations:
+            if self._stop.is_set():
+                return
+            try:
+                self.cache.refresh(lat, lon, self.units, self.fetch)
+            except Exception as e:
+                logger.warning("Weather refresh failed for (%s, %s): %s", lat, lon, e)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh_all()
+            self._stop.wait(self.interval)
+
+
+def cache_from_env() -> WeatherCache:
+    """Build a WeatherCache configured from WEATHER_CACHE_* environment variables."""
+    return WeatherCache(
+        ttl=float(os.getenv("WEATHER_CACHE_TTL", "600")),
+        stale_ttl=float(os.getenv("WEATHER_CACHE_STALE_TTL", "1800")),
+        precision=int(os.getenv("WEATHER_CACHE_PRECISION", "2")),
+        max_entries=int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "1024")),
+    )
@@ -0,0 +1,174 @@
+"""
+Tests for the /predict-batch endpoints
+"""
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+def test_energy_batch_matches_single_predictions(client):
+    records = [
+        {"distance_km": 50, "driving_style": "Normal", "road_type": "city", "weather": "sunny"},
+        {"distance_km": 120, "driving_style": "Aggressive", "road_type": "highway", "weather": "monsoon"},
+    ]
+    body = client.post("/api/energy/predict-batch", json=records).get_json()
+
+    assert body["count"] == 2 and body["failed"] == 0
+    for record, result in zip(records, body["results"]):
+        single = client.post("/api/energy/predict", json=record).get_json()
+        assert result["predicted_energy_kWh"] == single["predicted_energy_kWh"]
+
+
+def test_battery_batch_reports_errors_per_row(client):
+    good = {"battery_capacity_kWh": 50, "battery_percent": 80, "efficiency_kWh_per_km": 0.17}
+    body = client.post("/api/battery/predict-batch", json={"records": [good, {"battery_percent": 10}, good]}).get_json()
+
+    results = body["results"]
+    assert [r["success"] for r in results] == [True, False, True]
+    assert "Missing required fields" in results[1]["error"]
+    assert results[0]["predicted_range_km"] == results[2]["predicted_range_km"]
+
+
+def test_batch_rejects_non_array_body(client):
+    response = client.post("/api/optimal-path/predict-batch", json={"distance_km": 10})
+    assert response.status_code == 400
+
+
+def test_rank_routes_scores_every_candidate_in_one_call(client):
+    routes = [
+        {"route_id": "A", "distance_km": 60, "predicted_energy_kWh": 11.0, "traffic_level": "high"},
+        {"route_id": "B", "distance_km": 48, "predicted_energy_kWh": 8.0},
+        {"route_id": "C", "distance_km": 75, "predicted_energy_kWh": 13.5, "road_type": "highway"},
+        {"route_id": "D", "distance_km": 50},
+    ]
+    shared = {"driving_style": "Normal", "predicted_range_km": 200, "battery_remaining_percent": 80, "weather": "sunny"}
+    body = client.post("/api/optimal-path/rank", json={**shared, "routes": routes}).get_json()
+
+    assert body["count"] == 3
+    assert [f["route_id"] for f in body["failed"]] == ["D"]
+    scores = [r["objective_score"] for r in body["routes"]]
+    assert scores == sorted(scores)
+    assert body["optimal_route"]["is_optimal"] and body["optimal_route"]["rank"] == 1
+
+    for ranked in body["routes"]:
+        route = next(r for r in routes if r["route_id"] == ranked["route_id"])
+        single = client.post("/api/optimal-path/predict", json={
+            **shared, "road_type": "city", "traffic_level": "medium",
+            **{k: v for k, v in route.items() if k != "route_id"},
+        }).get_json()
+        assert ranked["predicted_travel_time_min"] == pytest.approx(single["predicted_travel_time_min"])
+        assert ranked["objective_score"] == pytest.approx(
+            0.7 * route["predicted_energy_kWh"] + 0.3 * single["predicted_travel_time_min"] / 60, abs=1e-4
+        )
+
+
+def test_rank_routes_requires_routes(client):
+    assert client.post("/api/optimal-path/rank", json={"routes": []}).status_code == 400
+
+
+def test_battery_sweep_matches_batch_predictions(client):
+    body = client.post("/api/battery/sweep", json={
+        "battery_capacity_kWh": [40, 60],
+        "battery_percent": {"min": 20, "max": 100, "step": 40},
+        "efficiency_kWh_per_km": {"min": 0.12, "max": 0.2, "steps": 3},
+    }).get_json()
+
+    assert body["shape"] == [2, 3, 3]
+    assert body["axes"]["battery_percent"] == [20, 60, 100]
+    assert len(body["predicted_range_km"]) == len(body["theoretical_range_km"]) == 18
+
+    records = [
+        {"battery_capacity_kWh": c, "battery_percent": p, "efficiency_kWh_per_km": e}
+        for c in body["axes"]["battery_capacity_kWh"]
+        for p in body["axes"]["battery_percent"]
+        for e in body["axes"]["efficiency_kWh_per_km"]
+    ]
+    batch = client.post("/api/battery/predict-batch", json=records).get_json()["results"]
+    assert body["predicted_range_km"] == [r["predicted_range_km"] for r in batch]
+    assert body["theoretical_range_km"] == [r["theoretical_range_km"] for r in batch]
+
+
+def test_battery_sweep_caps_grid_size(client):
+    response = client.post("/api/battery/sweep", json={
+        "battery_capacity_kWh": {"min": 30, "max": 100, "steps": 200},
+        "battery_percent": {"min": 0, "max": 100, "steps": 200},
+        "efficiency_kWh_per_km": 0.17,
+    })
+    assert response.status_code == 413
+
+
+def test_battery_sweep_rejects_an_oversized_axis_as_too_large(client):
+    from controllers.battery_range_controller import MAX_SWEEP_POINTS
+
+    for axis in ({"min": 0, "max": 100, "steps": MAX_SWEEP_POINTS + 1}, {"min": 0, "max": 100, "step": 1e-6}):
+        response = client.post("/api/battery/sweep", json={
+            "battery_capacity_kWh": 60,
+            "battery_percent": axis,
+            "efficiency_kWh_per_km": 0.17,
+        })
+        assert response.status_code == 413
+        assert response.get_json()["max_points"] == MAX_SWEEP_POINTS
+
+
+@pytest.fixture
+def driving_model(monkeypatch, tmp_path):
+    """Install a small classifier trained on random features as the driving model."""
+    import pickle
+
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import LabelEncoder
+
+    from controllers import driving_script_controller as driving
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(0.0, index=range(300), columns=driving.EXPECTED_COLUMNS)
+    X["distance_km"] = rng.uniform(0, 100, 300)
+    names = np.array(["Calm", "Eco", "Sport"])
+    encoder = LabelEncoder().fit(names)
+    y = encoder.transform(names[(X["distance_km"] // 34).astype(int)])
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+
+    path = tmp_path / "driving_style.pkl"
+    path.write_bytes(pickle.dumps({"model": model, "encoders": {"driving_style": encoder}}))
+    monkeypatch.setattr(driving, "MODEL_PATH", str(path))
+    monkeypatch.setattr(driving, "DATA_PATH", str(tmp_path / "missing.csv"))
+    monkeypatch.setattr(driving._slot, "_current", None)
+    return driving
+
+
+def test_driving_batch_classifies_in_one_pass(driving_model, monkeypatch):
+    model = driving_model._get_model().model
+    calls = []
+    monkeypatch.setattr(model, "predict", lambda X: calls.append("predict"))
+    predict_proba = model.predict_proba
+    monkeypatch.setattr(model, "predict_proba", lambda X: calls.append("predict_proba") or predict_proba(X))
+
+    records = [{"distance_km": d, "road_type": "highway", "weather": "sunny"} for d in (5, 50, 95)]
+    results = driving_model.predict_driving_style_batch(records + ["bad"])
+
+    assert calls == ["predict_proba"]
+    assert results[3]["success"] is False
+    assert [r["predicted_driving_style"] for r in results[:3]] == ["Calm", "Eco", "Sport"]
+    for result in results[:3]:
+        distribution = result["probabilities"]
+        assert set(distribution) == {"Calm", "Eco", "Sport"}
+        assert sum(distribution.values()) == pytest.approx(1.0)
+        assert result["confidence_score"] == max(distribution.values())
+        assert distribution[result["predicted_driving_style"]] == result["confidence_score"]
+
+
+def test_driving_single_matches_batch(driving_model):
+    record = {"distance_km": 60, "avg_speed": 70, "vehicle_make": "Tesla", "time_of_day": "night"}
+
+    single = driving_model.predict_driving_style_controller(record)
+    batch = driving_model.predict_driving_style_batch([record])[0]
+
+    assert single == batch
+    assert single["predicted_driving_style"] == "Eco"
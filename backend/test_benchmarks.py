@@ -0,0 +1,24 @@
+"""
+Tests for the benchmark baseline comparison
+"""
+from benchmarks.run_benchmarks import compare
+
+
+def test_compare_flags_only_cases_past_the_threshold():
+    baseline = {
+        "energy.controller.single": {"p50_ms": 1.0},
+        "battery.controller.single": {"p50_ms": 1.0},
+        "energy.cold_start": {"first_call_ms": 1000.0},
+    }
+    current = {
+        "energy.controller.single": {"p50_ms": 1.2},
+        "battery.controller.single": {"p50_ms": 1.5},
+        "energy.cold_start": {"first_call_ms": 2000.0},
+        "new.case": {"p50_ms": 9.0},
+    }
+
+    regressions = compare(current, baseline, "p50_ms", 0.25)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("battery.controller.single")
+    assert regressions[1].startswith("energy.cold_start")
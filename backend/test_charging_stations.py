@@ -0,0 +1,103 @@
+"""
+Tests for the charging station index and the /api/charging endpoints
+"""
+import os
+
+os.environ.setdefault("PRELOAD_MODELS", "0")
+
+import pytest
+
+from services.charging_stations import ROUTE_CITY_DISTANCE_KM, StationIndex, load_stations
+
+
+def _row(sid, city, ctype, wait, operational=True):
+    return {
+        "station_id": sid, "name": f"Station {sid}", "city": city, "charger_type": ctype,
+        "num_ports": "2", "avg_wait_min": str(wait), "operational": str(operational),
+    }
+
+
+@pytest.fixture
+def stations():
+    return StationIndex([
+        _row("C1", "Colombo", "AC_7kW", 5),
+        _row("C2", "Colombo", "DC_50kW", 20),
+        _row("C3", "Colombo", "DC_120kW", 2, operational=False),
+        _row("K1", "Kandy", "DC_50kW", 1),
+        _row("G1", "Galle", "AC_22kW", 0),
+    ])
+
+
+def test_recommend_scores_like_the_generated_dataset(stations):
+    ranked = stations.recommend(cities=["colombo"], limit=3)
+    # DC 5 * 0.8 / 1.001 + 2.0, AC 5 / 1.001 + 0.5, offline DC 5 * 0.8 / 0.011 + 0.2
+    assert [s["station_id"] for s in ranked] == ["C1", "C2", "C3"]
+    assert ranked[0]["score"] == pytest.approx(ROUTE_CITY_DISTANCE_KM / 1.001 + 0.5, abs=1e-3)
+    assert ranked[0]["rank"] == 1
+
+
+def test_recommend_filters(stations):
+    dc = stations.recommend(cities=["Colombo", "Kandy"], dc_only=True, operational_only=True, limit=5)
+    assert [s["station_id"] for s in dc] == ["K1", "C2"]
+    typed = stations.recommend(cities=["Colombo"], charger_types=["dc_120kw"])
+    assert [s["station_id"] for s in typed] == ["C3"]
+    assert stations.recommend(cities=["Atlantis"]) == []
+
+
+def test_recommend_near_a_point_uses_city_distance(stations):
+    near_galle = stations.recommend(lat=6.06, lon=80.22, radius_km=10)
+    assert [s["station_id"] for s in near_galle] == ["G1"]
+    assert near_galle[0]["distance_from_route_km"] < 2
+
+    wide = stations.recommend(lat=6.9271, lon=79.8612, radius_km=150, limit=10)
+    assert {s["city"] for s in wide} == {"Colombo", "Kandy", "Galle"}
+
+
+def test_find_intersects_indexes(stations):
+    assert [s["station_id"] for s in stations.find(city="Colombo", operational=True)] == ["C1", "C2"]
+    assert [s["station_id"] for s in stations.find(charger_type="DC_50kW")] == ["C2", "K1"]
+    assert len(stations.find()) == 5
+
+
+def test_master_csv_loads():
+    stations = load_stations()
+    assert len(stations) == 30
+    assert len(stations.by_city) == 10
+
+
+def test_charging_endpoints():
+    from app import create_app
+
+    client = create_app().test_client()
+    ok = client.post("/api/charging/recommend", json={"origin": "Colombo", "destination": "Kandy", "limit": 2})
+    assert ok.status_code == 200
+    body = ok.get_json()
+    assert body["count"] == 2
+    assert body["recommended_station"] == body["stations"][0]
+
+    assert client.post("/api/charging/recommend", json={"limit": 2}).status_code == 400
+
+    listed = client.get("/api/charging/stations?city=Kandy")
+    assert listed.status_code == 200
+    assert {s["city"] for s in listed.get_json()["stations"]} == {"Kandy"}
+
+
+def test_flags_parse_strings_and_reject_anything_else():
+    from app import create_app
+
+    client = create_app().test_client()
+    route = {"origin": "Colombo", "destination": "Kandy", "limit": 10}
+    everything = client.post("/api/charging/recommend", json=route).get_json()["count"]
+    for flag in ("false", "0", False):
+        body = client.post("/api/charging/recommend", json={**route, "dc_only": flag}).get_json()
+        assert body["count"] == everything
+    dc = client.post("/api/charging/recommend", json={**route, "dc_only": "true"}).get_json()
+    assert dc["stations"] and all(s["charger_type"].startswith("DC") for s in dc["stations"])
+    assert client.post("/api/charging/recommend", json={**route, "dc_only": "no"}).status_code == 400
+    assert client.post("/api/charging/recommend", json={**route, "operational_only": 2}).status_code == 400
+
+    operational = client.get("/api/charging/stations?operational=1").get_json()["count"]
+    assert operational > 0
+    assert client.get("/api/charging/stations?operational=true").get_json()["count"] == operational
+    assert client.get("/api/charging/stations?operational=0").get_json()["count"] == 30 - operational
+    assert client.get("/api/charging/stations?operational=maybe").status_code == 400
@@ -0,0 +1,57 @@
+"""
+Tests for the columnar memory-mapped dataset cache
+"""
+import numpy as np
+import pytest
+
+from services import dataset_cache
+
+
+@pytest.fixture
+def csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "trips.csv"
+    path.write_text(
+        "trip_id,vehicle_model,distance_km,avg_speed,weather,operational\n"
+        "TR1,Leaf,267,41.79,sunny,True\n"
+        "TR2,Model 3,40,51.33,light_rain,False\n"
+        "TR3,Leaf,1200,60.5,sunny,True\n"
+    )
+    return path
+
+
+def test_columns_are_narrowed_and_categorical_codes_are_sorted(csv):
+    arrays = dataset_cache.load_columns(str(csv), decode=False)
+
+    assert arrays["distance_km"].dtype == np.int16
+    assert arrays["avg_speed"].dtype == np.float32
+    assert arrays["operational"].dtype == np.bool_
+    # Codes follow sorted category order, like LabelEncoder
+    assert arrays["weather"].tolist() == [1, 0, 1]
+    assert isinstance(arrays["avg_speed"], np.memmap)
+
+
+def test_load_dataset_prunes_columns_and_decodes_categories(csv):
+    df = dataset_cache.load_dataset(str(csv), columns=["vehicle_model", "distance_km"])
+
+    assert list(df.columns) == ["vehicle_model", "distance_km"]
+    assert df["vehicle_model"].tolist() == ["Leaf", "Model 3", "Leaf"]
+    assert df["distance_km"].tolist() == [267, 40, 1200]
+
+
+def test_unknown_column_raises(csv):
+    with pytest.raises(KeyError):
+        dataset_cache.load_dataset(str(csv), columns=["missing"])
+
+
+def test_cache_is_rebuilt_when_the_csv_changes(csv, tmp_path):
+    first = dataset_cache.build_cache(str(csv))
+    with open(csv, "a") as f:
+        f.write("TR4,ZS EV,15,30.0,monsoon,True\n")
+
+    second = dataset_cache.build_cache(str(csv))
+    df = dataset_cache.load_dataset(str(csv), columns=["weather"])
+
+    assert first != second
+    assert len(df) == 4
+    assert [entry.name for entry in (tmp_path / "cache").iterdir()] == [second.rsplit("/", 1)[1]]
@@ -0,0 +1,44 @@
+"""
+Tests for the chunked synthetic dataset generator
+"""
+import pandas as pd
+
+from genarated_scripts import script
+
+
+def _generate(out_dir, workers):
+    return script.generate(trips=2500, routes=120, seed=7, chunk_size=1000, workers=workers,
+                           out_dir=str(out_dir), reference_date="2025-10-01T12:00:00")
+
+
+def test_output_is_reproducible_regardless_of_worker_count(tmp_path):
+    serial = _generate(tmp_path / "serial", workers=1)
+    parallel = _generate(tmp_path / "parallel", workers=2)
+
+    for name, path in serial.items():
+        with open(path) as a, open(parallel[name]) as b:
+            assert a.read() == b.read(), name
+
+
+def test_schemas_and_row_relationships(tmp_path):
+    paths = _generate(tmp_path, workers=1)
+    driving = pd.read_csv(paths["driving"])
+    energy = pd.read_csv(paths["energy"])
+    charge = pd.read_csv(paths["charge"])
+    route = pd.read_csv(paths["route"])
+
+    for name, columns in script.HEADERS.items():
+        assert list(pd.read_csv(paths[name], nrows=0).columns) == columns
+
+    assert len(driving) == len(energy) == 2500
+    assert driving["trip_id"].is_unique and driving["trip_id"].iloc[-1] == "TR002500"
+    assert (driving["origin"] != driving["destination"]).all()
+    assert (energy["driving_style"] == driving["driving_style"]).all()
+
+    eco = driving[driving["driving_style"] == "Eco"]
+    assert (eco["acceleration_mean"] < 0.6).all() and (eco["braking_intensity"] < 0.4).all()
+
+    assert len(charge) == 3 * 2500
+    assert (charge.groupby("trip_id")["is_recommended"].sum() == 1).all()
+    assert len(route) == 3 * 120
+    assert (route.groupby(["origin", "destination", route.index // 3])["is_optimal"].sum() == 1).all()
@@ -0,0 +1,38 @@
+"""
+Tests for the precompiled feature schemas
+"""
+import numpy as np
+
+from services.feature_schema import FeatureSchema
+
+
+def _schema():
+    return (
+        FeatureSchema(["distance_km", "style_code", "road_type_highway", "road_type_rural"])
+        .numeric("distance_km")
+        .categorical("style", {"Eco": 0, "Normal": 1}, column="style_code", default=1, normalize=str.capitalize)
+        .one_hot("road_type")
+    )
+
+
+def test_encode_row_writes_columns_in_schema_order():
+    row = _schema().encode_row({"distance_km": 12, "style": "eco", "road_type": "rural"})
+    assert row.shape == (1, 4)
+    assert row.tolist() == [[12.0, 0.0, 0.0, 1.0]]
+
+
+def test_unknown_categories_use_defaults_and_dropped_one_hot_is_zero():
+    row = _schema().encode_row({"distance_km": 5, "style": "sporty", "road_type": "city"})
+    assert row.tolist() == [[5.0, 1.0, 0.0, 0.0]]
+
+
+def test_encode_batch_reports_rejected_rows():
+    X, encoded, errors = _schema().encode_batch([
+        {"distance_km": 1, "style": "Eco", "road_type": "highway"},
+        {"style": "Eco"},
+        "not a record",
+        {"distance_km": 3, "style": "Normal", "road_type": "rural"},
+    ])
+    assert encoded == [0, 3]
+    assert set(errors) == {1, 2}
+    assert np.array_equal(X, [[1, 0, 1, 0], [3, 1, 0, 1]])
@@ -0,0 +1,206 @@
+"""
+Tests for the pooled HTTP client, request deadlines and the circuit breaker
+against a local fake upstream that injects latency and errors
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from controllers import external_api_controller, optimal_path_controller
+from services.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    HTTPClient,
+    HTTPStatusError,
+    request_budget,
+    remaining_budget,
+)
+from services.weather_cache import WeatherCache
+
+
+class _FakeUpstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+    connections = set()
+    delay = 0.0
+    status = 200
+    # Close the connection after answering without telling the client, as a
+    # server timing out an idle keep-alive connection does
+    drop_idle = False
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits += 1
+        cls.connections.add(self.client_address)
+        time.sleep(cls.delay)
+        body = json.dumps({
+            "name": "Kandy",
+            "weather": [{"main": "Rain", "description": "light rain"}],
+        }).encode("utf-8")
+        self.send_response(cls.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = cls.drop_idle
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    _FakeUpstream.hits = 0
+    _FakeUpstream.connections = set()
+    _FakeUpstream.delay = 0.0
+    _FakeUpstream.status = 200
+    _FakeUpstream.drop_idle = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeUpstream)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _FakeUpstream.url = f"http://127.0.0.1:{server.server_port}/weather"
+    yield _FakeUpstream
+    server.shutdown()
+    server.server_close()
+
+
+def test_sequential_requests_reuse_one_connection(upstream):
+    client = HTTPClient(timeout=2)
+    for _ in range(5):
+        assert client.get_json(upstream.url + "?q=1")["name"] == "Kandy"
+
+    stats = client.stats()
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+    assert len(upstream.connections) == 1
+    client.close()
+
+
+def test_a_connection_dropped_while_idle_is_retried_once(upstream):
+    upstream.drop_idle = True
+    client = HTTPClient(timeout=2)
+    for _ in range(3):
+        assert client.get_json(upstream.url)["name"] == "Kandy"
+        time.sleep(0.05)
+
+    stats = client.stats()
+    assert upstream.hits == 3 and stats["errors"] == 0
+    assert stats["connections_opened"] == 3
+    client.close()
+
+
+def test_deadline_comes_from_remaining_budget(upstream):
+    upstream.delay = 1.0
+    client = HTTPClient(timeout=10)
+
+    start = time.monotonic()
+    with request_budget(0.2):
+        with pytest.raises(TimeoutError):
+            client.get_json(upstream.url)
+    assert time.monotonic() - start < 0.8
+    client.close()
+
+
+def test_nested_budget_cannot_extend_outer_deadline():
+    with request_budget(0.5):
+        with request_budget(30):
+            assert remaining_budget() <= 0.5
+    assert remaining_budget() is None
+
+
+def test_breaker_opens_after_failures_and_recovers(upstream):
+    upstream.status = 503
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    client = HTTPClient(timeout=2, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(HTTPStatusError):
+            client.get_json(upstream.url)
+    with pytest.raises(CircuitOpenError):
+        client.get_json(upstream.url)
+    assert upstream.hits == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.25)
+    upstream.status = 200
+    assert client.get_json(upstream.url)["name"] == "Kandy"
+    assert breaker.state == CircuitBreaker.CLOSED
+    client.close()
+
+
+def test_client_errors_do_not_trip_the_breaker(upstream):
+    upstream.status = 404
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = HTTPClient(timeout=2, breaker=breaker)
+
+    with pytest.raises(HTTPStatusError):
+        client.get_json(upstream.url)
+    assert breaker.state == CircuitBreaker.CLOSED
+    client.close()
+
+
+def test_calls_cut_short_by_the_budget_do_not_trip_the_breaker(upstream):
+    upstream.delay = 0.3
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    client = HTTPClient(timeout=2, breaker=breaker)
+
+    # A burst of callers with nearly spent budgets against a healthy upstream
+    for _ in range(4):
+        with request_budget(0.05):
+            with pytest.raises(DeadlineExceeded):
+                client.get_json(upstream.url)
+    with request_budget(-1):
+        with pytest.raises(DeadlineExceeded):
+            client.get_json(upstream.url)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert client.stats()["deadline_exceeded"] == 4
+    assert client.stats()["errors"] == 0
+
+    # Neither kind of deadline uses up the half-open trial
+    for _ in range(2):
+        breaker.record_failure()
+    time.sleep(0.25)
+    with request_budget(-1):
+        with pytest.raises(DeadlineExceeded):
+            client.get_json(upstream.url)
+    with request_budget(0.05):
+        with pytest.raises(DeadlineExceeded):
+            client.get_json(upstream.url)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.get_json(upstream.url)["name"] == "Kandy"
+    assert breaker.state == CircuitBreaker.CLOSED
+    client.close()
+
+
+def test_open_circuit_falls_back_to_sunny_without_calling_upstream(upstream, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(external_api_controller, "OPENWEATHER_BASE_URL", upstream.url)
+    monkeypatch.setattr(external_api_controller, "_weather_cache", WeatherCache(ttl=60, stale_ttl=0))
+    monkeypatch.setattr(external_api_controller, "_weather_client", HTTPClient(timeout=2, breaker=breaker))
+
+    encoded, info = optimal_path_controller._resolve_weather(7.2906, 80.6337, None)
+
+    assert encoded == optimal_path_controller.WEATHER_MAP["sunny"]
+    assert info["fallback"] is True
+    assert upstream.hits == 0
+
+
+def test_slow_upstream_is_cut_off_by_request_budget(upstream, monkeypatch):
+    upstream.delay = 1.0
+    monkeypatch.setattr(external_api_controller, "OPENWEATHER_BASE_URL", upstream.url)
+    monkeypatch.setattr(external_api_controller, "_weather_cache", WeatherCache(ttl=60, stale_ttl=0))
+    monkeypatch.setattr(external_api_controller, "_weather_client", HTTPClient(timeout=10))
+
+    start = time.monotonic()
+    with request_budget(0.2):
+        encoded, info = optimal_path_controller._resolve_weather(7.2906, 80.6337, None)
+
+    assert time.monotonic() - start < 0.8
+    assert encoded == optimal_path_controller.WEATHER_MAP["sunny"]
+    assert info["fallback"] is True
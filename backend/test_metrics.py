@@ -0,0 +1,99 @@
+"""
+Tests for the Prometheus metrics registry and the /metrics endpoint
+"""
+import os
+import subprocess
+import sys
+
+os.environ.setdefault("PRELOAD_MODELS", "0")
+
+from services.metrics import (
+    Counter, HTTP_IN_FLIGHT, Histogram, PREDICTION_ERRORS, REGISTRY, STAGE_LATENCY, mark_process_dead, observe_stage,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_latency_seconds", "test", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/x")
+
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{route="/x"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("test_total", "test", ["name"])
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+
+    assert 'test_total{name="a\\"b"} 3.0' in counter.render()
+
+
+def test_observe_stage_records_on_exception():
+    before = STAGE_LATENCY.count("test_model", "predict")
+    try:
+        with observe_stage("test_model", "predict"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    assert STAGE_LATENCY.count("test_model", "predict") == before + 1
+
+
+def test_metrics_endpoint_reports_requests_by_route():
+    from app import create_app
+
+    client = create_app().test_client()
+    client.get("/api/ping")
+    client.post("/api/energy/predict", json={})
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert 'http_requests_total{blueprint="app",route="/api/ping",method="GET",status="200"}' in body
+    assert 'http_requests_total{blueprint="energy",route="/api/energy/predict",method="POST",status="400"}' in body
+    assert 'http_requests_in_flight{blueprint="app"} 1.0' in body
+    assert 'model_stage_duration_seconds_count{model="energy",stage="serialize"}' in body
+    assert "prediction_cache_hits_total" in body
+
+
+def _worker_snapshot(directory, errors, in_flight):
+    """Count in a separate process and publish its snapshot, like a gunicorn worker."""
+    script = (
+        "from services.metrics import HTTP_IN_FLIGHT, PREDICTION_ERRORS, STAGE_LATENCY, write_snapshot\n"
+        f"PREDICTION_ERRORS.inc('mp_test', amount={errors})\n"
+        f"HTTP_IN_FLIGHT.inc('mp_test', amount={in_flight})\n"
+        "STAGE_LATENCY.observe(0.2, 'mp_test', 'predict')\n"
+        "write_snapshot()\n"
+        "import os; print(os.getpid())\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env=dict(os.environ, METRICS_MULTIPROC_DIR=str(directory)),
+    )
+    return int(proc.stdout.strip())
+
+
+def test_scrape_sums_every_worker_and_keeps_exited_counters(tmp_path):
+    first = _worker_snapshot(tmp_path, errors=3, in_flight=4)
+    second = _worker_snapshot(tmp_path, errors=5, in_flight=2)
+    PREDICTION_ERRORS.inc("mp_test", amount=2)
+    HTTP_IN_FLIGHT.inc("mp_test")
+    try:
+        body = REGISTRY.render(str(tmp_path))
+        assert 'prediction_errors_total{model="mp_test"} 10.0' in body
+        assert 'http_requests_in_flight{blueprint="mp_test"} 7.0' in body
+        assert 'model_stage_duration_seconds_count{model="mp_test",stage="predict"} 2' in body
+
+        # Exited workers' counters stay in the total; their gauges do not
+        mark_process_dead(first, str(tmp_path))
+        mark_process_dead(second, str(tmp_path))
+        body = REGISTRY.render(str(tmp_path))
+        assert 'prediction_errors_total{model="mp_test"} 10.0' in body
+        assert 'http_requests_in_flight{blueprint="mp_test"} 1.0' in body
+        assert 'model_stage_duration_seconds_count{model="mp_test",stage="predict"} 2' in body
+    finally:
+        HTTP_IN_FLIGHT.dec("mp_test")
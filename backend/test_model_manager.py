@@ -0,0 +1,126 @@
+"""
+Tests for background retraining and hot-swapping of model versions
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services import dataset_cache, model_manager, model_store, training
+from services.model_manager import LoadedModel, ModelManager, ModelSlot
+
+
+def _write_battery_rows(path, n, seed, noise=False):
+    rng = np.random.default_rng(seed)
+    lines = ["trip_id,battery_capacity_kWh,battery_start_%,eff_kWh_per_km,predicted_remaining_km"]
+    for i in range(n):
+        capacity, start, eff = rng.choice([40, 60, 75]), rng.uniform(10, 100), rng.uniform(0.12, 0.2)
+        target = rng.uniform(0, 600) if noise else capacity * start / 100 / eff
+        lines.append(f"T{seed}-{i},{capacity},{start:.2f},{eff:.3f},{target:.2f}")
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def slot(tmp_path, monkeypatch):
+    """A battery model slot served from a sandboxed data and models directory."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    monkeypatch.setattr(training, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(training, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(dataset_cache, "CACHE_DIR", str(tmp_path / "cache" / "datasets"))
+    monkeypatch.setattr(model_store, "MODELS_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(model_manager, "_slots", {})
+    monkeypatch.setattr(model_manager, "_history", model_manager.deque(maxlen=10))
+
+    path = data_dir / "battery_range_dataset_srilanka.csv"
+    _write_battery_rows(path, 200, seed=0)
+    training.train_model("battery", folds=3)
+
+    def build(artifact):
+        return LoadedModel(model_store.artifact_version(artifact), artifact["model"])
+
+    def load():
+        return model_store.load_artifact("battery_range_rf", str(path))
+
+    battery = ModelSlot("battery", "battery_range_rf", str(path), load=load, build=build)
+    battery.get()
+    return battery
+
+
+def _dataset(slot):
+    return Path(slot.dataset_path)
+
+
+def _append_rows(path, n, seed):
+    extra = path.with_suffix(".extra")
+    _write_battery_rows(extra, n, seed)
+    with open(path, "a") as f:
+        f.writelines(extra.read_text().splitlines(keepends=True)[1:])
+
+
+def test_new_data_grows_the_forest_and_swaps_it_in(slot):
+    manager = ModelManager()
+    served = slot.current
+    assert manager.check("battery") == {"status": "current"}
+
+    _append_rows(_dataset(slot), 100, seed=1)
+    outcome = manager.check("battery")
+
+    assert outcome["status"] == "updated"
+    assert outcome["update"] == "incremental"
+    current = slot.current
+    assert current is not served and current.version == outcome["version"]
+    assert current.trees == served.trees + model_manager.INCREMENT_TREES
+    assert current.source == "incremental" and current.load_ms >= 0
+    # The previous version stays intact for requests still holding it
+    assert served.trees == len(served.model.estimators_)
+
+    saved = model_store.load_artifact("battery_range_rf", slot.dataset_path)
+    assert model_store.artifact_version(saved) == current.version
+    assert saved["metrics"]["holdout"]["r2"] == outcome["holdout"]["r2"]
+
+    versions = model_manager.model_versions()
+    assert versions["models"]["battery"]["version"] == current.version
+    assert [entry["source"] for entry in versions["history"]] == ["load", "incremental"]
+    assert manager.check("battery") == {"status": "current"}
+
+
+def test_candidate_failing_the_holdout_is_rejected(slot):
+    manager = ModelManager()
+    served = slot.current
+
+    _write_battery_rows(_dataset(slot), 300, seed=2, noise=True)
+    outcome = manager.check("battery")
+
+    assert outcome["status"] == "rejected"
+    assert "served cv" in outcome["reason"]
+    assert slot.current is served
+    assert model_manager.model_versions()["history"][-1]["accepted"] is False
+    # The same dataset is not retried on every poll
+    os.utime(slot.dataset_path)
+    assert manager.check("battery") == {"status": "current"}
+
+
+def test_artifact_saved_by_another_process_is_reloaded(slot):
+    served = slot.current
+
+    _append_rows(_dataset(slot), 50, seed=3)
+    training.train_model("battery", folds=0)
+    outcome = ModelManager().check("battery")
+
+    assert outcome["status"] == "reloaded"
+    assert slot.current.version == outcome["version"] != served.version
+    assert slot.current.source == "reload"
+
+
+def test_training_waits_for_another_process_holding_the_lock(slot):
+    manager = ModelManager()
+    _append_rows(_dataset(slot), 50, seed=4)
+
+    lock = os.path.join(model_store.MODELS_DIR, "battery_range_rf.train.lock")
+    open(lock, "w").close()
+    assert manager.check("battery") == {"status": "busy"}
+
+    os.remove(lock)
+    assert manager.check("battery")["status"] == "updated"
@@ -0,0 +1,48 @@
+"""
+Tests for the versioned model artifact store
+"""
+from services import model_store
+
+
+def _write_dataset(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_load_or_train_reuses_fresh_artifact(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, "MODELS_DIR", str(tmp_path))
+    dataset = tmp_path / "data.csv"
+    _write_dataset(dataset, "a,b\n1,2\n")
+
+    calls = []
+
+    def train():
+        calls.append(1)
+        return {"model": {"trained": len(calls)}, "feature_columns": ["a"]}
+
+    first = model_store.load_or_train("demo", str(dataset), train)
+    second = model_store.load_or_train("demo", str(dataset), train)
+
+    assert len(calls) == 1
+    assert second["model"] == first["model"]
+    assert second["feature_columns"] == ["a"]
+
+
+def test_load_or_train_retrains_when_dataset_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, "MODELS_DIR", str(tmp_path))
+    dataset = tmp_path / "data.csv"
+    _write_dataset(dataset, "a,b\n1,2\n")
+
+    calls = []
+
+    def train():
+        calls.append(1)
+        return {"model": {"trained": len(calls)}, "feature_columns": ["a"]}
+
+    model_store.load_or_train("demo", str(dataset), train)
+    _write_dataset(dataset, "a,b\n1,2\n3,4\n")
+    artifact = model_store.load_or_train("demo", str(dataset), train)
+
+    assert len(calls) == 2
+    assert artifact["model"] == {"trained": 2}
+    assert artifact["dataset_checksum"] == model_store.dataset_checksum(str(dataset))
@@ -0,0 +1,65 @@
+"""
+Tests for the quantized prediction cache
+"""
+import pytest
+
+from services.prediction_cache import PredictionCache
+
+
+@pytest.fixture(autouse=True)
+def _cache_enabled(monkeypatch):
+    # The benchmark harness disables caching process-wide when imported
+    monkeypatch.setenv("PREDICTION_CACHE_ENABLED", "1")
+
+
+def _counting(value):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return value
+
+    return compute, calls
+
+
+def test_rows_within_precision_share_an_entry():
+    cache = PredictionCache("test_quantize", ["distance_km", "code"], precision={"distance_km": 1}, maxsize=8)
+    compute, calls = _counting(4.2)
+
+    assert cache.get_or_compute([50.01, 2], compute) == 4.2
+    assert cache.get_or_compute([50.04, 2], compute) == 4.2
+    cache.get_or_compute([50.01, 3], compute)
+
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_is_counted():
+    cache = PredictionCache("test_evict", ["x"], maxsize=2)
+    for x in (1, 2, 3):
+        cache.get_or_compute([x], lambda: x)
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_binding_a_new_model_version_invalidates():
+    cache = PredictionCache("test_version", ["x"], maxsize=8)
+    cache.bind("v1")
+    cache.get_or_compute([1], lambda: "old")
+    cache.bind("v2")
+
+    assert cache.get_or_compute([1], lambda: "new") == "new"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_predictions_from_a_replaced_version_are_not_cached():
+    cache = PredictionCache("test_stale", ["x"], maxsize=8)
+    cache.bind("v2")
+
+    # A request that started on v1 finishes after v2 was bound
+    assert cache.get_or_compute([1], lambda: "old", version="v1") == "old"
+    assert cache.stats()["size"] == 0
+    assert cache.get_or_compute([1], lambda: "new", version="v2") == "new"
+    assert cache.get_or_compute([1], lambda: "unused", version="v2") == "new"
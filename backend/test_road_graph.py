@@ -0,0 +1,76 @@
+"""
+Tests for the road graph routing engine and the /api/routing endpoint
+"""
+import os
+
+os.environ.setdefault("PRELOAD_MODELS", "0")
+
+import pandas as pd
+import pytest
+
+from services.road_graph import NoRouteError, RoadGraph, build_graph
+
+
+@pytest.fixture
+def graph():
+    # A-D direct is fastest but costly; A-B-D is slow and frugal; A-C-D sits in between
+    edges = pd.DataFrame([
+        {"u": 0, "v": 3, "distance_km": 100, "time_min": 60, "energy_kWh": 30, "samples": 1},
+        {"u": 0, "v": 1, "distance_km": 60, "time_min": 70, "energy_kWh": 8, "samples": 1},
+        {"u": 1, "v": 3, "distance_km": 60, "time_min": 70, "energy_kWh": 8, "samples": 1},
+        {"u": 0, "v": 2, "distance_km": 55, "time_min": 40, "energy_kWh": 10, "samples": 1},
+        {"u": 2, "v": 3, "distance_km": 55, "time_min": 40, "energy_kWh": 10, "samples": 1},
+    ])
+    return RoadGraph(["A", "B", "C", "D"], edges)
+
+
+def test_unconstrained_objectives(graph):
+    assert graph.route("A", "D", "time")["path"] == ["A", "D"]
+    energy = graph.route("a", "d", "energy")
+    assert energy["path"] == ["A", "B", "D"]
+    assert energy["total_energy_kWh"] == 16
+
+
+def test_battery_constraint_picks_fastest_route_that_fits(graph):
+    route = graph.route("A", "D", "time", energy_budget_kwh=25)
+    assert route["path"] == ["A", "C", "D"]
+    assert route["total_time_min"] == 80
+    assert route["energy_remaining_kWh"] == 5
+
+    assert graph.route("A", "D", "time", energy_budget_kwh=17)["path"] == ["A", "B", "D"]
+    with pytest.raises(NoRouteError):
+        graph.route("A", "D", "time", energy_budget_kwh=10)
+
+
+def test_csr_layout_is_symmetric(graph):
+    neighbours = {
+        graph.cities[i]: sorted(graph.cities[j] for j in graph.indices[graph.indptr[i]:graph.indptr[i + 1]])
+        for i in range(len(graph.cities))
+    }
+    assert neighbours["D"] == ["A", "B", "C"]
+    assert graph.n_edges == 5
+
+
+def test_dataset_graph_connects_every_city_pair():
+    graph = build_graph()
+    assert graph.n_edges == len(graph.cities) * (len(graph.cities) - 1) // 2
+    route = graph.route("Colombo", "Jaffna", "energy")
+    assert route["path"][0] == "Colombo" and route["path"][-1] == "Jaffna"
+
+
+def test_routing_endpoint():
+    from app import create_app
+
+    client = create_app().test_client()
+    ok = client.post("/api/routing/route", json={"origin": "Colombo", "destination": "Kandy", "objective": "time"})
+    assert ok.status_code == 200
+    assert ok.get_json()["feasible"] is True
+
+    too_low = client.post("/api/routing/route", json={
+        "origin": "Colombo", "destination": "Kandy", "available_energy_kWh": 0.5,
+    })
+    assert too_low.status_code == 400
+    assert too_low.get_json()["feasible"] is False
+
+    unknown = client.post("/api/routing/route", json={"origin": "Colombo", "destination": "Atlantis"})
+    assert unknown.status_code == 400
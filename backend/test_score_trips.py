@@ -0,0 +1,110 @@
+"""
+Tests for the offline trip scoring CLI
+"""
+import pandas as pd
+import pytest
+
+import score_trips
+from controllers.trip_plan_controller import plan_trip_controller
+
+
+@pytest.fixture
+def trips(tmp_path):
+    rows = []
+    for i in range(23):
+        rows.append({
+            "trip_id": f"T{i:03d}",
+            "distance_km": 10 + 7 * i,
+            "driving_style": ["Eco", "Normal", "Aggressive"][i % 3],
+            "road_type": ["city", "highway", "rural"][i % 3],
+            "weather": "sunny" if i % 2 else "light_rain",
+            "battery_capacity_kWh": 60,
+            "battery_start_%": 20 + 3 * i,
+        })
+    rows[5].pop("battery_start_%")
+    path = tmp_path / "trips.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_scores_every_row_like_the_trip_plan_endpoint(trips, tmp_path):
+    output = tmp_path / "scored.csv"
+    summary = score_trips.score_file(str(trips), str(output), chunk_size=5, workers=2, quiet=True)
+
+    assert summary["chunks"] == 5 and summary["rows"] == 23
+    scored = pd.read_csv(output)
+    assert scored["row"].tolist() == list(range(23))
+    assert scored["trip_id"].tolist() == [f"T{i:03d}" for i in range(23)]
+    assert scored.loc[5, "failed_stage"] == "input"
+    assert summary["succeeded"] == 22
+    assert not (tmp_path / "scored.csv.parts").exists()
+
+    trip = pd.read_csv(trips).iloc[7]
+    single = plan_trip_controller({
+        "distance_km": int(trip["distance_km"]),
+        "driving_style": trip["driving_style"],
+        "road_type": trip["road_type"],
+        "weather": trip["weather"],
+        "battery_capacity_kWh": int(trip["battery_capacity_kWh"]),
+        "battery_percent": float(trip["battery_start_%"]),
+    })["summary"]
+    assert scored.loc[7, "predicted_energy_kWh"] == pytest.approx(single["predicted_energy_kWh"])
+    assert scored.loc[7, "predicted_travel_time_min"] == pytest.approx(single["predicted_travel_time_min"])
+
+
+def test_interrupted_run_resumes_after_the_last_completed_chunk(trips, tmp_path, monkeypatch):
+    output = tmp_path / "scored.csv"
+    scored_chunks = []
+    real_task = score_trips._score_task
+
+    def flaky_task(task):
+        if task[0] == 2:
+            raise KeyboardInterrupt
+        scored_chunks.append(task[0])
+        return real_task(task)
+
+    monkeypatch.setattr(score_trips, "_score_task", flaky_task)
+    with pytest.raises(KeyboardInterrupt):
+        score_trips.score_file(str(trips), str(output), chunk_size=5, workers=1, quiet=True)
+    assert scored_chunks == [0, 1]
+    assert not output.exists()
+
+    scored_chunks.clear()
+    monkeypatch.setattr(score_trips, "_score_task", lambda task: scored_chunks.append(task[0]) or real_task(task))
+    summary = score_trips.score_file(str(trips), str(output), chunk_size=5, workers=1, quiet=True)
+
+    assert scored_chunks == [2, 3, 4]
+    assert summary["resumed_chunks"] == 2
+    assert pd.read_csv(output)["row"].tolist() == list(range(23))
+
+    # Different settings start over
+    scored_chunks.clear()
+    (tmp_path / "scored.csv.parts").mkdir()
+    (tmp_path / "scored.csv.parts" / "manifest.json").write_text('{"chunk_size": 99}')
+    score_trips.score_file(str(trips), str(output), chunk_size=5, workers=1, quiet=True)
+    assert scored_chunks == [0, 1, 2, 3, 4]
+
+
+def test_bad_cells_fail_only_their_own_rows(tmp_path):
+    # One text cell makes pandas read the whole capacity column as strings
+    capacities = [60, 0, "abc", 60, -1, 60, 60]
+    path = tmp_path / "trips.csv"
+    pd.DataFrame({
+        "trip_id": [f"T{i}" for i in range(7)],
+        "distance_km": [20, 20, 20, 20, 20, "far", 20],
+        "driving_style": "Eco",
+        "battery_capacity_kWh": capacities,
+        "battery_percent": 80,
+    }).to_csv(path, index=False)
+
+    for workers in (1, 2):
+        output = tmp_path / f"scored_{workers}.csv"
+        summary = score_trips.score_file(str(path), str(output), chunk_size=4, workers=workers, quiet=True)
+        scored = pd.read_csv(output)
+
+        assert summary["rows"] == 7 and summary["succeeded"] == 3
+        assert scored["success"].tolist() == [True, False, False, True, False, False, True]
+        assert scored.loc[1, "error"] == scored.loc[4, "error"] == "battery_capacity_kWh must be greater than 0"
+        assert scored.loc[2, "error"] == "battery_capacity_kWh must be a number"
+        assert scored.loc[5, "error"] == "distance_km must be a number"
+        assert set(scored.loc[~scored["success"], "failed_stage"]) == {"input"}
@@ -0,0 +1,86 @@
+"""
+Tests for the readiness probe and the production server configuration
+"""
+import os
+import runpy
+import threading
+
+from controllers import warmup_controller
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_ready_flips_only_after_warm_up(monkeypatch):
+    monkeypatch.setattr(warmup_controller, "_ready", threading.Event())
+    monkeypatch.setattr(warmup_controller, "_status", {"state": "pending", "models": {}})
+
+    seen = []
+    monkeypatch.setattr(warmup_controller, "WARMUPS", [
+        ("ok", lambda: seen.append(warmup_controller.is_ready()) or {"success": True}),
+        ("missing", lambda: {"success": False, "error": "Model file not found"}),
+        ("broken", lambda: 1 / 0),
+    ])
+
+    assert warmup_controller.readiness()["ready"] is False
+    status = warmup_controller.warm_up_models()
+
+    assert seen == [False]
+    assert status["ready"] is True
+    assert status["models"]["ok"]["ok"] is True
+    assert status["models"]["missing"]["error"] == "Model file not found"
+    assert "division by zero" in status["models"]["broken"]["error"]
+
+
+def test_ready_endpoint():
+    from app import create_app
+
+    response = create_app().test_client().get("/ready")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["ready"] is True
+    assert body["models"]["battery"]["ok"] is True
+
+
+def test_health_answers_while_models_warm_in_background(monkeypatch):
+    monkeypatch.setattr(warmup_controller, "_ready", threading.Event())
+    monkeypatch.setattr(warmup_controller, "_status", {"state": "pending", "models": {}})
+    monkeypatch.setattr(warmup_controller, "_warmup_thread", None)
+    monkeypatch.setenv("PRELOAD_MODELS", "1")
+    monkeypatch.setenv("WARMUP_BACKGROUND", "1")
+
+    release = threading.Event()
+    monkeypatch.setattr(warmup_controller, "WARMUPS", [
+        ("slow", lambda: release.wait(10) and {"success": True}),
+    ])
+
+    from app import create_app
+
+    client = create_app().test_client()
+    assert client.get("/health").status_code == 200
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["state"] == "warming"
+
+    release.set()
+    warmup_controller.start_background_warm_up().join(10)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.get_json()["models"]["slow"]["ok"] is True
+
+
+def test_gunicorn_config_reads_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("METRICS_MULTIPROC_DIR", str(tmp_path / "metrics"))
+    monkeypatch.setenv("TELEMETRY_DIR", str(tmp_path / "telemetry"))
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("GUNICORN_THREADS", "1")
+    monkeypatch.setenv("GUNICORN_TIMEOUT", "45")
+    monkeypatch.setenv("PORT", "8123")
+
+    config = runpy.run_path(os.path.join(BACKEND_DIR, "gunicorn.conf.py"))
+
+    assert config["preload_app"] is True
+    assert config["workers"] == 3
+    assert config["worker_class"] == "sync"
+    assert config["timeout"] == 45
+    assert config["bind"].endswith(":8123")
+    assert config["_own_dirs"] == []
@@ -0,0 +1,74 @@
+"""
+Tests for compact forests and shared memory-mapped model storage
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+from services import shared_models
+from services.tree_engine import compile_model
+
+
+def _data(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 5))
+    y = X[:, 0] * 2 + np.sin(X[:, 1]) + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_models, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("SHARED_MODELS", "1")
+    return tmp_path
+
+
+@pytest.mark.parametrize("estimator", [
+    RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0),
+    GradientBoostingRegressor(n_estimators=25, random_state=0),
+])
+def test_compact_forest_is_smaller_and_exact(estimator):
+    X, y = _data()
+    model = estimator.fit(X, y)
+    compiled = compile_model(model)
+    compact = compiled.compact()
+
+    assert compact.threshold.dtype == np.float32
+    assert compact.left.dtype.itemsize < compiled.left.dtype.itemsize
+    assert compact.nbytes < compiled.nbytes
+
+    X_test, _ = _data(rows=300, seed=3)
+    # Values sitting exactly on split thresholds exercise the float32 rounding
+    splits = compiled.threshold[(compiled.feature == 0) & np.isfinite(compiled.threshold)]
+    X_test[:50, 0] = np.resize(splits, 50).astype(np.float32)
+    assert np.array_equal(compact.predict(X_test), model.predict(X_test))
+
+
+def test_load_predictor_maps_shared_read_only_storage(storage):
+    X, y = _data()
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+
+    predictor, compiled = shared_models.load_predictor("demo", "v1", model)
+    assert predictor is compiled
+    assert isinstance(compiled.threshold, np.memmap)
+    assert not compiled.threshold.flags.writeable
+    assert np.array_equal(predictor.predict(X), model.predict(X))
+
+    report = shared_models.memory_report()["models"]["demo"]
+    assert report["shared"] is True
+    assert report["compact_bytes"] < report["compiled_bytes"] < report["sklearn_bytes"]
+
+    shared_models.load_predictor("demo", "v2", model)
+    assert sorted(p.name for p in storage.iterdir()) == ["demo-v1-v2"]
+
+
+def test_load_predictor_keeps_the_estimator_when_disabled(storage, monkeypatch):
+    monkeypatch.setenv("SHARED_MODELS", "0")
+    X, y = _data()
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+
+    predictor, compiled = shared_models.load_predictor("private", "v1", model)
+    assert predictor is model
+    assert compiled is not None
+    assert shared_models.memory_report()["models"]["private"]["shared"] is False
+    assert list(storage.iterdir()) == []
@@ -0,0 +1,32 @@
+"""
+Tests for the app startup-time budget
+"""
+import os
+
+from benchmarks.bench_startup import format_breakdown, heavy_imports, measure_startup, parse_importtime
+
+# Importing the app must leave time to spare for a liveness probe; override
+# on slow machines
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   json.decoder\n"
+        "import time:       300 |        420 | json\n"
+        "some other warning\n"
+    )
+
+    assert parse_importtime(stderr) == {"json.decoder": (120, 120), "json": (300, 420)}
+
+
+def test_app_import_stays_within_startup_budget():
+    timings = measure_startup("app")
+    total_ms = timings["app"][1] / 1000
+    breakdown = format_breakdown(timings)
+
+    assert heavy_imports(timings) == [], f"model dependencies imported at startup:\n{breakdown}"
+    assert total_ms <= STARTUP_BUDGET_MS, (
+        f"import app took {total_ms:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms):\n{breakdown}"
+    )
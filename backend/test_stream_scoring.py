@@ -0,0 +1,87 @@
+"""
+Tests for the streaming NDJSON bulk scoring endpoint
+"""
+import io
+import json
+
+import pytest
+
+from app import create_app
+from controllers import stream_controller
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+class CountingStream(io.BytesIO):
+    """Input stream that records how many lines have been read."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.lines_read = 0
+
+    def readline(self, size=-1):
+        line = super().readline(size)
+        if line:
+            self.lines_read += 1
+        return line
+
+
+def _battery_ndjson(n):
+    return "".join(
+        json.dumps({"battery_capacity_kWh": 50, "battery_percent": 10 + i % 90, "efficiency_kWh_per_km": 0.17}) + "\n"
+        for i in range(n)
+    ).encode()
+
+
+def test_stream_matches_batch_endpoint_and_reports_bad_lines(client):
+    good = {"battery_capacity_kWh": 60, "battery_percent": 55, "efficiency_kWh_per_km": 0.15}
+    body = "\n".join([json.dumps(good), "", "{not json", json.dumps({"battery_percent": 5}), json.dumps(good)]) + "\n"
+
+    response = client.post("/api/stream/battery?batch_size=2", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    results, summary = lines[:-1], lines[-1]
+    assert [r["line"] for r in results] == [1, 3, 4, 5]
+    assert [r["success"] for r in results] == [True, False, False, True]
+    assert results[1]["error"].startswith("Invalid JSON")
+    assert summary == {"done": True, "model": "battery", "count": 4, "succeeded": 2, "failed": 2}
+
+    single = client.post("/api/battery/predict", json=good).get_json()
+    assert results[0]["predicted_range_km"] == single["predicted_range_km"]
+
+
+def test_input_is_read_only_as_output_is_consumed(client):
+    stream = CountingStream(_battery_ndjson(1000))
+    response = client.post(
+        "/api/stream/battery?batch_size=100",
+        input_stream=stream,
+        content_length=len(stream.getvalue()),
+        content_type="application/x-ndjson",
+    )
+
+    chunks = iter(response.response)
+    first = next(chunks)
+    assert len(first.splitlines()) == 100
+    assert stream.lines_read <= 101
+
+    rest = b"".join(c if isinstance(c, bytes) else c.encode() for c in chunks)
+    assert json.loads(rest.splitlines()[-1])["count"] == 1000
+    response.close()
+
+
+def test_oversized_lines_are_skipped(monkeypatch):
+    monkeypatch.setattr(stream_controller, "STREAM_MAX_LINE_BYTES", 120)
+    data = b'{"battery_percent": ' + b"1" * 200 + b"}\n" + _battery_ndjson(1)
+    out = [json.loads(line) for chunk in stream_controller.score_stream(io.BytesIO(data), "battery") for line in chunk.splitlines()]
+
+    assert out[0]["line"] == 1 and "longer than 120 bytes" in out[0]["error"]
+    assert out[1]["line"] == 2 and out[1]["success"] is True
+
+
+def test_unknown_model(client):
+    assert client.post("/api/stream/nope", data=b"{}\n").status_code == 404
@@ -0,0 +1,256 @@
+"""
+Tests for the streaming telemetry aggregator and its trip endpoints
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app import create_app
+from controllers import telemetry_controller
+from services.telemetry import (
+    FileTelemetryStore, TelemetryStore, TripAccumulator, TripClosedError, TripLimitError, parse_samples,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _trip_samples(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / 10.0
+    speed = np.clip(50 + np.cumsum(rng.normal(0, 0.5, n)), 0, None)
+    accel = rng.normal(0.1, 1.2, n)
+    return t, speed, accel
+
+
+def test_running_statistics_match_the_full_sample():
+    t, speed, accel = _trip_samples(3000)
+    trip = TripAccumulator("T1")
+    # Uploaded in uneven batches, like a vehicle with a flaky connection
+    for start, stop in [(0, 7), (7, 1500), (1500, 3000)]:
+        trip.add(zip(t[start:stop], speed[start:stop], accel[start:stop], [None] * (stop - start)))
+
+    features = trip.features()
+    magnitude = np.abs(accel)
+    distance = np.trapezoid(speed, t) / 3600
+    assert features["acceleration_mean"] == pytest.approx(magnitude.mean(), abs=1e-3)
+    assert features["acceleration_std"] == pytest.approx(magnitude.std(ddof=1), abs=1e-3)
+    assert features["braking_intensity"] == pytest.approx(np.clip(-accel, 0, None).mean(), abs=1e-3)
+    assert features["max_speed"] == pytest.approx(speed.max(), abs=0.01)
+    assert features["distance_km"] == pytest.approx(distance, abs=1e-3)
+    assert features["trip_duration_min"] == pytest.approx(t[-1] / 60, abs=0.01)
+    assert features["avg_speed"] == pytest.approx(distance / (t[-1] / 3600), abs=0.01)
+
+
+def test_braking_events_gaps_and_replayed_samples():
+    trip = TripAccumulator("T2")
+    trip.add([(0.0, 30, -3.5, 10), (0.1, 29, -4.0, 12), (0.2, 28, 0.5, 11), (0.3, 28, -3.2, 15)])
+    # A retried upload overlaps what was already folded in
+    assert trip.add([(0.2, 28, 0.5, 11), (0.3, 28, -3.2, 15), (60.3, 0, 0.0, 15)]) == 1
+
+    summary = trip.summary()
+    assert summary["braking_events"] == 2
+    assert summary["samples"] == 5 and summary["out_of_order"] == 2
+    features = trip.features()
+    # The minute parked between samples is neither distance nor driving time
+    assert features["trip_duration_min"] == pytest.approx(0.3 / 60, abs=0.01)
+    assert features["elevation_gain_m"] == 6
+
+
+def test_parse_samples_accepts_columns_and_reports_bad_rows():
+    samples, errors = parse_samples({"speed": [40, 41], "accel": [0.5, -0.1], "t": [1.0, 1.1]})
+    assert samples == [(1.0, 40.0, 0.5, None), (1.1, 41.0, -0.1, None)]
+    assert errors == []
+
+    samples, errors = parse_samples([
+        {"t": 0, "speed": 40, "accel": 0.1}, {"t": 1, "speed": -1, "accel": 0}, {"t": 2, "accel": "x"},
+        {"speed": 40, "accel": 0.1},
+    ])
+    assert len(samples) == 1
+    assert [e["index"] for e in errors] == [1, 2, 3]
+    assert errors[2]["error"] == "missing t"
+
+    with pytest.raises(ValueError):
+        parse_samples({"speed": [40, 41], "accel": [0.5]})
+
+
+def test_concurrent_trips_do_not_interfere():
+    store = TelemetryStore(max_trips=100)
+    t, speed, accel = _trip_samples(2000)
+    rows = list(zip(t, speed, accel, [None] * len(t)))
+
+    def upload(trip_id):
+        for start in range(0, len(rows), 100):
+            store.open(trip_id).add(rows[start:start + 100])
+
+    threads = [threading.Thread(target=upload, args=(f"T{i}",)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    expected = TripAccumulator("reference")
+    expected.add(rows)
+    for i in range(16):
+        assert store.get(f"T{i}").features() == expected.features()
+    assert store.stats()["open_trips"] == 16
+
+
+def test_store_limits_expires_and_refuses_late_samples():
+    store = TelemetryStore(ttl=60, max_trips=2)
+    store.open("a")
+    store.open("b")
+    with pytest.raises(TripLimitError):
+        store.open("c")
+
+    trip = store.open("a")
+    store.end("a")
+    with pytest.raises(TripClosedError):
+        trip.add([(0.0, 10, 0.0, None)])
+
+    store.get("b").touched_at -= 120
+    store.open("c")
+    assert store.stats() == {"open_trips": 1, "ended": 1, "expired": 1}
+
+
+@pytest.mark.parametrize("kind", ["memory", "file"])
+def test_both_stores_refuse_uploads_to_an_ended_trip_until_it_expires(kind, tmp_path):
+    store = TelemetryStore(ttl=0.3) if kind == "memory" else FileTelemetryStore(str(tmp_path), ttl=0.3)
+    store.add("a", [(0.0, 10, 0.0, None)])
+    store.end("a")
+    with pytest.raises(TripClosedError):
+        store.add("a", [(1.0, 10, 0.0, None)])
+    with pytest.raises(KeyError):
+        store.get("a")
+
+    time.sleep(0.4)
+    accepted, summary = store.add("a", [(1.0, 10, 0.0, None)])
+    assert accepted == 1 and summary["samples"] == 1
+
+
+def test_file_store_limits_expires_and_refuses_late_samples(tmp_path):
+    store = FileTelemetryStore(str(tmp_path), ttl=0.3, max_trips=2)
+    sample = [(0.0, 10, 0.0, None)]
+    store.add("a", sample)
+    store.add("b", sample)
+    with pytest.raises(TripLimitError):
+        store.add("c", sample)
+
+    assert store.end("a").summary()["samples"] == 1
+    with pytest.raises(TripClosedError):
+        store.add("a", [(1.0, 10, 0.0, None)])
+    with pytest.raises(KeyError):
+        store.get("a")
+
+    time.sleep(0.4)
+    accepted, summary = store.add("c", sample)
+    assert accepted == 1 and summary["samples"] == 1
+    assert store.stats() == {"open_trips": 1, "ended": 1, "expired": 1}
+
+
+# Uploads every batch of the given trips to the store in TELEMETRY_DIR, in
+# order, as a separate worker process would
+_UPLOADER = """
+import sys
+import numpy as np
+from services.telemetry import store_from_env
+
+trips, first, step = sys.argv[1].split(","), int(sys.argv[2]), int(sys.argv[3])
+store = store_from_env()
+for seed, trip_id in enumerate(trips):
+    rng = np.random.default_rng(seed)
+    t = np.arange(1000) / 10.0
+    rows = list(zip(t.tolist(), rng.uniform(0, 80, 1000).tolist(), rng.normal(0, 1.2, 1000).tolist(), [None] * 1000))
+    for start in range(first * 100, len(rows), step * 100):
+        store.add(trip_id, rows[start:start + 100])
+"""
+
+
+def _uploader(directory, trips, first=0, step=1):
+    return subprocess.Popen(
+        [sys.executable, "-c", _UPLOADER, ",".join(trips), str(first), str(step)], cwd=BACKEND_DIR,
+        env=dict(os.environ, TELEMETRY_DIR=str(directory)),
+    )
+
+
+def _reference(seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(1000) / 10.0
+    trip = TripAccumulator("reference")
+    trip.add(zip(t.tolist(), rng.uniform(0, 80, 1000).tolist(), rng.normal(0, 1.2, 1000).tolist(), [None] * 1000))
+    return trip.features()
+
+
+def test_a_trip_uploaded_through_several_processes_is_aggregated_once(tmp_path):
+    # Alternate batches of one trip between two worker processes
+    for first in range(10):
+        assert _uploader(tmp_path, ["T0"], first=first, step=10).wait(60) == 0
+    # Four workers race to upload the same batches (retries) of six trips
+    workers = [_uploader(tmp_path, [f"R{i}" for i in range(6)]) for _ in range(4)]
+    assert [worker.wait(60) for worker in workers] == [0] * 4
+
+    store = FileTelemetryStore(str(tmp_path))
+    assert store.stats()["open_trips"] == 7
+    trip = store.end("T0")
+    assert trip.summary()["samples"] == 1000
+    assert trip.features() == _reference(0)
+    for i in range(6):
+        trip = store.end(f"R{i}")
+        assert trip.summary()["samples"] == 1000
+        assert trip.features() == _reference(i)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(telemetry_controller, "_store", TelemetryStore())
+    return create_app().test_client()
+
+
+def test_trip_endpoints_feed_the_driving_model(client, monkeypatch):
+    seen = []
+
+    def predict(features):
+        seen.append(features)
+        return {"success": True, "predicted_driving_style": "Eco", "input_features": features}
+
+    monkeypatch.setattr(telemetry_controller, "predict_driving_style_controller", predict)
+    t, speed, accel = _trip_samples(600)
+    columns = {"t": t.tolist(), "speed": speed.tolist(), "accel": accel.tolist()}
+
+    body = client.post("/api/driving/telemetry/TR1", json={"samples": columns}).get_json()
+    assert body["success"] and body["accepted"] == 600 and body["samples"] == 600
+    progress = client.get("/api/driving/telemetry/TR1").get_json()
+
+    response = client.post("/api/driving/telemetry/TR1/end", json={"road_type": "city", "weather": "sunny"})
+    body = response.get_json()
+    assert response.status_code == 200 and body["predicted_driving_style"] == "Eco"
+    assert seen == [body["features"]]
+    assert body["features"] == {**progress["features"], "road_type": "city", "weather": "sunny"}
+
+    assert client.get("/api/driving/telemetry/TR1").status_code == 404
+    assert client.post("/api/driving/telemetry/TR1/end").status_code == 404
+    assert client.post("/api/driving/telemetry/TR1", json={"samples": columns}).status_code == 409
+    assert client.post("/api/driving/telemetry/TR2", json={"samples": "nope"}).status_code == 400
+
+    # The samples can also be the whole body
+    body = client.post("/api/driving/telemetry/TR2", json=columns).get_json()
+    assert body["success"] and body["accepted"] == 600
+
+
+def test_samples_without_timestamps_are_refused_so_retries_cannot_double_count(client):
+    batch = {"samples": {"speed": [40.0, 41.0, 42.0], "accel": [0.2, 0.3, -0.1]}}
+
+    for _ in range(2):
+        response = client.post("/api/driving/telemetry/TR3", json=batch)
+        assert response.status_code == 400
+        assert [e["error"] for e in response.get_json()["errors"]] == ["missing t"] * 3
+    assert client.get("/api/driving/telemetry/TR3").status_code == 404
+
+    timed = {"samples": {**batch["samples"], "t": [0.0, 0.1, 0.2]}}
+    for accepted in (3, 0):
+        body = client.post("/api/driving/telemetry/TR3", json=timed).get_json()
+        assert body["accepted"] == accepted and body["samples"] == 3
@@ -0,0 +1,58 @@
+"""
+Tests for the training pipeline and its dataset/split caches
+"""
+import numpy as np
+import pytest
+
+from services import dataset_cache, model_store, training
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    monkeypatch.setattr(training, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(training, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(dataset_cache, "CACHE_DIR", str(tmp_path / "cache" / "datasets"))
+    monkeypatch.setattr(model_store, "MODELS_DIR", str(tmp_path / "models"))
+
+    rng = np.random.default_rng(0)
+    lines = ["trip_id,battery_capacity_kWh,battery_start_%,eff_kWh_per_km,predicted_remaining_km"]
+    for i in range(120):
+        capacity, start, eff = rng.choice([40, 60, 75]), rng.uniform(10, 100), rng.uniform(0.12, 0.2)
+        lines.append(f"T{i},{capacity},{start:.2f},{eff:.3f},{capacity * start / 100 / eff:.2f}")
+    (data_dir / "battery_range_dataset_srilanka.csv").write_text("\n".join(lines) + "\n")
+    return tmp_path
+
+
+def test_train_all_writes_artifacts_and_skips_missing_datasets(sandbox):
+    results = training.train_all(["battery", "driving"], workers=2, folds=3)
+
+    battery, driving = results
+    assert battery["status"] == "trained"
+    assert battery["metrics"]["cv_folds"] == 3
+    assert len(battery["metrics"]["cv_per_fold"]) == 3
+    assert driving["status"] == "skipped"
+
+    artifact = model_store.load_artifact("battery_range_rf", training.dataset_path("battery"))
+    assert artifact is not None
+    assert artifact["metrics"]["cv"]["r2"] == battery["metrics"]["cv"]["r2"]
+    assert artifact["model"].n_jobs is None
+
+
+def test_dataset_and_splits_are_cached_per_checksum(sandbox):
+    path = training.dataset_path("battery")
+    checksum = model_store.dataset_checksum(path)
+
+    first = dataset_cache.load_dataset(path, checksum=checksum)
+    cached = list((sandbox / "cache" / "datasets").iterdir())
+    assert len(cached) == 1
+    assert dataset_cache.load_dataset(path, checksum=checksum).equals(first)
+
+    y = first["predicted_remaining_km"].to_numpy()
+    splits = training.cv_splits("battery", checksum, y, folds=4, seed=7)
+    again = training.cv_splits("battery", checksum, y, folds=4, seed=7)
+    assert len(list((sandbox / "cache" / "splits").iterdir())) == 1
+    for a, b in zip(splits, again):
+        np.testing.assert_array_equal(a["test"], b["test"])
+    assert sorted(np.concatenate([s["test"] for s in splits]).tolist()) == list(range(len(y)))
@@ -0,0 +1,43 @@
+"""
+Tests for the compiled tree ensemble engine
+"""
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from services.tree_engine import compile_model
+
+
+def _data(rows=500, features=4, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features))
+    y = X[:, 0] * 3 - X[:, 1] ** 2 + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+def test_random_forest_matches_sklearn_exactly():
+    X, y = _data()
+    model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+
+    X_test, _ = _data(rows=300, seed=1)
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+    assert np.array_equal(compiled.predict(X_test[0]), model.predict(X_test[:1]))
+
+
+def test_gradient_boosting_matches_sklearn_exactly():
+    X, y = _data()
+    model = GradientBoostingRegressor(n_estimators=30, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+
+    X_test, _ = _data(rows=300, seed=2)
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+    for row in X_test[:5]:
+        assert np.array_equal(compiled.predict(row), model.predict(row.reshape(1, -1)))
+
+
+def test_single_tree_and_unsupported_models():
+    X, y = _data()
+    tree = DecisionTreeRegressor(max_depth=4, random_state=0).fit(X, y)
+    assert np.array_equal(compile_model(tree).predict(X), tree.predict(X))
+    assert compile_model(object()) is None
@@ -0,0 +1,91 @@
+"""
+Tests for the /api/trip/plan model chain endpoint
+"""
+import pytest
+
+from app import create_app
+from controllers import trip_plan_controller
+
+TRIP = {"distance_km": 40, "battery_capacity_kWh": 60, "battery_percent": 80, "road_type": "highway"}
+
+
+@pytest.fixture
+def driving(monkeypatch):
+    """Features sent to the driving style model, which answers "Normal"."""
+    seen = []
+
+    def predict(features):
+        seen.append(features)
+        return {"success": True, "predicted_driving_style": "Normal", "confidence_score": 0.9}
+
+    monkeypatch.setattr(trip_plan_controller, "predict_driving_style_controller", predict)
+    return seen
+
+
+@pytest.fixture
+def client(driving):
+    return create_app().test_client()
+
+
+def test_plan_chains_every_model(client, driving):
+    response = client.post("/api/trip/plan", json={**TRIP, "weather": "sunny"})
+    body = response.get_json()
+
+    assert response.status_code == 200 and body["success"]
+    for stage in ("driving_style", "energy", "battery_range", "optimal_path"):
+        assert body[stage]["success"]
+        assert stage in body["timings_ms"]
+    assert "total" in body["timings_ms"]
+    assert driving[0]["distance_km"] == 40 and driving[0]["road_type"] == "highway"
+
+    summary = body["summary"]
+    assert summary["driving_style"] == body["driving_style"]["predicted_driving_style"]
+    assert summary["predicted_energy_kWh"] == body["energy"]["predicted_energy_kWh"]
+    assert summary["predicted_range_km"] == body["battery_range"]["predicted_range_km"]
+    assert summary["battery_used_percent"] == pytest.approx(summary["predicted_energy_kWh"] / 60 * 100, abs=0.01)
+
+
+def test_plan_reports_missing_and_invalid_fields(client):
+    response = client.post("/api/trip/plan", json={"distance_km": 40, "battery_percent": 80})
+    body = response.get_json()
+    assert response.status_code == 400
+    assert body["failed_stage"] == "input" and "battery_capacity_kWh" in body["error"]
+
+    for capacity in (0, -5, "abc", None, True):
+        response = client.post("/api/trip/plan", json={**TRIP, "battery_capacity_kWh": capacity})
+        assert response.status_code == 400
+        assert "battery_capacity_kWh" in response.get_json()["error"]
+
+    # A numeric string is as good as the number
+    response = client.post("/api/trip/plan", json={**TRIP, "battery_capacity_kWh": "60"})
+    assert response.status_code == 200
+
+
+def test_a_known_driving_style_skips_the_driving_model(client, driving):
+    body = client.post("/api/trip/plan", json={**TRIP, "driving_style": "Eco"}).get_json()
+
+    assert body["success"] and body["driving_style"]["skipped"]
+    assert body["summary"]["driving_style"] == "Eco"
+    assert body["energy"]["input_data"]["driving_style"] == "Eco"
+    assert driving == []
+
+
+def test_energy_and_path_models_see_the_same_looked_up_weather(client, driving, monkeypatch):
+    lookups = []
+
+    def resolve_weather(lat, lon):
+        lookups.append((lat, lon))
+        return "light_rain", {"weather": {"condition": "Rain"}}
+
+    monkeypatch.setattr(trip_plan_controller, "resolve_weather", resolve_weather)
+
+    body = client.post("/api/trip/plan", json={**TRIP, "lat": 6.93, "lon": 79.86}).get_json()
+    assert lookups == [(6.93, 79.86)]
+    assert body["energy"]["input_data"]["weather"] == body["optimal_path"]["input_parameters"]["weather"] == "light_rain"
+    assert body["optimal_path"]["weather_info"] == {"weather": {"condition": "Rain"}}
+    # The driving model keeps its own weather categories
+    assert driving[0]["weather"] == "clear"
+
+    results = trip_plan_controller.plan_trips_batch([{**TRIP, "driving_style": "Eco", "lat": 6.93, "lon": 79.86}] * 3)
+    assert lookups == [(6.93, 79.86)] * 2
+    assert all(result["success"] for result in results)
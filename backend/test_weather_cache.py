@@ -0,0 +1,87 @@
+"""
+Tests for the bucketed weather cache against a local stub OpenWeather server
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from controllers import external_api_controller
+from services.weather_cache import WeatherCache
+
+
+class _StubOpenWeather(BaseHTTPRequestHandler):
+    hits = 0
+    delay = 0.0
+
+    def do_GET(self):
+        type(self).hits += 1
+        time.sleep(self.delay)
+        body = json.dumps({
+            "name": "Colombo",
+            "sys": {"country": "LK"},
+            "main": {"temp": 30.1, "humidity": 70},
+            "weather": [{"main": "Clear", "description": "clear sky"}],
+            "dt": 1700000000,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    _StubOpenWeather.hits = 0
+    _StubOpenWeather.delay = 0.2
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOpenWeather)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(external_api_controller, "OPENWEATHER_BASE_URL", f"http://127.0.0.1:{server.server_port}/weather")
+    monkeypatch.setattr(external_api_controller, "_weather_cache", WeatherCache(ttl=60, stale_ttl=0))
+    yield _StubOpenWeather
+    server.shutdown()
+
+
+def test_concurrent_misses_share_one_upstream_fetch(stub_server):
+    results = []
+
+    def lookup():
+        results.append(external_api_controller.get_weather_controller(6.9271, 79.8612))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert stub_server.hits == 1
+    assert len(results) == 8
+    assert all(r["location"]["city"] == "Colombo" for r in results)
+
+
+def test_nearby_coordinates_hit_the_same_bucket(stub_server):
+    first = external_api_controller.get_weather_controller(6.9271, 79.8612)
+    second = external_api_controller.get_weather_controller(6.9268, 79.8609)
+
+    assert stub_server.hits == 1
+    assert second["coords"] == {"lat": 6.9268, "lon": 79.8609}
+    assert first["weather"] == second["weather"]
+
+
+def test_expired_entry_is_refetched(stub_server, monkeypatch):
+    monkeypatch.setattr(external_api_controller, "_weather_cache", WeatherCache(ttl=0.05, stale_ttl=0))
+    stub_server.delay = 0.0
+
+    external_api_controller.get_weather_controller(7.2906, 80.6337)
+    time.sleep(0.1)
+    external_api_controller.get_weather_controller(7.2906, 80.6337)
+
+    assert stub_server.hits == 2
@@ -0,0 +1,59 @@
+"""
+Train every model from backend/data and write versioned artifacts
+
+Independent models train concurrently in a process pool, with the CPU cores
+split between them for tree fitting. Parsed datasets and cross-validation
+splits are cached under backend/.cache and reused while the CSVs are
+unchanged. Models whose dataset is not in backend/data are skipped.
+
+Run from the backend directory:
+    python train.py                       # all models, 5-fold CV
+    python train.py --only energy battery
+    python train.py --folds 0             # skip CV, fit on all rows only
+"""
+import argparse
+import json
+import sys
+import time
+
+from services.training import MODEL_SPECS, train_all
+
+
+def _format_metrics(metrics: dict) -> str:
+    cv = metrics.get("cv")
+    if not cv:
+        return f"rows={metrics['rows']}"
+    scores = " ".join(f"{key}={value:.4f}" for key, value in cv.items())
+    return f"rows={metrics['rows']} cv{metrics['cv_folds']}: {scores}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(MODEL_SPECS), help="Models to train (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="Models trained concurrently (default: one per model)")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds; 0 or 1 disables CV")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the CV splits")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = train_all(args.only, workers=args.workers, folds=args.folds, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps({"results": results, "seconds": round(elapsed, 2)}, indent=2))
+    else:
+        for result in results:
+            if result["status"] == "trained":
+                metrics = result["metrics"]
+                print(f"{result['name']:<14} trained  {metrics['train_seconds']:>7.1f}s  "
+                      f"{result['artifact']}  {_format_metrics(metrics)}")
+            else:
+                print(f"{result['name']:<14} {result['status']:<8} {result['reason']}")
+        print(f"Done in {elapsed:.1f}s")
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""
+WSGI Entry Point
+Builds the app once in the pre-fork master: every model is loaded and warmed
+before workers fork, and the heap is frozen so their pages stay shared
+
+Run from the backend directory:
+    gunicorn -c gunicorn.conf.py
+"""
+
+import gc
+import os
+
+os.environ.setdefault("PRELOAD_MODELS", "1")
+# Warm in this process, before the fork, rather than in a background thread
+os.environ.setdefault("WARMUP_BACKGROUND", "0")
+
+from app import app
+
+# Move everything allocated so far into the permanent generation. Collections
+# in the workers then never touch (and so never copy) the master's objects.
+gc.collect()
+gc.freeze()